@@ -0,0 +1,102 @@
+"""Startup benchmark for the `noteflow` CLI paths.
+
+Runs each command in a fresh interpreter and reports:
+  - median wall time, and the same minus a bare `python -c pass` (the
+    part NoteFlow is responsible for)
+  - the slowest top-level imports, from `python -X importtime`
+  - whether the web stack (FastAPI, Starlette, pydantic, psutil,
+    markdown-it) was imported at all
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --budget-ms 100
+
+HOME points at a throwaway directory so tasks.db and noteflow.json from
+the real user config aren't read (or created). With --budget-ms the exit
+status is non-zero when `noteflow tasks --status` exceeds the budget over
+the interpreter baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO = Path(__file__).resolve().parent.parent
+
+WEB_STACK = ("fastapi", "starlette", "pydantic", "psutil", "markdown_it", "uvicorn")
+
+COMMANDS = {
+    "tasks --status": ["-m", "noteflow.cli", "tasks", "--status"],
+    "tasks --help": ["-m", "noteflow.cli", "tasks", "--help"],
+    "import noteflow.notes": ["-c", "import noteflow.notes"],
+    "import noteflow.config": ["-c", "import noteflow.config"],
+    "import noteflow.noteflow": ["-c", "import noteflow.noteflow"],
+}
+
+
+def _run(args: List[str], env: Dict[str, str], importtime: bool = False) -> Tuple[float, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + args
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, env=env, cwd=REPO, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"{' '.join(args)} failed:\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def _median_ms(args: List[str], env: Dict[str, str], runs: int) -> float:
+    _run(args, env)  # warm the page cache / .pyc files
+    return statistics.median(_run(args, env)[0] for _ in range(runs))
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """[(self_us, cumulative_us, module)] for every `import time:` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()[1:]))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per command.")
+    parser.add_argument("--top", type=int, default=5, help="Slowest imports to list.")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if `tasks --status` costs more than this over the baseline.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONPATH=str(REPO))
+        baseline = _median_ms(["-c", "pass"], env, args.runs)
+        print(f"interpreter baseline: {baseline:.1f} ms\n")
+        status_overhead = None
+        for label, cmd in COMMANDS.items():
+            wall = _median_ms(cmd, env, args.runs)
+            rows = _parse_importtime(_run(cmd, env, importtime=True)[1])
+            loaded = {name.strip().split(".")[0] for _, _, name in rows}
+            web = sorted(loaded.intersection(WEB_STACK))
+            print(f"{label}: {wall:.1f} ms (+{wall - baseline:.1f} ms)"
+                  f"  web stack: {', '.join(web) if web else 'not imported'}")
+            top_level = [r for r in rows if not r[2].startswith(" ")]
+            for _, cumulative, name in sorted(top_level, reverse=True, key=lambda r: r[1])[:args.top]:
+                print(f"    {cumulative / 1000:7.1f} ms  {name}")
+            if label == "tasks --status":
+                status_overhead = wall - baseline
+
+    if args.budget_ms is not None and status_overhead > args.budget_ms:
+        print(f"\n`tasks --status` over budget: +{status_overhead:.1f} ms > {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,8 +27,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterator, List, Optional
 
-import requests
-
 from . import folders as folders_module  # for shared note/header parsing
 
 
@@ -220,6 +218,8 @@ def stream_chat(ai_cfg: Dict, messages: List[Dict]) -> Iterator[bytes]:
     so blocking on requests.iter_lines is fine and doesn't stall the
     event loop.
     """
+    import requests  # deferred: config.py imports this module
+
     endpoint = (ai_cfg.get("endpoint") or "").strip()
     api_key = (ai_cfg.get("api_key") or "").strip()
     model = (ai_cfg.get("model") or "").strip()
@@ -344,6 +344,8 @@ def _try_non_streaming(endpoint, headers, payload):
       - OpenAI:   choices[0].message.content
       - Anthropic native: content[0].text
     """
+    import requests
+
     try:
         resp = requests.post(endpoint, headers=headers, json=payload, timeout=UPSTREAM_TIMEOUT)
     except requests.exceptions.ReadTimeout:
@@ -0,0 +1,274 @@
+"""Index of a folder's archived sites, for the links pane.
+
+Every archive is assets/sites/<timestamp>_<title>-<domain>.html plus a
+.tags sidecar (URL, title, keywords, description) written by
+archive_website(). Rather than globbing and re-parsing those on every
+/api/links call, each folder keeps a manifest at
+assets/archive_index.json with one entry per archive:
+
+    {filename, domain, timestamp, title, url, description, keywords, size, blobs}
+
+`blobs` lists the shared resources a "blobs"-format archive uses, so
+archiver.collect_blobs() can garbage-collect assets/sites/blobs/ without
+reading every archive.
+
+The manifest is updated incrementally: add()/remove() when NoteFlow
+itself archives or deletes, and otherwise only when assets/sites' mtime
+moves (an archive made by another process, or a file deleted by hand),
+in which case just the new or vanished filenames are processed, plus
+any whose .tags sidecar appeared or changed since they were indexed. The
+manifest lives outside assets/sites so writing it doesn't itself look
+like a change there.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+###############################################################################
+# Constants
+###############################################################################
+MANIFEST_NAME = "archive_index.json"
+MANIFEST_VERSION = 2
+ARCHIVE_NAME_RE = re.compile(r'(\d{4})_(\d{2})_(\d{2})_(\d{2})(\d{2})(\d{2})_([^-]+)-(.+?)\.html$')
+BLOB_DIR_NAME = "blobs"  # assets/sites/<this>/ holds the "blobs" format's resources
+BLOB_NAME_RE = re.compile(rb'(?<![0-9a-f])([0-9a-f]{64}\.[A-Za-z0-9]{1,10})')
+SCAN_CHUNK_SIZE = 64 * 1024
+
+# Placeholder values archive_website() writes when a page had no metadata.
+_TAG_PLACEHOLDERS = {"No keywords found", "No description found"}
+
+
+def _parse_tags(tags_path: Path) -> Dict[str, str]:
+    """`Key: value` lines of a .tags sidecar, lower-cased keys."""
+    meta: Dict[str, str] = {}
+    try:
+        text = tags_path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return meta
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            value = value.strip()
+            meta[key.strip().lower()] = "" if value in _TAG_PLACEHOLDERS else value
+    return meta
+
+
+def scan_blob_refs(path: Path) -> Set[str]:
+    """Blob names referenced from the file at `path`, scanned in chunks."""
+    refs = set()
+    hold = 80  # longer than any blob name, so one split across chunks is seen whole
+    pending = b""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(SCAN_CHUNK_SIZE), b''):
+            pending += chunk
+            refs.update(m.decode('ascii') for m in BLOB_NAME_RE.findall(pending))
+            pending = pending[-hold:]
+    return refs
+
+
+def _entry_for(sites_dir: Path, filename: str,
+               blobs: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """Manifest entry for one archive file, or None if it isn't one.
+
+    `blobs` are the blob names the archive uses, when the caller knows;
+    otherwise the archive is scanned for them (only if there are blobs).
+    """
+    match = ARCHIVE_NAME_RE.match(filename)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, safe_title, domain = match.groups()
+    html_path = sites_dir / filename
+    try:
+        size = html_path.stat().st_size
+    except OSError:
+        return None
+    tags_path = html_path.with_suffix(".tags")
+    meta = _parse_tags(tags_path)
+    if blobs is None:
+        try:
+            blobs = scan_blob_refs(html_path) if (sites_dir / BLOB_DIR_NAME).is_dir() else ()
+        except OSError:
+            blobs = ()
+    keywords = [k.strip() for k in meta.get("keywords", "").split(",") if k.strip()]
+    return {
+        "filename": filename,
+        "domain": domain,
+        "timestamp": f"{year}-{month}-{day} {hour}:{minute}:{second}",
+        "title": meta.get("title") or safe_title.replace("_", " ").strip(),
+        "url": meta.get("url", ""),
+        "description": meta.get("description", ""),
+        "keywords": keywords,
+        "size": size,
+        "blobs": sorted(blobs),
+        "tags_mtime_ns": _mtime_ns(tags_path),
+    }
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _entry_matches(entry: Dict, needle: str) -> bool:
+    haystack = " ".join((
+        entry["domain"], entry["title"], entry["url"], entry["description"],
+        " ".join(entry["keywords"]),
+    )).lower()
+    return needle in haystack
+
+
+class ArchiveIndex:
+    """The manifest for one folder. Thread-safe; methods may block on disk."""
+
+    def __init__(self, folder_path: Path):
+        self.sites_dir = folder_path / "assets" / "sites"
+        self.manifest_path = folder_path / "assets" / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._sites_mtime: Optional[int] = None
+        self._loaded = False
+
+    def _dir_mtime(self) -> Optional[int]:
+        try:
+            return self.sites_dir.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_manifest(self) -> None:
+        self._loaded = True
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return
+        self._entries = dict(data.get("archives") or {})
+        self._sites_mtime = data.get("sites_mtime_ns")
+
+    def _save_manifest(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "sites_mtime_ns": self._sites_mtime,
+            "archives": self._entries,
+        }
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Could not write archive index {self.manifest_path}: {e}")
+
+    def refresh(self) -> bool:
+        """Bring the index in line with assets/sites; True if it changed."""
+        mtime = self._dir_mtime()
+        if self._loaded and mtime == self._sites_mtime:
+            return False
+        with self._lock:
+            if not self._loaded:
+                self._load_manifest()
+            if mtime == self._sites_mtime:
+                return False
+            try:
+                names = {n for n in os.listdir(self.sites_dir) if n.endswith(".html")}
+            except OSError:
+                names = set()
+            changed = False
+            for gone in set(self._entries) - names:
+                del self._entries[gone]
+                changed = True
+            for name in names - set(self._entries):
+                entry = _entry_for(self.sites_dir, name)
+                if entry is not None:
+                    self._entries[name] = entry
+                    changed = True
+            # An archive indexed before its .tags sidecar was written (by
+            # another process, say) is re-read once the sidecar appears.
+            for name, old in list(self._entries.items()):
+                tags_mtime = _mtime_ns((self.sites_dir / name).with_suffix(".tags"))
+                if tags_mtime != old.get("tags_mtime_ns"):
+                    entry = _entry_for(self.sites_dir, name, old.get("blobs", ()))
+                    if entry is not None:
+                        self._entries[name] = entry
+                        changed = True
+            self._sites_mtime = mtime
+            self._save_manifest()
+            return changed
+
+    def add(self, filename: str, blobs: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """Index an archive just written (its .tags sidecar included)."""
+        self.refresh()
+        with self._lock:
+            entry = _entry_for(self.sites_dir, filename, blobs)
+            if entry is not None:
+                self._entries[filename] = entry
+            self._sites_mtime = self._dir_mtime()
+            self._save_manifest()
+            return entry
+
+    def remove(self, filename: str) -> None:
+        """Drop an archive that was just deleted."""
+        self.refresh()
+        with self._lock:
+            self._entries.pop(filename, None)
+            self._sites_mtime = self._dir_mtime()
+            self._save_manifest()
+
+    def __contains__(self, filename: str) -> bool:
+        self.refresh()
+        with self._lock:
+            return filename in self._entries
+
+    def blob_refs(self) -> Set[str]:
+        """Blob names used by any indexed archive."""
+        self.refresh()
+        with self._lock:
+            return {name for e in self._entries.values() for name in e.get("blobs", ())}
+
+    def domains(self) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return sorted({e["domain"] for e in self._entries.values()})
+
+    def query(self, q: str = "", domain: Optional[str] = None, offset: int = 0,
+              limit: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """(page of entries, total matching), ordered by domain then time.
+
+        `q` is a case-insensitive substring matched against domain, title,
+        URL, description and keywords; `domain` must match exactly.
+        """
+        self.refresh()
+        needle = (q or "").strip().lower()
+        with self._lock:
+            matches = [
+                e for e in self._entries.values()
+                if (domain is None or e["domain"] == domain)
+                and (not needle or _entry_matches(e, needle))
+            ]
+        matches.sort(key=lambda e: (e["domain"], e["timestamp"], e["filename"]))
+        total = len(matches)
+        offset = max(0, offset)
+        end = total if limit is None else min(total, offset + max(0, limit))
+        return matches[offset:end], total
+
+
+# One ArchiveIndex per folder, shared by every request for it.
+_INDEXES: Dict[str, ArchiveIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(folder_path: Path) -> ArchiveIndex:
+    key = str(folder_path)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = ArchiveIndex(folder_path)
+        return index
@@ -0,0 +1,191 @@
+"""Persistent queue of +link archive jobs, one store per folder.
+
+Saving a note with `+https://...` links no longer waits for the pages to
+be archived. Each distinct URL becomes a job, and the note is saved at
+once with a placeholder link in its place:
+
+    [archiving: example.com](<https://example.com/a> "archive-job:3f2a9c1e")
+
+The web app runs the jobs on its bounded "net" pool and, as each one
+finishes, swaps the placeholder in notes.md for the archived link (or
+for a "archive failed" placeholder, which a retry turns back into a
+pending one). The job id in the link title keeps every placeholder
+unique, so the swap is a plain text replacement.
+
+Jobs live in assets/archive_jobs.json, so queued work survives a
+restart: jobs that were running when the process stopped are queued
+again on load. This module only keeps the records; the scheduling and
+notes.md rewriting are in noteflow.py.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+###############################################################################
+# Constants
+###############################################################################
+JOBS_FILE_NAME = "archive_jobs.json"
+MAX_FINISHED = 200  # finished jobs kept for /api/archive/jobs; oldest dropped first
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+PENDING_STATES = (QUEUED, RUNNING)
+
+# A pending or failed placeholder as it appears in a note; group 1 is the job id.
+PLACEHOLDER_RE = re.compile(
+    r'\[(?:archiving|archive failed): [^\]\n]*\]\(<[^>\n]*> "archive-job:([0-9a-f]+)"\)')
+
+
+def _label(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def pending_placeholder(job: Dict) -> str:
+    """Markdown link standing in for a job's archive until it finishes."""
+    return f'[archiving: {_label(job["url"])}](<{job["url"]}> "archive-job:{job["id"]}")'
+
+
+def failed_placeholder(job: Dict) -> str:
+    """Markdown link left in place of a failed job (retry re-queues it)."""
+    return f'[archive failed: {_label(job["url"])}](<{job["url"]}> "archive-job:{job["id"]}")'
+
+
+class JobStore:
+    """The archive jobs of one folder. Thread-safe; methods write to disk."""
+
+    def __init__(self, folder_path: Path):
+        self.folder_path = folder_path
+        self.path = folder_path / "assets" / JOBS_FILE_NAME
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for job in data.get("jobs", []) if isinstance(data, dict) else []:
+            if job.get("status") == RUNNING:
+                job["status"] = QUEUED  # interrupted by a restart
+            self._jobs[job["id"]] = job
+
+    def _save(self) -> None:
+        finished = sorted((j for j in self._jobs.values() if j["status"] not in PENDING_STATES),
+                          key=lambda j: j["updated"])
+        for job in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del self._jobs[job["id"]]
+        tmp_path = self.path.with_suffix(".json.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps({"jobs": list(self._jobs.values())}, indent=1),
+                                encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not write archive jobs {self.path}: {e}")
+
+    def create(self, url: str) -> Dict:
+        """A new queued job for `url`, with its pending placeholder."""
+        now = time.time()
+        with self._lock:
+            job_id = os.urandom(4).hex()
+            while job_id in self._jobs:
+                job_id = os.urandom(4).hex()
+            job = {"id": job_id, "url": url, "status": QUEUED, "attempts": 0,
+                   "error": None, "created": now, "updated": now}
+            job["placeholder"] = pending_placeholder(job)
+            self._jobs[job_id] = job
+            self._save()
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a queued job running and count the attempt; False if it was
+        cancelled (or finished) in the meantime."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in PENDING_STATES:
+                return False
+            job.update(status=RUNNING, attempts=job["attempts"] + 1, updated=time.time())
+            self._save()
+            return True
+
+    def update(self, job_id: str, expect: Optional[tuple] = None, **fields) -> Optional[Dict]:
+        """Apply `fields` to a job; with `expect`, only while its status is
+        one of those (None otherwise)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or (expect is not None and job["status"] not in expect):
+                return None
+            job.update(fields, updated=time.time())
+            self._save()
+            return dict(job)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Cancel a queued, running or failed job, leaving its plain URL as
+        the placeholder. Returns the job as it was before, or None if it had
+        already finished (or doesn't exist)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in (*PENDING_STATES, FAILED):
+                return None
+            before = dict(job)
+            job.update(status=CANCELLED, placeholder=job["url"], updated=time.time())
+            self._save()
+            return before
+
+    def resolve_placeholders(self, content: str) -> Tuple[str, List[str]]:
+        """Bring job placeholders in `content` up to date with their jobs.
+
+        Text coming back from the editor may carry a placeholder whose job
+        has since finished; it is swapped for what the job left in the
+        note. Returns (content, ids of the jobs still pending in it).
+        """
+        pending: List[str] = []
+
+        def current(match):
+            job = self.get(match.group(1))
+            if job is None:
+                return match.group(0)
+            if job["status"] in PENDING_STATES and match.group(1) not in pending:
+                pending.append(match.group(1))
+            return job["placeholder"]
+
+        return PLACEHOLDER_RE.sub(current, content), pending
+
+    def list(self) -> List[Dict]:
+        """Every job, newest first."""
+        with self._lock:
+            return sorted((dict(j) for j in self._jobs.values()),
+                          key=lambda j: j["created"], reverse=True)
+
+    def pending(self) -> List[Dict]:
+        """Queued and running jobs, oldest first."""
+        with self._lock:
+            return sorted((dict(j) for j in self._jobs.values() if j["status"] in PENDING_STATES),
+                          key=lambda j: j["created"])
+
+
+# One JobStore per folder, shared by every request for it.
+_STORES: Dict[str, JobStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(folder_path: Path) -> JobStore:
+    key = str(folder_path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = JobStore(folder_path)
+        return store
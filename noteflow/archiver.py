@@ -3,34 +3,54 @@
 This module was extracted from noteflow.py during the v0.4.0 port of
 features from noteflow-go. The behavior loosely tracks go-shiori/obelisk:
   - inline images, stylesheets, scripts, fonts as data: URIs
-  - cache + dedupe network fetches within an archive operation
+  - cache + dedupe network fetches within an archive operation, and
+    across operations through a shared pooled session and an on-disk
+    HTTP cache (http_cache.py)
   - per-resource + total-archive timeouts
-  - concurrent prefetch (up to MAX_WORKERS in flight) for the obvious
-    top-level assets, while the serial inliner handles CSS @import chains
+  - concurrent prefetch (up to MAX_WORKERS in flight) of the page's
+    assets, following stylesheets' @import chains and url() references
+    as each one arrives, so the serial inliner mostly hits the spool
+  - bounded memory: fetched resources are spooled to temp files and the
+    document carries placeholders until write_archive() streams it out,
+    base64-encoding each resource straight into the file
 
 Public surface:
   archive_website(url, folder_path) -> {html, markdown} | None
-  process_plus_links(content, folder_path, app_port=None) -> {html, markdown}
+  process_plus_links(content, folder_path, app_port=None, detached=False) -> {html, markdown}
 """
 from __future__ import annotations
 
 import asyncio
 import base64
+import codecs
+import hashlib
+import itertools
+import os
 import re
+import tempfile
 import time
 import mimetypes
 import shutil
+import sqlite3
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
 import concurrent.futures
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Tuple
-from urllib.parse import urljoin, urlparse
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urljoin, urlparse
 
 import requests
+import requests.adapters
 from bs4 import BeautifulSoup
 
+from . import archive_index
+from . import executors
+from . import http_cache
+from .config import ARCHIVE_FORMATS
+
 
 ###############################################################################
 # Tunables
@@ -39,15 +59,39 @@ CONNECT_TIMEOUT = 5            # seconds to establish the TCP connection
 READ_TIMEOUT = 8               # seconds to wait between data chunks
 RESOURCE_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
 TOTAL_TIMEOUT = 30             # seconds for the whole archive operation
+PLUS_LINKS_DEADLINE = 2 * TOTAL_TIMEOUT  # seconds for all of one note's +links together
 MAX_RESOURCE_BYTES = 8 * 1024 * 1024  # skip resources larger than 8 MiB
-MAX_WORKERS = 12               # concurrent prefetch workers
-MAX_PREFETCH = 32              # hard cap on URLs we prefetch up front
+MAX_WORKERS = 12               # concurrent prefetch workers (and pooled connections per host)
+POOL_HOSTS = 32                # hosts the shared session keeps connection pools for
+MAX_PREFETCH = 32              # hard cap on top-level URLs we prefetch up front
+MAX_CSS_PREFETCH = 128         # hard cap on URLs discovered in stylesheets while prefetching
+CHUNK_SIZE = 64 * 1024         # read/write granularity for spooled resources
+BLOB_DIR_NAME = archive_index.BLOB_DIR_NAME  # assets/sites/<this>/ holds the "blobs" format's resources
+BLOB_GC_GRACE = 3600           # seconds a blob is kept after last use before GC may drop it
 
 # SSL certificate verification for outbound fetches. Defaults to on; can be
 # turned off (e.g. behind a corporate TLS-inspection proxy whose private root
 # CA isn't in certifi's bundle) via set_ssl_verify(False).
 SSL_VERIFY = True
 
+# "single" (default) or "blobs"; see ARCHIVE_FORMATS and set_archive_format().
+ARCHIVE_FORMAT = ARCHIVE_FORMATS[0]
+
+
+def set_archive_format(archive_format: str) -> None:
+    """Choose how new archives are written.
+
+    "single" inlines every resource as base64 into one standalone HTML file.
+    "blobs" stores each fetched resource once under assets/sites/blobs/,
+    named by its SHA-256, and the archive HTML references it by that name,
+    so repeat archives of a site share its fonts, CSS and scripts.
+    export_archive() turns either kind into a single file.
+    """
+    global ARCHIVE_FORMAT
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"archive format must be one of {ARCHIVE_FORMATS}")
+    ARCHIVE_FORMAT = archive_format
+
 
 def set_ssl_verify(enabled: bool) -> None:
     """Toggle SSL certificate verification for all archive fetches.
@@ -65,15 +109,41 @@ def set_ssl_verify(enabled: bool) -> None:
             pass
 
 
-def _new_session() -> requests.Session:
-    """Create a session preconfigured with our UA and SSL-verify setting.
+# One long-lived session for every archive fetch: its connection pools
+# (POOL_HOSTS hosts, MAX_WORKERS connections each) are reused across
+# resources and across archive runs, and it carries the on-disk HTTP cache.
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _open_http_cache() -> Optional[http_cache.HttpCache]:
+    try:
+        return http_cache.HttpCache(http_cache.default_root())
+    except (OSError, sqlite3.Error) as e:
+        print(f"Archive HTTP cache unavailable, fetching without it: {e}")
+        return None
+
+
+def _shared_session() -> requests.Session:
+    """The shared archive session, preconfigured with our UA, connection
+    pooling, the HTTP cache (as `session.http_cache`) and the current
+    SSL-verify setting.
 
-    Setting session.verify once applies to every request made through it.
+    Setting session.verify applies to every request made through it.
     """
-    session = requests.Session()
-    session.headers.update({'User-Agent': 'Mozilla/5.0'})
-    session.verify = SSL_VERIFY
-    return session
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': 'Mozilla/5.0'})
+            adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_HOSTS,
+                                                    pool_maxsize=MAX_WORKERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.http_cache = _open_http_cache()
+            _SESSION = session
+        _SESSION.verify = SSL_VERIFY
+        return _SESSION
 
 
 IGNORED_DOMAINS = {
@@ -90,6 +160,87 @@ IGNORED_DOMAINS = {
 }
 
 
+###############################################################################
+# Resource spool
+###############################################################################
+class ResourceSpool:
+    """Everything fetched for one archive operation, kept on disk.
+
+    Each URL is downloaded once, in CHUNK_SIZE pieces, into a private temp
+    directory, so neither the prefetch cache nor the document being built
+    holds resource bytes in memory. The document refers to inlined
+    resources through fixed-width placeholder tokens instead of data: URIs;
+    write_archive() swaps the tokens for the real content (base64-encoded
+    on the fly) while streaming the output file.
+
+    Doubles as the url -> (path, content-type) fetch cache, so it can be
+    passed wherever the old `cache` dict was.
+
+    With `blob_dir` set (the "blobs" archive format), placeholders are
+    written as references to content-addressed files in that directory
+    instead of inline data.
+    """
+
+    def __init__(self, blob_dir: Optional[Path] = None):
+        self._tmp = tempfile.TemporaryDirectory(prefix="noteflow-archive-")
+        self.path = Path(self._tmp.name)
+        self.blob_dir = blob_dir
+        self._blob_names: Dict[str, str] = {}
+        self._fetched: Dict[str, Tuple[Optional[Path], Optional[str]]] = {}
+        self._parts: Dict[str, Tuple[str, Path, Optional[str]]] = {}
+        self._files = itertools.count()
+        self._prefix = f"nfres-{os.urandom(6).hex()}-"
+        self.token_re = re.compile(re.escape(self._prefix) + r"\d{6}")
+        self.token_len = len(self._prefix) + 6
+
+    # The fetch-cache side (dict-like, as prefetch/fetch_resource use it).
+    def __contains__(self, url: str) -> bool:
+        return url in self._fetched
+
+    def __getitem__(self, url: str) -> Tuple[Optional[Path], Optional[str]]:
+        return self._fetched[url]
+
+    def __setitem__(self, url: str, result: Tuple[Optional[Path], Optional[str]]) -> None:
+        self._fetched[url] = result
+
+    def new_file(self) -> Path:
+        """A fresh path inside the spool directory (thread-safe)."""
+        return self.path / f"r{next(self._files)}"
+
+    def store_text(self, text: str) -> Path:
+        path = self.new_file()
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    # The placeholder side.
+    def _token(self, kind: str, path: Path, content_type: Optional[str]) -> str:
+        token = f"{self._prefix}{len(self._parts):06d}"
+        self._parts[token] = (kind, path, content_type)
+        return token
+
+    def data_uri(self, path: Path, content_type: Optional[str]) -> str:
+        """Placeholder for `path` as a data: URI."""
+        return self._token("data", path, content_type)
+
+    def text(self, path: Path) -> str:
+        """Placeholder for `path`'s contents as UTF-8 text (may contain tokens)."""
+        return self._token("text", path, None)
+
+    def stylesheet(self, path: Path) -> str:
+        """Placeholder for a stylesheet URL; `path` may contain tokens."""
+        return self._token("css", path, "text/css")
+
+    def blob_names(self) -> set:
+        """Blobs written for this archive so far (the "blobs" format)."""
+        return set(self._blob_names.values())
+
+    def is_placeholder(self, value: str) -> bool:
+        return value.startswith(self._prefix)
+
+    def close(self) -> None:
+        self._tmp.cleanup()
+
+
 ###############################################################################
 # Fetching primitives
 ###############################################################################
@@ -101,94 +252,159 @@ def should_ignore_resource(url: str) -> bool:
         return False
 
 
-def _fetch_one(session: requests.Session, url: str) -> Tuple[Optional[bytes], Optional[str]]:
-    """Single fetch with content-length + downloaded-size guard."""
+def _fetch_one(session: requests.Session, url: str, dest: Path) -> Tuple[Optional[Path], Optional[str]]:
+    """Stream one resource into `dest`, with content-length + downloaded-size guards.
+
+    With an HTTP cache on the session, a fresh cached copy is used as is
+    and a stale one is revalidated (a 304 costs no body download).
+    """
+    cache = getattr(session, 'http_cache', None)
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and entry.fresh and cache.copy_body(entry, dest):
+        return dest, entry.content_type
     try:
-        resp = session.get(url, timeout=RESOURCE_TIMEOUT, stream=True)
-        if not resp.ok:
-            return None, None
-        cl = resp.headers.get('content-length')
-        if cl and cl.isdigit() and int(cl) > MAX_RESOURCE_BYTES:
-            resp.close()
-            return None, None
-        content = resp.content
-        if len(content) > MAX_RESOURCE_BYTES:
+        resp = session.get(url, timeout=RESOURCE_TIMEOUT, stream=True,
+                           headers=entry.validators() if entry is not None else None)
+        with resp:
+            if resp.status_code == 304 and entry is not None:
+                cache.revalidated(url, resp.headers)
+                if cache.copy_body(entry, dest):
+                    return dest, entry.content_type
+                return None, None
+            if not resp.ok:
+                return None, None
+            cl = resp.headers.get('content-length')
+            if cl and cl.isdigit() and int(cl) > MAX_RESOURCE_BYTES:
+                return None, None
+            size = 0
+            with open(dest, 'wb') as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_RESOURCE_BYTES:
+                        break
+                    f.write(chunk)
+        if size == 0 or size > MAX_RESOURCE_BYTES:
+            dest.unlink(missing_ok=True)
             return None, None
-        return content, resp.headers.get('content-type', '')
+        if cache is not None and resp.status_code == 200:
+            cache.store(url, dest, resp.headers)
+        return dest, resp.headers.get('content-type', '')
     except Exception as e:
         print(f"Error fetching {url}: {e}")
+        dest.unlink(missing_ok=True)
         return None, None
 
 
-def fetch_resource(session, url, cache=None, deadline=None):
-    """Cache- and deadline-aware single fetch. Returns (bytes, content-type)."""
-    if cache is not None and url in cache:
-        return cache[url]
+def fetch_resource(session, url, spool, deadline=None):
+    """Cache- and deadline-aware single fetch. Returns (spooled path, content-type)."""
+    if url in spool:
+        return spool[url]
     if deadline is not None and time.time() > deadline:
-        if cache is not None:
-            cache[url] = (None, None)
+        spool[url] = (None, None)
         return None, None
-    result = _fetch_one(session, url)
-    if cache is not None:
-        cache[url] = result
+    result = _fetch_one(session, url, spool.new_file())
+    spool[url] = result
     return result
 
 
-def prefetch(session, urls, cache, deadline):
-    """Warm the cache for the most important URLs in parallel.
+def _is_stylesheet(url: str, content_type: Optional[str]) -> bool:
+    return 'css' in (content_type or '') or urlparse(url).path.endswith('.css')
+
+
+def _css_references(css_content: str, css_url: str) -> List[Tuple[str, bool]]:
+    """(absolute URL, is @import) for what inline_css_resources() would fetch."""
+    refs = [(urljoin(css_url, imp), True) for imp in _CSS_IMPORT_RE.findall(css_content)
+            if not imp.startswith('data:')]
+    refs.extend((urljoin(css_url, u), False) for u in _CSS_URL_RE.findall(css_content)
+                if not u.startswith('data:') and not u.endswith('.map'))
+    return refs
+
+
+def prefetch(session, urls, spool, deadline):
+    """Warm the spool for a page's resources in parallel.
+
+    Each stylesheet is scanned as soon as it arrives and its @imports and
+    url() targets are queued on the same pool (imports first, since they
+    lead to more fetches), so CSS-heavy pages don't fall back to a serial
+    waterfall in inline_css_resources(). Workers are refilled as fetches
+    complete until the plan is done or the deadline passes.
 
     Bounded by:
-      - MAX_PREFETCH       (don't dispatch unbounded work)
-      - MAX_WORKERS        (concurrency)
-      - the archive deadline (stop waiting on stragglers when it expires)
+      - MAX_PREFETCH          (top-level URLs dispatched)
+      - MAX_CSS_PREFETCH      (URLs discovered in stylesheets)
+      - _MAX_CSS_IMPORT_DEPTH (@import chains followed no deeper than the inliner)
+      - MAX_WORKERS           (concurrency)
+      - the archive deadline  (stop waiting on stragglers when it expires)
     """
     seen = set()
-    pending = []
-    for u in urls:
-        if u in cache or u in seen or should_ignore_resource(u):
-            continue
+    queue = deque()  # (url, @import depth) not yet handed to a worker
+    discovered = 0
+
+    def plan(u, depth, urgent=False):
+        if u in spool or u in seen or should_ignore_resource(u):
+            return False
         seen.add(u)
-        pending.append(u)
-        if len(pending) >= MAX_PREFETCH:
+        if urgent:
+            queue.appendleft((u, depth))
+        else:
+            queue.append((u, depth))
+        return True
+
+    planned = 0
+    for u in urls:
+        if planned >= MAX_PREFETCH:
             break
-    if not pending:
+        planned += plan(u, 0)
+    if not queue:
         return
 
     # Don't enter the threadpool at all if the deadline is already blown.
-    remaining = deadline - time.time() if deadline else None
-    if remaining is not None and remaining <= 0:
-        for u in pending:
-            cache[u] = (None, None)
+    if deadline and deadline <= time.time():
+        for u, _ in queue:
+            spool[u] = (None, None)
         return
 
     pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-    futures = {pool.submit(_fetch_one, session, u): u for u in pending}
+    running = {}
     try:
-        for f in as_completed(futures, timeout=remaining):
-            u = futures[f]
-            try:
-                cache[u] = f.result()
-            except Exception:
-                cache[u] = (None, None)
-    except concurrent.futures.TimeoutError:
-        # Deadline hit while we still had pending fetches. Mark whatever
-        # didn't complete as failed and move on — the serial walker can
-        # still write out a partial archive with the assets we did get.
-        for f, u in futures.items():
-            if u not in cache:
-                cache[u] = (None, None)
+        while queue or running:
+            while queue and len(running) < MAX_WORKERS:
+                u, depth = queue.popleft()
+                running[pool.submit(_fetch_one, session, u, spool.new_file())] = (u, depth)
+            remaining = deadline - time.time() if deadline else None
+            if remaining is not None and remaining <= 0:
+                break
+            done, _ = concurrent.futures.wait(running, timeout=remaining,
+                                              return_when=FIRST_COMPLETED)
+            if not done:
+                break  # deadline
+            for f in done:
+                u, depth = running.pop(f)
+                try:
+                    spool[u] = f.result()
+                except Exception:
+                    spool[u] = (None, None)
+                path, ctype = spool[u]
+                if path is None or depth > _MAX_CSS_IMPORT_DEPTH or not _is_stylesheet(u, ctype):
+                    continue
+                for ref, is_import in _css_references(_read_text(path), u):
+                    if discovered >= MAX_CSS_PREFETCH:
+                        break
+                    discovered += plan(ref, depth + 1, urgent=is_import)
     finally:
-        # cancel_futures cancels anything that hasn't started yet; threads
-        # that are mid-request will exit naturally as their per-request
-        # read timeout fires.
+        # Deadline hit with fetches still pending: mark them failed and
+        # move on — the serial walker can still write out a partial
+        # archive with the assets we did get. cancel_futures cancels
+        # anything that hasn't started; threads mid-request exit as their
+        # per-request read timeout fires.
+        for u, _ in list(running.values()) + list(queue):
+            if u not in spool:
+                spool[u] = (None, None)
         pool.shutdown(wait=False, cancel_futures=True)
 
 
-def convert_to_data_uri(content_bytes: bytes, content_type: Optional[str]) -> str:
-    if not content_type:
-        content_type = 'application/octet-stream'
-    b64 = base64.b64encode(content_bytes).decode('utf-8')
-    return f"data:{content_type};base64,{b64}"
+def _read_text(path: Path) -> str:
+    return path.read_bytes().decode('utf-8', errors='replace')
 
 
 ###############################################################################
@@ -199,7 +415,7 @@ _CSS_URL_RE = re.compile(r'url\(\s*["\']?([^)"\']+)["\']?\s*\)')
 _MAX_CSS_IMPORT_DEPTH = 5
 
 
-def inline_css_resources(session, css_content, base_url, cache=None, deadline=None, _depth=0):
+def inline_css_resources(session, css_content, base_url, spool, deadline=None, _depth=0):
     """Inline @import chains and url() references into a stylesheet.
 
     Each match is rewritten exactly once via re.sub callbacks. The previous
@@ -208,6 +424,9 @@ def inline_css_resources(session, css_content, base_url, cache=None, deadline=No
     `url("...")`, the replace never matched, `done` stayed False, and the loop
     spun forever (this hung archiving of CSS-heavy sites like foxnews.com).
     re.sub replaces the actual matched text, so no re-scan is needed.
+
+    url() targets become spool placeholders, so the returned CSS is only as
+    big as the stylesheet text itself.
     """
     if _depth > _MAX_CSS_IMPORT_DEPTH:
         return css_content
@@ -217,23 +436,22 @@ def inline_css_resources(session, css_content, base_url, cache=None, deadline=No
         if imp.startswith('data:'):
             return m.group(0)
         css_url = urljoin(base_url, imp)
-        content, _ = fetch_resource(session, css_url, cache=cache, deadline=deadline)
-        if not content:
+        path, _ = fetch_resource(session, css_url, spool, deadline=deadline)
+        if not path:
             return ''  # drop imports we couldn't fetch
-        sub_css = content.decode('utf-8', errors='replace')
         return inline_css_resources(
-            session, sub_css, css_url, cache=cache, deadline=deadline, _depth=_depth + 1
+            session, _read_text(path), css_url, spool, deadline=deadline, _depth=_depth + 1
         )
 
     def repl_url(m):
         u = m.group(1)
-        if u.startswith('data:') or u.endswith('.map'):
+        if u.startswith('data:') or u.endswith('.map') or spool.is_placeholder(u):
             return m.group(0)
         resource_url = urljoin(base_url, u)
-        cbytes, ctype = fetch_resource(session, resource_url, cache=cache, deadline=deadline)
-        if not cbytes:
+        path, ctype = fetch_resource(session, resource_url, spool, deadline=deadline)
+        if not path:
             return m.group(0)  # leave the original reference untouched on failure
-        return f'url({convert_to_data_uri(cbytes, ctype)})'
+        return f'url({spool.data_uri(path, ctype)})'
 
     css_content = _CSS_IMPORT_RE.sub(repl_import, css_content)
     css_content = _CSS_URL_RE.sub(repl_url, css_content)
@@ -241,7 +459,11 @@ def inline_css_resources(session, css_content, base_url, cache=None, deadline=No
 
 
 def _collect_top_level_urls(soup, base_url) -> list:
-    """Return absolute URLs for obvious top-level assets to prefetch."""
+    """Return absolute URLs for obvious top-level assets to prefetch.
+
+    Stylesheets come first: their sub-resources can only be discovered
+    once they arrive, so they are the page's critical path.
+    """
     urls = []
 
     def add(src):
@@ -249,6 +471,8 @@ def _collect_top_level_urls(soup, base_url) -> list:
             return
         urls.append(urljoin(base_url, src))
 
+    for link in soup.find_all('link', rel='stylesheet'):
+        add(link.get('href'))
     for img in soup.find_all('img'):
         add(img.get('src'))
         srcset = img.get('srcset') or ''
@@ -263,126 +487,105 @@ def _collect_top_level_urls(soup, base_url) -> list:
             add(url_part)
     for script in soup.find_all('script'):
         add(script.get('src'))
-    for link in soup.find_all('link', rel='stylesheet'):
-        add(link.get('href'))
+    for elem in soup.find_all(style=True):
+        for u in re.findall(r'url\(["\']?([^)"\']+)["\']?\)', elem['style']):
+            add(u)
     return urls
 
 
-def inline_html_resources(session, soup, base_url, cache=None, deadline=None):
-    # Images and srcset
-    for img in soup.find_all('img'):
-        src = img.get('src')
-        if src and not src.startswith('data:') and not should_ignore_resource(src):
-            full_url = urljoin(base_url, src)
-            cbytes, ctype = fetch_resource(session, full_url, cache=cache, deadline=deadline)
-            if cbytes:
-                img['src'] = convert_to_data_uri(cbytes, ctype)
-
-        srcset = img.get('srcset')
-        if srcset:
-            parts = []
-            for part in srcset.split(','):
-                urlpart = part.strip().split(' ')[0]
-                if urlpart and not urlpart.startswith('data:') and not should_ignore_resource(urlpart):
-                    full_url = urljoin(base_url, urlpart)
-                    cbytes, ctype = fetch_resource(session, full_url, cache=cache, deadline=deadline)
-                    if cbytes:
-                        rest = part.strip()[len(urlpart):]
-                        parts.append(convert_to_data_uri(cbytes, ctype) + rest)
-                    else:
-                        parts.append(part)
-                else:
-                    parts.append(part)
-            img['srcset'] = ', '.join(parts)
+def inline_html_resources(session, soup, base_url, spool, deadline=None):
+    def wanted(src):
+        return (src and not src.startswith('data:') and not spool.is_placeholder(src)
+                and not should_ignore_resource(src))
 
-    for source in soup.find_all('source'):
-        ssrc = source.get('src')
-        if ssrc and not ssrc.startswith('data:') and not should_ignore_resource(ssrc):
-            full_url = urljoin(base_url, ssrc)
-            cbytes, ctype = fetch_resource(session, full_url, cache=cache, deadline=deadline)
-            if cbytes:
-                source['src'] = convert_to_data_uri(cbytes, ctype)
-        srcset = source.get('srcset')
+    def inline_srcset(srcset):
+        parts = []
+        for part in srcset.split(','):
+            urlpart = part.strip().split(' ')[0]
+            if wanted(urlpart):
+                path, ctype = fetch_resource(session, urljoin(base_url, urlpart), spool, deadline=deadline)
+                if path:
+                    rest = part.strip()[len(urlpart):]
+                    parts.append(spool.data_uri(path, ctype) + rest)
+                    continue
+            parts.append(part)
+        return ', '.join(parts)
+
+    # Images, <source>s and their srcsets
+    for tag in soup.find_all(['img', 'source']):
+        src = tag.get('src')
+        if wanted(src):
+            path, ctype = fetch_resource(session, urljoin(base_url, src), spool, deadline=deadline)
+            if path:
+                tag['src'] = spool.data_uri(path, ctype)
+        srcset = tag.get('srcset')
         if srcset:
-            parts = []
-            for part in srcset.split(','):
-                urlpart = part.strip().split(' ')[0]
-                if urlpart and not urlpart.startswith('data:') and not should_ignore_resource(urlpart):
-                    full_url = urljoin(base_url, urlpart)
-                    cbytes, ctype = fetch_resource(session, full_url, cache=cache, deadline=deadline)
-                    if cbytes:
-                        rest = part.strip()[len(urlpart):]
-                        parts.append(convert_to_data_uri(cbytes, ctype) + rest)
-                    else:
-                        parts.append(part)
-                else:
-                    parts.append(part)
-            source['srcset'] = ', '.join(parts)
+            tag['srcset'] = inline_srcset(srcset)
 
+    # Scripts and stylesheets are inlined in a single-file archive; in the
+    # "blobs" format they stay external, pointing at the shared blob.
     for script in soup.find_all('script'):
         src = script.get('src')
-        if src and not src.startswith('data:') and not should_ignore_resource(src):
-            res_url = urljoin(base_url, src)
-            cbytes, _ = fetch_resource(session, res_url, cache=cache, deadline=deadline)
-            if cbytes:
-                script.string = cbytes.decode('utf-8', errors='replace')
+        if wanted(src):
+            path, ctype = fetch_resource(session, urljoin(base_url, src), spool, deadline=deadline)
+            if path and spool.blob_dir is not None:
+                script['src'] = spool.data_uri(path, ctype or 'text/javascript')
+            elif path:
+                script.string = spool.text(path)
                 del script['src']
 
     for link in soup.find_all('link', rel='stylesheet'):
         href = link.get('href')
-        if href and not should_ignore_resource(href):
+        if wanted(href):
             css_url = urljoin(base_url, href)
-            cbytes, _ = fetch_resource(session, css_url, cache=cache, deadline=deadline)
-            if cbytes:
-                css_text = cbytes.decode('utf-8', errors='replace')
-                css_text = inline_css_resources(session, css_text, css_url, cache=cache, deadline=deadline)
+            path, _ = fetch_resource(session, css_url, spool, deadline=deadline)
+            if path:
+                css_text = inline_css_resources(session, _read_text(path), css_url, spool, deadline=deadline)
+                if spool.blob_dir is not None:
+                    link['href'] = spool.stylesheet(spool.store_text(css_text))
+                    continue
                 style_tag = soup.new_tag('style')
-                style_tag.string = css_text
+                style_tag.string = spool.text(spool.store_text(css_text))
                 link.replace_with(style_tag)
 
     for elem in soup.find_all(style=True):
         style_val = elem['style']
         urls = re.findall(r'url\(["\']?([^)"\']+)["\']?\)', style_val)
         for u in urls:
-            if not u.startswith('data:') and not should_ignore_resource(u):
-                full_url = urljoin(base_url, u)
-                cbytes, ctype = fetch_resource(session, full_url, cache=cache, deadline=deadline)
-                if cbytes:
-                    style_val = style_val.replace(u, convert_to_data_uri(cbytes, ctype))
+            if wanted(u):
+                path, ctype = fetch_resource(session, urljoin(base_url, u), spool, deadline=deadline)
+                if path:
+                    style_val = style_val.replace(u, spool.data_uri(path, ctype))
         elem['style'] = style_val
 
     return soup
 
 
-def inline_all_resources(url: str, source_html: str) -> str:
-    session = _new_session()
+def inline_all_resources(url: str, soup, spool: ResourceSpool) -> None:
+    """Replace the external resources of `soup` with spool placeholders."""
+    session = _shared_session()
     base_url = urljoin(url, '/')
-
-    cache: Dict[str, Tuple[Optional[bytes], Optional[str]]] = {}
     deadline = time.time() + TOTAL_TIMEOUT
 
-    soup = BeautifulSoup(source_html, 'html.parser')
-
-    # Prefetch top-level assets concurrently to warm the cache; the serial
-    # walker below then mostly hits cache and writes back data: URIs.
-    prefetch(session, _collect_top_level_urls(soup, base_url), cache, deadline)
+    # Prefetch the page's assets (and what their stylesheets pull in)
+    # concurrently to warm the spool; the serial walker below then mostly
+    # hits it and writes back placeholders.
+    prefetch(session, _collect_top_level_urls(soup, base_url), spool, deadline)
 
     for _ in range(5):  # bounded number of passes
         if time.time() > deadline:
             break
         # Count external resource attrs before/after instead of serializing
         # the whole document twice per pass (str(soup) is expensive on big pages).
-        before_ext = _count_external_refs(soup)
-        soup = inline_html_resources(session, soup, base_url, cache=cache, deadline=deadline)
-        after_ext = _count_external_refs(soup)
+        before_ext = _count_external_refs(soup, spool)
+        soup = inline_html_resources(session, soup, base_url, spool, deadline=deadline)
+        after_ext = _count_external_refs(soup, spool)
         if after_ext == 0 or after_ext >= before_ext:
             # Fully inlined, or no progress this pass.
             break
 
-    return str(soup)
-
 
-def _count_external_refs(soup) -> int:
+def _count_external_refs(soup, spool) -> int:
     """Cheap progress metric for the inlining loop (not a full serialize)."""
     n = 0
     for tag in soup.find_all(True):
@@ -395,11 +598,264 @@ def _count_external_refs(soup) -> int:
             if val.startswith("http://") or val.startswith("https://") or val.startswith("//") or val.startswith("/"):
                 n += 1
         style = tag.get("style")
-        if style and ("url(" in style) and ("data:" not in style):
+        if style and ("url(" in style) and ("data:" not in style) and not spool.token_re.search(style):
             n += 1
     return n
 
 
+###############################################################################
+# Streaming output
+###############################################################################
+def _write_base64(src: Path, out) -> None:
+    with open(src, 'rb') as f:
+        while True:
+            # A multiple of 3 bytes encodes without padding, so the chunks'
+            # encodings concatenate into one valid base64 string.
+            chunk = f.read(CHUNK_SIZE - CHUNK_SIZE % 3)
+            if not chunk:
+                return
+            out.write(base64.b64encode(chunk))
+
+
+def _text_chunks(path: Path):
+    """Decoded UTF-8 text of `path`, CHUNK_SIZE bytes at a time."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with open(path, 'rb') as f:
+        while True:
+            raw = f.read(CHUNK_SIZE)
+            if not raw:
+                tail = decoder.decode(b'', final=True)
+                if tail:
+                    yield tail
+                return
+            yield decoder.decode(raw)
+
+
+def _expand(chunks, spool: ResourceSpool, out, _depth: int = 0, _in_blob: bool = False) -> None:
+    """Write text `chunks` to binary `out`, expanding spool placeholders.
+
+    Placeholders are fixed-width, so holding back the last token_len - 1
+    characters of each chunk is enough to catch one split across chunks.
+    `_in_blob` is set while writing a blob, whose references to other
+    blobs are relative to the blob directory rather than to the archive.
+    """
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        pos = 0
+        for m in spool.token_re.finditer(pending):
+            out.write(pending[pos:m.start()].encode('utf-8'))
+            _write_part(spool, m.group(0), out, _depth, _in_blob)
+            pos = m.end()
+        keep = max(pos, len(pending) - (spool.token_len - 1))
+        out.write(pending[pos:keep].encode('utf-8'))
+        pending = pending[keep:]
+    out.write(pending.encode('utf-8'))
+
+
+def _write_part(spool: ResourceSpool, token: str, out, depth: int, in_blob: bool = False) -> None:
+    kind, path, content_type = spool._parts[token]
+    if kind != "data" and depth >= _MAX_CSS_IMPORT_DEPTH:
+        return
+    if kind == "css":
+        # A stylesheet with placeholders of its own: expand it first.
+        expanded = spool.new_file()
+        with open(expanded, 'wb') as css_out:
+            _expand(_text_chunks(path), spool, css_out, depth + 1, spool.blob_dir is not None)
+        kind, path = "data", expanded
+    if kind == "data" and spool.blob_dir is not None:
+        name = spool._blob_names.get(str(path))
+        if name is None:
+            name = spool._blob_names[str(path)] = store_blob(spool.blob_dir, path, content_type)
+        out.write((name if in_blob else f"{BLOB_DIR_NAME}/{name}").encode('ascii'))
+        return
+    if kind == "data":
+        out.write(f"data:{content_type or 'application/octet-stream'};base64,".encode('ascii'))
+        _write_base64(path, out)
+        return
+    _expand(_text_chunks(path), spool, out, depth + 1, in_blob)
+
+
+def write_archive(document: str, spool: ResourceSpool, dest: Path) -> None:
+    """Write `document` to `dest`, streaming each placeholder's resource in.
+
+    The file is written under a temporary name and renamed into place, so
+    the links pane never sees a half-written archive.
+    """
+    tmp_path = dest.with_name(dest.name + ".part")
+    try:
+        with open(tmp_path, 'wb') as out:
+            _expand([document], spool, out)
+        os.replace(tmp_path, dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+_BODY_OPEN_RE = re.compile(rb'<body\b[^>]*>', re.IGNORECASE)
+
+
+def _copy_with_stamp(src: Path, dest: Path, stamp: bytes) -> None:
+    """Copy `src` to `dest`, inserting `stamp` right after the <body> tag.
+
+    Streams in CHUNK_SIZE pieces; the tail of each chunk is held back so a
+    <body> tag split across two chunks is still found.
+    """
+    tmp_path = dest.with_name(dest.name + ".part")
+    hold = 4096  # longest <body ...> tag we look for across a boundary
+    try:
+        with open(src, 'rb') as f, open(tmp_path, 'wb') as out:
+            pending = b""
+            stamped = False
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                pending += chunk
+                if not stamped:
+                    m = _BODY_OPEN_RE.search(pending)
+                    if m:
+                        out.write(pending[:m.end()] + stamp)
+                        pending = pending[m.end():]
+                        stamped = True
+                if not chunk:
+                    break
+                keep = 0 if stamped else min(len(pending), hold)
+                out.write(pending[:len(pending) - keep])
+                pending = pending[len(pending) - keep:]
+            out.write(pending)
+        os.replace(tmp_path, dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+###############################################################################
+# Blob store ("blobs" archive format)
+###############################################################################
+# A blob reference: sha256 hex plus the extension that gives it a MIME type
+# when served (browsers refuse stylesheets served as octet-stream).
+def _blob_extension(content_type: Optional[str]) -> str:
+    mime = (content_type or '').split(';')[0].strip().lower()
+    return (mimetypes.guess_extension(mime) if mime else None) or '.bin'
+
+
+def store_blob(blob_dir: Path, src: Path, content_type: Optional[str]) -> str:
+    """Store `src` in `blob_dir` under its SHA-256 (once); return the blob name."""
+    digest = hashlib.sha256()
+    with open(src, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    name = digest.hexdigest() + _blob_extension(content_type)
+    dest = blob_dir / name
+    if dest.exists():
+        # Mark it as in use so a concurrent collect_blobs() leaves it alone
+        # until the archive referencing it has been written.
+        os.utime(dest)
+        return name
+    blob_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = blob_dir / f".{name}.{os.urandom(4).hex()}.part"
+    try:
+        shutil.copyfile(src, tmp_path)
+        os.replace(tmp_path, dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return name
+
+
+def collect_blobs(sites_dir: Path, grace: float = BLOB_GC_GRACE) -> int:
+    """Delete blobs no archive references any more; returns how many.
+
+    References come from the archive index (recorded once per archive, see
+    archive_index.py) and, transitively, from the stylesheet blobs they use
+    (which refer to fonts and images). Only .html files the index doesn't
+    cover are scanned. Blobs used within the last `grace` seconds are kept,
+    so an archive still being written can't lose one.
+    """
+    blob_dir = sites_dir / BLOB_DIR_NAME
+    if not blob_dir.is_dir():
+        return 0
+    index = archive_index.get_index(sites_dir.parent.parent)
+    referenced = index.blob_refs()
+    for archive in sites_dir.glob("*.html"):
+        if archive.name not in index:
+            referenced |= archive_index.scan_blob_refs(archive)
+    stylesheets = [name for name in referenced if name.endswith(".css")]
+    while stylesheets:
+        path = blob_dir / stylesheets.pop()
+        if path.is_file():
+            new_refs = archive_index.scan_blob_refs(path) - referenced
+            referenced |= new_refs
+            stylesheets.extend(name for name in new_refs if name.endswith(".css"))
+    cutoff = time.time() - grace
+    removed = 0
+    for blob in blob_dir.iterdir():
+        try:
+            if blob.name in referenced or blob.stat().st_mtime > cutoff:
+                continue
+            blob.unlink()
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+class _LocalResponse:
+    """The slice of requests.Response the fetch primitives use, over a file."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.ok = path is not None
+        self.status_code = 200 if self.ok else 404
+        content_type = mimetypes.guess_type(path.name)[0] if path is not None else None
+        self.headers = {'content-type': content_type or 'application/octet-stream'}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        with open(self.path, 'rb') as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+
+
+class _BlobSession:
+    """Session stand-in that serves an archive's blobs from disk, so the
+    normal inliner can turn a "blobs" archive back into a single file."""
+
+    host = "noteflow-archive.invalid"
+
+    def __init__(self, sites_dir: Path):
+        self.blob_dir = (sites_dir / BLOB_DIR_NAME).resolve()
+
+    def get(self, url, timeout=None, stream=False, headers=None):
+        parsed = urlparse(url)
+        prefix = f"/{BLOB_DIR_NAME}/"
+        if parsed.netloc != self.host or not parsed.path.startswith(prefix):
+            return _LocalResponse(None)
+        target = (self.blob_dir / unquote(parsed.path[len(prefix):])).resolve()
+        if target.parent != self.blob_dir or not target.is_file():
+            return _LocalResponse(None)
+        return _LocalResponse(target)
+
+
+def export_archive(html_path: Path, dest: Path) -> None:
+    """Write a standalone single-file copy of the archive at `html_path`.
+
+    Single-file archives are copied as they are; "blobs" archives have
+    their blobs inlined again (streamed, as when archiving).
+    """
+    if not archive_index.scan_blob_refs(html_path):
+        shutil.copyfile(html_path, dest)
+        return
+    spool = ResourceSpool()
+    try:
+        session = _BlobSession(html_path.parent)
+        soup = BeautifulSoup(html_path.read_text(encoding='utf-8', errors='replace'), 'html.parser')
+        inline_html_resources(session, soup, f"http://{session.host}/", spool)
+        write_archive(str(soup), spool, dest)
+    finally:
+        spool.close()
+
+
 ###############################################################################
 # External archiver detection
 ###############################################################################
@@ -417,14 +873,16 @@ def _find_external_archiver() -> Optional[str]:
     return None
 
 
-def _run_external_archiver(binary: str, url: str) -> Optional[str]:
-    """Shell out to monolith/obelisk; return the archived HTML or None.
+def _run_external_archiver(binary: str, url: str, dest: Path) -> bool:
+    """Shell out to monolith/obelisk, archiving into `dest`. True on success.
 
     Both tools accept (url, -o output) but their flag surfaces differ:
       - monolith: writes to stdout by default; use `-` or `-o <path>`
       - obelisk:  needs `-o <path>` and writes the file directly
     To keep this simple and capture stdout cross-tool, we use `-o -`
-    where supported and stdout for monolith.
+    where supported and stdout for monolith. stdout goes straight to
+    `dest` rather than through a pipe buffer, so a huge archive is never
+    held in memory.
     """
     try:
         if binary == "monolith":
@@ -447,46 +905,71 @@ def _run_external_archiver(binary: str, url: str) -> Optional[str]:
             # obelisk wants -o; "-" sends to stdout on most builds.
             cmd = [binary, "-o", "-", url]
         else:
-            return None
+            return False
 
-        proc = subprocess.run(
-            cmd,
-            capture_output=True,
-            timeout=TOTAL_TIMEOUT + 5,
-            check=False,
-        )
+        with open(dest, 'wb') as out:
+            proc = subprocess.run(
+                cmd,
+                stdout=out,
+                stderr=subprocess.PIPE,
+                timeout=TOTAL_TIMEOUT + 5,
+                check=False,
+            )
 
         if proc.returncode != 0:
             err = proc.stderr.decode('utf-8', errors='replace')[:300]
             print(f"{binary} returned {proc.returncode}: {err}")
-            return None
-        html = proc.stdout.decode('utf-8', errors='replace')
-        if not html.strip() or "<html" not in html.lower():
+            return False
+        with open(dest, 'rb') as f:
+            head = f.read(64 * 1024)
+        if not head.strip() or b"<html" not in head.lower():
             print(f"{binary} returned empty/non-HTML output")
-            return None
-        return html
+            return False
+        return True
     except subprocess.TimeoutExpired:
         print(f"{binary} exceeded {TOTAL_TIMEOUT + 5}s timeout — falling back")
-        return None
+        return False
     except Exception as e:
         print(f"{binary} failed: {e}")
-        return None
+        return False
 
 
 ###############################################################################
 # Public entry points
 ###############################################################################
-def archive_website(url: str, folder_path: Path) -> Optional[Dict[str, str]]:
+_STAMP_STYLE = 'position:fixed;top:0;left:0;background:#fff;padding:5px;font-size:12px;'
+
+
+def _stamp_html(display_timestamp: str) -> str:
+    return f'<div style="{_STAMP_STYLE}">Archived on {display_timestamp}</div>'
+
+
+def archive_website(url: str, folder_path: Path,
+                    before_write: Optional[Callable[[], bool]] = None) -> Optional[Dict[str, str]]:
     """Archive `url` into folder_path/assets/sites/. Returns html/markdown links.
 
     Prefers an external archiver (monolith / obelisk) when available; falls
-    back to the in-process BeautifulSoup-based inliner otherwise.
+    back to the in-process BeautifulSoup-based inliner otherwise. Either
+    way the archive is streamed to disk: resources are spooled to temp
+    files and base64-encoded straight into the output, so peak memory is
+    the page's own markup plus a few CHUNK_SIZE buffers however big its
+    images, fonts and scripts are.
+
+    In the "blobs" format (set_archive_format) the in-process inliner is
+    always used, since the external tools can only write single files.
+
+    `before_write`, if given, is called once everything is fetched, just
+    before the first file is written; if it returns False nothing is
+    written and None is returned (the caller gave up on this archive).
     """
+    archive_dir = folder_path / "assets" / "sites"
+    blobs = ARCHIVE_FORMAT == "blobs"
+    spool = ResourceSpool(blob_dir=archive_dir / BLOB_DIR_NAME if blobs else None)
+    tags_path = html_path = None
     try:
-        archive_dir = folder_path / "assets" / "sites"
         archive_dir.mkdir(parents=True, exist_ok=True)
 
-        session = _new_session()
+        session = _shared_session()
 
         # Always fetch the page once with requests so we can read <title>,
         # <meta>, etc. for the sidecar metadata file — even if we delegate
@@ -500,35 +983,8 @@ def archive_website(url: str, folder_path: Path) -> Optional[Dict[str, str]]:
         title = soup.title.string.strip() if soup.title and soup.title.string else "Untitled"
         domain = urlparse(url).netloc
 
-        timestamp = datetime.now().strftime("%Y_%m_%d_%H%M%S")
-        display_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        safe_title = re.sub(r'[^\w\-_]', '_', title)
-        base_filename = f"{timestamp}_{safe_title}-{domain}"
-
-        external = _find_external_archiver()
-        final_html = None
-        if external:
-            print(f"archiving with {external}: {url}")
-            final_html = _run_external_archiver(external, url)
-        if final_html is None:
-            if external:
-                print(f"{external} failed — falling back to in-process archiver")
-            final_html = inline_all_resources(url, response.text)
-
-        # Stamp the archive with a corner timestamp.
-        soup_final = BeautifulSoup(final_html, 'html.parser')
-        if soup_final.body:
-            stamp = soup_final.new_tag('div')
-            stamp['style'] = 'position:fixed;top:0;left:0;background:#fff;padding:5px;font-size:12px;'
-            stamp.string = f'Archived on {display_timestamp}'
-            soup_final.body.insert(0, stamp)
-        final_html = str(soup_final)
-
-        html_filename = f"{base_filename}.html"
-        html_path = archive_dir / html_filename
-        html_path.write_text(final_html, encoding='utf-8')
-
-        # Sidecar metadata for the links pane.
+        # Sidecar metadata for the links pane (read before the inliner
+        # rewrites the tree).
         description = None
         keywords = None
         for meta in soup.find_all('meta'):
@@ -541,6 +997,36 @@ def archive_website(url: str, folder_path: Path) -> Optional[Dict[str, str]]:
             if first_p:
                 description = first_p.get_text().strip()[:200] + '...'
 
+        timestamp = datetime.now().strftime("%Y_%m_%d_%H%M%S")
+        display_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        safe_title = re.sub(r'[^\w\-_]', '_', title)
+        base_filename = f"{timestamp}_{safe_title}-{domain}"
+        html_filename = f"{base_filename}.html"
+        html_path = archive_dir / html_filename
+
+        external = None if blobs else _find_external_archiver()
+        archived = False
+        if external:
+            print(f"archiving with {external}: {url}")
+            external_output = spool.new_file()
+            archived = _run_external_archiver(external, url, external_output)
+        if not archived:
+            if external:
+                print(f"{external} failed — falling back to in-process archiver")
+            inline_all_resources(url, soup, spool)
+            # Stamp the archive with a corner timestamp.
+            if soup.body:
+                stamp = soup.new_tag('div')
+                stamp['style'] = _STAMP_STYLE
+                stamp.string = f'Archived on {display_timestamp}'
+                soup.body.insert(0, stamp)
+
+        if before_write is not None and not before_write():
+            print(f"Archive of {url} no longer wanted; nothing written")
+            return None
+
+        # The .tags sidecar goes first, so whoever sees the .html (the
+        # links pane, another process's index) also finds its metadata.
         tags_content = (
             f"URL: {url}\n"
             f"Title: {title}\n"
@@ -548,7 +1034,16 @@ def archive_website(url: str, folder_path: Path) -> Optional[Dict[str, str]]:
             f"Keywords: {keywords if keywords else 'No keywords found'}\n"
             f"Description: {description if description else 'No description found'}\n"
         )
-        (archive_dir / f"{base_filename}.tags").write_text(tags_content, encoding='utf-8')
+        tags_path = archive_dir / f"{base_filename}.tags"
+        tags_path.write_text(tags_content, encoding='utf-8')
+        if archived:
+            # Stamp the archive with a corner timestamp.
+            _copy_with_stamp(external_output, html_path,
+                             _stamp_html(display_timestamp).encode('utf-8'))
+        else:
+            write_archive(str(soup), spool, html_path)
+
+        archive_index.get_index(folder_path).add(html_filename, spool.blob_names())
 
         return {
             'html': (
@@ -562,48 +1057,104 @@ def archive_website(url: str, folder_path: Path) -> Optional[Dict[str, str]]:
         }
     except Exception as e:
         print(f"Error saving webpage: {e}")
+        if tags_path is not None and not html_path.exists():
+            tags_path.unlink(missing_ok=True)
         return None
+    finally:
+        spool.close()
+
+
+PLUS_LINK_RE = re.compile(r'\+((https?://)[^\s]+)')
+
+
+def self_reference(url: str, app_port: Optional[int]) -> Optional[Dict[str, str]]:
+    """Replacement for a +link pointing back at this NoteFlow server, else None."""
+    parsed_url = urlparse(url)
+    host = parsed_url.netloc.split(':')[0]
+    is_localhost = host in ('localhost', '127.0.0.1', '0.0.0.0')
+    is_same_port = app_port and parsed_url.port and str(parsed_url.port) == str(app_port)
+    if is_localhost and is_same_port:
+        return {
+            'html': f'{url} <em>(self-referencing link removed)</em>',
+            'markdown': f'{url} *(self-referencing link removed)*',
+        }
+    return None
+
 
+async def process_plus_links(content: str, folder_path: Path, app_port: Optional[int] = None,
+                             detached: bool = False) -> Dict[str, str]:
+    """Replace `+http(s)://...` markers with archived links.
 
-async def process_plus_links(content: str, folder_path: Path, app_port: Optional[int] = None) -> Dict[str, str]:
-    """Replace `+http(s)://...` markers with archived links."""
+    All links in `content` are archived concurrently on the executors "net"
+    pool, whose size is the process-wide cap on archives in flight (shared
+    with /api/archive). A URL repeated in the note is archived once. Links
+    still unfinished after PLUS_LINKS_DEADLINE are left as plain URLs, so a
+    note with many links takes about as long as its slowest page.
+
+    The web app queues +links as background jobs instead (archive_jobs.py);
+    this is the synchronous path `noteflow append` uses. It passes
+    `detached`, which runs the archives on daemon threads
+    (executors.run_detached), so a link past the deadline doesn't hold
+    the process open at exit.
+    """
     print("Processing content for +links...")
+    matches = list(PLUS_LINK_RE.finditer(content))
+    if not matches:
+        return {'html': content, 'markdown': content}
 
-    async def replace_link(match):
+    results: Dict[str, Dict[str, str]] = {}
+    pending: Dict[asyncio.Future, str] = {}
+    for match in matches:
         url = match.group(1)
+        if url in results or url in pending.values():
+            continue
         print(f"Found +link: {url}")
-
-        parsed_url = urlparse(url)
-        host = parsed_url.netloc.split(':')[0]
-        is_localhost = host in ('localhost', '127.0.0.1', '0.0.0.0')
-        is_same_port = app_port and parsed_url.port and str(parsed_url.port) == str(app_port)
-        if is_localhost and is_same_port:
-            return {
-                'html': f'{url} <em>(self-referencing link removed)</em>',
-                'markdown': f'{url} *(self-referencing link removed)*',
-            }
-
-        # archive_website() is blocking; offload to a thread so saving a note
-        # that contains +links doesn't block the event loop.
-        result = await asyncio.to_thread(archive_website, url, folder_path)
-        if result:
-            return result
-        return {'html': url, 'markdown': url}
-
-    pattern = r'\+((https?://)[^\s]+)'
-    matches = re.finditer(pattern, content)
-    replacements = []
+        removed = self_reference(url, app_port)
+        if removed is not None:
+            results[url] = removed
+            continue
+        # archive_website() is blocking; run it off the event loop so
+        # saving a note that contains +links doesn't block it.
+        run = executors.run_detached if detached else executors.run_in
+        task = asyncio.ensure_future(run("net", archive_website, url, folder_path))
+        pending[task] = url
+
+    if pending:
+        done, not_done = await asyncio.wait(pending, timeout=PLUS_LINKS_DEADLINE)
+        for task in done:
+            try:
+                result = task.result()
+            except Exception as e:
+                print(f"Error archiving {pending[task]}: {e}")
+                result = None
+            if result:
+                results[pending[task]] = result
+        for task in not_done:
+            # The worker thread can't be interrupted; it finishes on its own
+            # timeouts, but this note keeps the plain URL.
+            print(f"Archiving {pending[task]} missed the {PLUS_LINKS_DEADLINE}s deadline")
+            task.add_done_callback(_discard_result)
+
+    # Splice every replacement in a single pass over the content.
+    html_parts: List[str] = []
+    markdown_parts: List[str] = []
+    pos = 0
     for match in matches:
-        replacement = await replace_link(match)
-        replacements.append((match.start(), match.end(), replacement))
-
-    html_result = list(content)
-    markdown_result = list(content)
-    for start, end, replacement in reversed(replacements):
-        html_result[start:end] = replacement['html']
-        markdown_result[start:end] = replacement['markdown']
+        url = match.group(1)
+        replacement = results.get(url) or {'html': url, 'markdown': url}
+        html_parts += (content[pos:match.start()], replacement['html'])
+        markdown_parts += (content[pos:match.start()], replacement['markdown'])
+        pos = match.end()
+    html_parts.append(content[pos:])
+    markdown_parts.append(content[pos:])
 
     return {
-        'html': ''.join(html_result),
-        'markdown': ''.join(markdown_result),
+        'html': ''.join(html_parts),
+        'markdown': ''.join(markdown_parts),
     }
+
+
+def _discard_result(task: asyncio.Future) -> None:
+    """Retrieve a late archive's outcome so asyncio doesn't log it as unhandled."""
+    if not task.cancelled():
+        task.exception()
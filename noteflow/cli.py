@@ -15,7 +15,6 @@ text at query time, matching the Go version's behavior.
 from __future__ import annotations
 
 import argparse
-import asyncio
 import json
 import re
 import sys
@@ -95,6 +94,15 @@ def _save_views(views: Dict) -> None:
     _views_path().write_text(json.dumps(views, indent=2))
 
 
+def _configured_sync_workers() -> Optional[int]:
+    """sync_workers from the web UI's noteflow.json, if set."""
+    fp = Path(platformdirs.user_config_dir("noteflow-py")) / "noteflow.json"
+    try:
+        return int(json.loads(fp.read_text()).get("sync_workers"))
+    except Exception:
+        return None
+
+
 ###############################################################################
 # append
 ###############################################################################
@@ -130,9 +138,9 @@ def run_append(argv: List[str]) -> int:
         print("error: empty body — pass --body, positional args, or pipe via stdin", file=sys.stderr)
         return 2
 
-    # Defer heavy imports so `noteflow tasks --help` stays snappy.
-    from .noteflow import NoteManager, create_directories, validate_folder_path, APP_PORT
-    from . import archiver, folders as folders_module, sigils
+    # Only the note model — never the web app (see notes.py).
+    from .notes import NoteManager, create_directories, validate_folder_path
+    from . import folders as folders_module, sigils
 
     target = validate_folder_path(args.folder)
     create_directories(target)
@@ -141,7 +149,11 @@ def run_append(argv: List[str]) -> int:
     body = sigils.expand_file_sigils(body, target)
 
     if "+http" in body:
-        processed = asyncio.run(archiver.process_plus_links(body, target, app_port=APP_PORT))
+        import asyncio
+        from . import archiver
+        # Detached: an archive still running at the deadline mustn't keep
+        # this process alive after the note is written.
+        processed = asyncio.run(archiver.process_plus_links(body, target, detached=True))
         body = processed["markdown"]
 
     nm.add_note(args.title, body)
@@ -199,6 +211,12 @@ def _build_tasks_parser() -> argparse.ArgumentParser:
     p.add_argument("--json", action="store_true", help="Output JSON instead of a table.")
     p.add_argument("--status", action="store_true",
                    help="Print a one-line summary (counts) instead of the task list.")
+    # Sync
+    p.add_argument("--jobs", type=int, default=None, metavar="N",
+                   help="Folders to scan in parallel before listing (default: sync_workers "
+                        "from noteflow.json, else 8).")
+    p.add_argument("--sync-stats", action="store_true",
+                   help="Print per-folder sync timings to stderr.")
     return p
 
 
@@ -229,6 +247,14 @@ def _apply_filters(tasks: List[Dict], *, done: bool, only_done: bool,
     return out
 
 
+def _print_sync_stats(stats: List[Dict]) -> None:
+    for s in sorted(stats, key=lambda s: -(s["scan_ms"] or 0)):
+        scan = f"{s['scan_ms']:.1f}" if s["scan_ms"] is not None else "-"
+        write = f"{s['write_ms']:.1f}" if s["write_ms"] is not None else "-"
+        print(f"{s['status']:<9} scan {scan:>7}ms  write {write:>7}ms  {s['path']}",
+              file=sys.stderr)
+
+
 def _print_table(tasks: List[Dict]) -> None:
     if not tasks:
         print("(no matching tasks)")
@@ -286,7 +312,9 @@ def run_tasks(argv: List[str]) -> int:
                 setattr(args, key, v[key])
 
     from . import folders as folders_module
-    registry = folders_module.FolderRegistry()
+    registry = folders_module.FolderRegistry(
+        sync_workers=_configured_sync_workers() or folders_module.SYNC_WORKERS
+    )
 
     # --toggle action takes precedence over listing.
     if args.toggle:
@@ -326,7 +354,9 @@ def run_tasks(argv: List[str]) -> int:
         print(f"saved view: {args.save_view} = {json.dumps(filters)}", file=sys.stderr)
 
     # Sync first so we get fresh task data without waiting for the background ticker.
-    registry.sync_all()
+    registry.sync_all(workers=args.jobs)
+    if args.sync_stats:
+        _print_sync_stats(registry.last_sync_stats)
 
     raw = registry.get_all_tasks(include_done=args.done or args.only_done)
     filtered = _apply_filters(
@@ -379,3 +409,20 @@ def dispatch(cmd: str, argv: List[str]) -> int:
         return run_tasks(argv)
     print(f"unknown subcommand: {cmd}", file=sys.stderr)
     return 2
+
+
+def main() -> None:
+    """`noteflow` console entry point.
+
+    Subcommands run straight from here, so `noteflow tasks --status` in a
+    shell prompt never imports the web stack; anything else starts the
+    server via noteflow.noteflow.main().
+    """
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        sys.exit(dispatch(sys.argv[1], sys.argv[2:]))
+    from .noteflow import main as serve
+    serve()
+
+
+if __name__ == "__main__":
+    main()
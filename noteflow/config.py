@@ -0,0 +1,287 @@
+"""User configuration (~/.config/noteflow-py/noteflow.json) and themes.
+
+Importable without the web stack, so the CLI and other tools can read
+settings without loading the server. Nothing runs at import time; the web
+app calls load_config() when it starts.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import platformdirs
+
+from . import ai as ai_module
+from . import folders as folders_module
+from . import workspaces
+
+
+# Theme Definitions
+THEMES = {
+    'light-blue': {
+        # Main colors
+        'background': '#1e3c72',          # Main background color
+        'accent': '#ff8c00',              # Accent color
+        'text_color': '#757575',          # Global text color
+        'link_color': '#4a90e2',          # Link color
+        'visited_link_color': '#7c7c9c',  # Visited link color
+        'hover_link_color': '#66b3ff',    # Hovered link color
+
+        # Labels
+        'label_background': '#000000',    # Label backgrounds
+        'note_label_border': '#000000',   # Label borders
+        'links_label_border': '#000000',
+        'header_text': '#666666',         # Label text color
+
+        # Content boxes
+        'box_background': '#ffffff',      # Box backgrounds
+        'note_border': '#000000',         # Box borders
+        'tasks_border': '#000000',
+        'links_border': '#000000',
+
+        # Input fields
+        'input_background': '#ffffff',    # Input backgrounds
+        'input_border': '#26292c',        # Input borders
+
+        # Code highlighting
+        'code_background': '#fdf6e3',     # Code block background
+        'code_style': 'github',           # Highlight.js theme
+
+        # Button Colors
+        'button_bg': '#313437',
+        'button_text': '#ff8c00',
+        'button_border': '#313437',
+        'button_hover': '#3a3f47',
+
+        # Admin Panel Colors
+        'admin_button_bg': '#313437',
+        'admin_button_text': '#ff8c00',
+        'admin_label_border': '#000000',
+        'admin_border': '#000000',
+
+        # Table colors for light theme
+        'table_border': '#e0e0e0',
+        'table_header_bg': '#f5f5f5',
+        'table_header_text': '#333333',
+        'table_row_bg': '#ffffff',
+        'table_row_alt_bg': '#f9f9f9',
+        'table_cell_text': '#333333',
+
+        # MathJax colors
+        'math_color': '#e65100',
+    },
+    'dark-blue': {
+        # Main colors
+        'background': '#1e3c72',          # Main background color
+        'accent': '#ff8c00',              # Accent color
+        'text_color': '#c0c0c0',          # Global text color
+        'link_color': '#4a90e2',          # Link color
+        'visited_link_color': '#7c7c9c',  # Visited link color
+        'hover_link_color': '#66b3ff',    # Hovered link color
+
+        # Labels
+        'label_background': '#000000',    # Label backgrounds
+        'note_label_border': '#000000',   # Label borders
+        'links_label_border': '#000000',
+        'header_text': '#666666',         # Label text color
+
+        # Content boxes
+        'box_background': '#26292c',      # Box backgrounds
+        'note_border': '#000000',         # Box borders
+        'tasks_border': '#000000',
+        'links_border': '#000000',
+
+        # Input fields
+        'input_background': '#313437',    # Input backgrounds
+        'input_border': '#26292c',        # Input borders
+
+        # Code highlighting
+        'code_background': '#fdf6e3',     # Code block background
+        'code_style': 'github',           # Highlight.js theme
+
+        # Button Colors
+        'button_bg': '#313437',
+        'button_text': '#ff8c00',
+        'button_border': '#313437',
+        'button_hover': '#3a3f47',
+
+        # Admin Panel Colors
+        'admin_button_bg': '#313437',
+        'admin_button_text': '#ff8c00',
+        'admin_label_border': '#000000',
+        'admin_border': '#000000',
+
+        # New table-specific colors
+        'table_border': '#404040',        # Table and cell borders
+        'table_header_bg': '#26292c',     # Table header background
+        'table_header_text': '#df8a3e',   # Table header text color
+        'table_row_bg': '#313437',        # Default row background
+        'table_row_alt_bg': '#26292c',    # Alternating row background
+        'table_cell_text': '#c0c0c0',     # Table cell text color
+
+        # MathJax colors
+        'math_color': '#e65100',
+    },
+    'dark-orange': {
+        # Main colors
+        'background': '#313437',          # Main background color
+        'accent': '#df8a3e',              # Accent color
+        'text_color': '#c0c0c0',          # Global text color
+        'link_color': '#66d9ff',          # Link color
+        'visited_link_color': '#8c8c8c',  # Visited link color
+        'hover_link_color': '#00bfff',    # Hovered link color
+
+        # Labels
+        'label_background': '#313437',    # Label backgrounds
+        'note_label_border': '#000000',   # Label borders
+        'links_label_border': '#000000',
+        'header_text': '#5084a7',         # Label text color
+
+        # Content boxes
+        'box_background': '#26292c',      # Box backgrounds
+        'note_border': '#000000',         # Box borders
+        'tasks_border': '#000000',
+        'links_border': '#000000',
+
+        # Input fields
+        'input_background': '#26292c',    # Input backgrounds
+        'input_border': '#26292c',        # Input borders
+
+        # Code highlighting
+        'code_background': '#fdf6e3',     # Code block background
+        'code_style': 'github',           # Highlight.js theme
+
+        # Button Colors
+        'button_bg': '#313437',
+        'button_text': '#ff8c00',
+        'button_border': '#313437',
+        'button_hover': '#3a3f47',
+
+        # Admin Panel Colors
+        'admin_button_bg': '#313437',
+        'admin_button_text': '#ff8c00',
+        'admin_label_border': '#000000',
+        'admin_border': '#000000',
+
+        # New table-specific colors
+        'table_border': '#404040',        # Table and cell borders
+        'table_header_bg': '#26292c',     # Table header background
+        'table_header_text': '#df8a3e',   # Table header text color
+        'table_row_bg': '#313437',        # Default row background
+        'table_row_alt_bg': '#26292c',    # Alternating row background
+        'table_cell_text': '#c0c0c0',     # Table cell text color
+
+        # MathJax colors
+        'math_color': '#e65100',
+    }
+}
+
+def get_config_file():
+    """Get the path to the config file, creating directories if needed."""
+    # Use a Python-specific dir name so we don't share config / DB with the
+    # Go rewrite (noteflow-go) if both are installed on the same machine.
+    config_dir = Path(platformdirs.user_config_dir("noteflow-py"))
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir / "noteflow.json"
+
+FONT_SCALE_SECTIONS = ("notes", "tasks", "links")
+FONT_SCALE_MIN = 0.8
+FONT_SCALE_MAX = 1.6
+
+AUTOSAVE_INTERVALS = (1, 3, 5)
+
+# Web archive formats: "single" inlines everything into one HTML file;
+# "blobs" stores each resource once under assets/sites/blobs/ (see archiver).
+ARCHIVE_FORMATS = ("single", "blobs")
+
+def _default_autosave():
+    return {"enabled": True, "interval": 1}
+
+def _default_font_scales():
+    return {s: 1.0 for s in FONT_SCALE_SECTIONS}
+
+def _clamp_font_scale(value) -> float:
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return 1.0
+    return max(FONT_SCALE_MIN, min(FONT_SCALE_MAX, v))
+
+def load_config():
+    """Load configuration from JSON file or create default if not exists.
+
+    Only rewrites the file when normalization actually changes values, so
+    startup (and concurrent tools) don't thrash the config on every load.
+    """
+    config_file = get_config_file()
+
+    default_config = {
+        "theme": "dark-orange",
+        "font_scales": _default_font_scales(),
+        "autosave": _default_autosave(),
+        "archive_ssl_verify": True,
+        "archive_format": ARCHIVE_FORMATS[0],
+        "sync_workers": folders_module.SYNC_WORKERS,
+        "workspace_max_resident": workspaces.MAX_RESIDENT,
+        "ai": dict(ai_module.DEFAULT_AI_CONFIG),
+    }
+
+    try:
+        if config_file.exists():
+            with open(config_file, 'r') as f:
+                raw = json.load(f)
+            config = dict(raw) if isinstance(raw, dict) else {}
+            if config.get('theme') not in THEMES:
+                print(f"Warning: Theme '{config.get('theme')}' not found, defaulting to dark-orange")
+                config['theme'] = default_config['theme']
+            # Normalize font_scales — fill in missing sections, clamp values.
+            scales = config.get('font_scales') or {}
+            config['font_scales'] = {
+                s: _clamp_font_scale(scales.get(s, 1.0)) for s in FONT_SCALE_SECTIONS
+            }
+            # Normalize autosave — fill in defaults for missing keys.
+            raw_as = config.get('autosave') or {}
+            config['autosave'] = {
+                "enabled": bool(raw_as.get("enabled", True)),
+                "interval": raw_as.get("interval", 1) if raw_as.get("interval") in AUTOSAVE_INTERVALS else 1,
+            }
+            # Normalize archive SSL verification flag.
+            config['archive_ssl_verify'] = bool(config.get('archive_ssl_verify', True))
+            if config.get('archive_format') not in ARCHIVE_FORMATS:
+                config['archive_format'] = ARCHIVE_FORMATS[0]
+            # Normalize folder-sync concurrency (1..32).
+            try:
+                workers = int(config.get('sync_workers', folders_module.SYNC_WORKERS))
+            except (TypeError, ValueError):
+                workers = folders_module.SYNC_WORKERS
+            config['sync_workers'] = max(1, min(32, workers))
+            # Normalize workspace-mode LRU size (1..256).
+            try:
+                resident = int(config.get('workspace_max_resident', workspaces.MAX_RESIDENT))
+            except (TypeError, ValueError):
+                resident = workspaces.MAX_RESIDENT
+            config['workspace_max_resident'] = max(1, min(256, resident))
+            # Normalize AI block — fill in any missing keys.
+            config['ai'] = ai_module.merge_ai_config(config)
+            if config != raw:
+                with open(config_file, 'w') as f:
+                    json.dump(config, f, indent=4)
+            return config
+        else:
+            with open(config_file, 'w') as f:
+                json.dump(default_config, f, indent=4)
+            return default_config
+    except Exception as e:
+        print(f"Error loading config: {e}")
+        return default_config
+
+def save_config(config):
+    """Save configuration to JSON file."""
+    config_file = get_config_file()
+    try:
+        with open(config_file, 'w') as f:
+            json.dump(config, f, indent=4)
+        return True
+    except Exception as e:
+        print(f"Error saving config: {e}")
+        return False
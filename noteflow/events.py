@@ -0,0 +1,153 @@
+"""In-process change-event bus behind the /api/events SSE stream.
+
+Every open tab used to poll /api/notes/status and refetch whole sections
+on change. Instead, the routes that mutate notes publish small events
+here (note_added, note_updated, note_deleted, task_toggled, archive_added,
+archive_deleted, folder_synced, notes_changed, conflict) and each connected tab
+receives them over one Server-Sent Events stream.
+
+publish() is safe to call from any thread (the file watcher and folder
+sync run off the event loop). Each event gets an id of the form
+"<boot id>-<n>", n increasing; a short history lets a reconnecting client
+resume via Last-Event-ID. A client too far behind, whose queue
+overflowed, or whose Last-Event-ID came from another server run (the
+counter restarts at 1 with every boot) is sent a single "resync" event
+and is expected to refetch everything.
+
+Events may carry a `scope` (the folder id a workspace-mode tab is viewing);
+a subscriber only receives unscoped events and those matching its own scope.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+###############################################################################
+# Tunables
+###############################################################################
+HISTORY_SIZE = 256          # events kept for Last-Event-ID resume
+SUBSCRIBER_QUEUE_SIZE = 512  # pending events per client before forcing a resync
+HEARTBEAT_SECONDS = 15      # comment line keeps proxies from closing idle streams
+RETRY_MS = 3000             # EventSource reconnect delay hint
+
+
+def format_sse(event: Dict) -> str:
+    """Serialize one event dict as an SSE frame."""
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json.dumps(event['data'], separators=(',', ':'))}\n\n"
+    )
+
+
+class Subscription:
+    """One connected client: an asyncio queue bound to its event loop."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, scope=None):
+        self.loop = loop
+        self.scope = scope
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, event: Dict) -> bool:
+        scope = event.get("scope")
+        return scope is None or self.scope is None or scope == self.scope
+
+    def _offer(self, event: Dict) -> None:
+        """Runs on self.loop."""
+        if self.overflowed or not self.wants(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def next_event(self, timeout: float) -> Optional[Dict]:
+        """Next event, a synthetic resync after overflow, or None on timeout."""
+        if self.overflowed:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = False
+            return {"id": "", "type": "resync", "data": {}}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """Thread-safe fan-out of change events to SSE subscribers."""
+
+    def __init__(self, history_size: int = HISTORY_SIZE, boot_id: Optional[str] = None):
+        self.boot_id = boot_id or os.urandom(6).hex()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_seq = 0
+        self._history: Deque[Dict] = deque(maxlen=history_size)
+        self._subscribers: List[Subscription] = []
+
+    def publish(self, event_type: str, data: Optional[Dict] = None, scope=None) -> Dict:
+        with self._lock:
+            seq = self._last_seq = next(self._ids)
+            event = {"id": f"{self.boot_id}-{seq}", "seq": seq, "type": event_type,
+                     "data": data or {}, "scope": scope}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if not sub.wants(event):
+                continue
+            try:
+                if _running_loop() is sub.loop:
+                    sub._offer(event)
+                else:
+                    sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                # Loop closed under us; the stream's finally will unsubscribe.
+                pass
+        return event
+
+    def subscribe(self, last_event_id: Optional[str] = None, scope=None) -> Subscription:
+        """Register the calling event loop's client.
+
+        With `last_event_id`, events published since then are queued first;
+        if they have aged out of the history, or the id was issued by an
+        earlier server run (or is one we never issued), a resync is queued
+        instead. With `scope`, events scoped to other folders are skipped.
+        """
+        sub = Subscription(asyncio.get_running_loop(), scope)
+        with self._lock:
+            self._subscribers.append(sub)
+            if last_event_id:
+                boot_id, _, seq = last_event_id.rpartition("-")
+                last = int(seq) if boot_id == self.boot_id and seq.isdigit() else None
+                oldest = self._history[0]["seq"] if self._history else self._last_seq + 1
+                if last is None or last > self._last_seq or last < oldest - 1:
+                    sub.overflowed = True
+                else:
+                    for event in self._history:
+                        if event["seq"] > last:
+                            sub._offer(event)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
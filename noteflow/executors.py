@@ -0,0 +1,134 @@
+"""Bounded thread pools for blocking work done on behalf of async handlers.
+
+Route handlers run on the asyncio event loop, so a slow fsync, a large
+markdown render or a contended SQLite call made inline stalls every other
+request — including open SSE streams. Handlers hand that work to one of
+these pools instead, each sized separately so a burst of one kind can't
+starve the others:
+
+  - io:   notes.md reads/writes and fsync, directory scans, asset files,
+          git subprocesses
+  - cpu:  markdown rendering and serializing large note collections
+  - db:   FolderRegistry SQLite queries and folder syncs
+  - net:  web archiving, which can spend many seconds on the network
+
+    html = await executors.run_cpu(parse_markdown, text)
+
+Context variables are copied into the worker (as asyncio.to_thread does),
+so per-request state set on the loop is visible to the blocking call.
+Pools are created on first use; shutdown() is called when the app stops.
+
+Pool workers are joined at interpreter exit, so a short-lived process
+(the `noteflow append` CLI) that gives up on slow work uses run_detached()
+instead: a daemon thread per call, capped at the same POOL_SIZES, that
+the process doesn't wait for when it exits.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+###############################################################################
+# Tunables
+###############################################################################
+POOL_SIZES = {
+    "io": 4,
+    "cpu": 2,   # GIL-bound anyway; the point is keeping the loop free
+    "db": 2,    # FolderRegistry serializes on its own lock
+    "net": 4,
+}
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_detached_slots: Dict[str, threading.Semaphore] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(kind: str) -> ThreadPoolExecutor:
+    """Return the pool for `kind` (a POOL_SIZES key), creating it lazily."""
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=POOL_SIZES[kind],
+                thread_name_prefix=f"noteflow-{kind}",
+            )
+            _pools[kind] = pool
+        return pool
+
+
+async def run_in(kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run `fn(*args, **kwargs)` on the `kind` pool and await its result."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await loop.run_in_executor(get_pool(kind), call)
+
+
+def submit(kind: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Queue `fn(*args, **kwargs)` on the `kind` pool from a plain thread
+    (e.g. a file-watcher callback) without waiting for it."""
+    return get_pool(kind).submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+async def run_io(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await run_in("io", fn, *args, **kwargs)
+
+
+async def run_cpu(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await run_in("cpu", fn, *args, **kwargs)
+
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return await run_in("db", fn, *args, **kwargs)
+
+
+async def run_detached(kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Like run_in(), but on a daemon thread the process won't wait for.
+
+    At most POOL_SIZES[kind] detached calls of one kind run at once; the
+    rest wait for a slot. If the caller stops waiting (a deadline, or the
+    event loop closing) the thread runs on until it finishes or the
+    process exits, and its result is dropped.
+    """
+    loop = asyncio.get_running_loop()
+    result_future = loop.create_future()
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    with _pools_lock:
+        slots = _detached_slots.get(kind)
+        if slots is None:
+            slots = _detached_slots[kind] = threading.Semaphore(POOL_SIZES[kind])
+
+    def settle(result: Any, error: Any) -> None:
+        if result_future.done():
+            return
+        if error is not None:
+            result_future.set_exception(error)
+        else:
+            result_future.set_result(result)
+
+    def worker() -> None:
+        with slots:
+            try:
+                outcome = (call(), None)
+            except BaseException as e:
+                outcome = (None, e)
+        try:
+            loop.call_soon_threadsafe(settle, *outcome)
+        except RuntimeError:
+            pass  # loop already closed; nobody is waiting any more
+
+    threading.Thread(target=worker, name=f"noteflow-{kind}-detached", daemon=True).start()
+    return await result_future
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop every pool (queued work is finished when `wait`)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
@@ -2,9 +2,10 @@
 
 Backport of the Go rewrite's v1.4+ feature surface:
   - SQLite-backed folder registry (~/.config/noteflow/tasks.db)
-  - Periodic background sync of registered folders' notes.md
+  - Background sync of registered folders' notes.md, driven by file-watch
+    events (see watcher.py) with a slow periodic safety-net pass
   - Global task aggregation across folders
-  - Cross-folder substring search
+  - Cross-folder full-text search (SQLite FTS5, substring scan fallback)
 
 Storage uses Python's stdlib sqlite3 module so there's no extra
 dependency. The DB is treated as a cache — notes.md is always the
@@ -16,17 +17,21 @@ link between rows and source-of-truth notes.
 """
 from __future__ import annotations
 
+import bisect
 import hashlib
 import re
 import sqlite3
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
 
 import platformdirs
 
+from . import executors
+
 
 ###############################################################################
 # Constants
@@ -36,7 +41,11 @@ CREATE TABLE IF NOT EXISTS folders (
     id          INTEGER PRIMARY KEY AUTOINCREMENT,
     path        TEXT NOT NULL UNIQUE,
     last_scan   TIMESTAMP,
-    active      INTEGER NOT NULL DEFAULT 1
+    active      INTEGER NOT NULL DEFAULT 1,
+    file_size       INTEGER,
+    file_mtime_ns   INTEGER,
+    content_hash    TEXT,
+    task_count      INTEGER
 );
 CREATE INDEX IF NOT EXISTS idx_folders_active ON folders(active);
 
@@ -53,13 +62,69 @@ CREATE TABLE IF NOT EXISTS tasks (
 );
 CREATE INDEX IF NOT EXISTS idx_tasks_folder ON tasks(folder_id);
 CREATE INDEX IF NOT EXISTS idx_tasks_hash ON tasks(task_hash);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder_id       INTEGER NOT NULL REFERENCES folders(id) ON DELETE CASCADE,
+    note_index      INTEGER NOT NULL,
+    note_timestamp  TEXT,
+    title           TEXT NOT NULL,
+    body            TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_folder ON notes(folder_id);
+"""
+
+# External-content FTS5 index over `notes`, kept in step by triggers.
+# Applied separately from SCHEMA because FTS5 is a compile-time SQLite
+# option; without it search falls back to scanning notes.md.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    title, body,
+    content='notes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, title, body)
+    VALUES ('delete', old.id, old.title, old.body);
+END;
 """
 
+# notes.md state recorded per folder so an unchanged file can be skipped.
+# Added after the first release — _migrate() adds them to older DBs.
+FOLDER_STATE_COLUMNS = {
+    "file_size": "INTEGER",
+    "file_mtime_ns": "INTEGER",
+    "content_hash": "TEXT",
+    "task_count": "INTEGER",
+}
+_FOLDER_STATE_SELECT = (
+    "SELECT id, path, file_size, file_mtime_ns, content_hash, task_count FROM folders"
+)
+# An mtime this close to the moment we recorded it may be shared by a
+# second write in the same timestamp tick; don't trust it for skipping.
+RACY_MTIME_NS = 2_000_000_000
+
 SYNC_INTERVAL_SECONDS = 30
+# Folders scanned concurrently by sync_all(). Scanning is stat/read/parse
+# only; SQLite writes are always applied one folder at a time.
+SYNC_WORKERS = 8
+# With a file watcher attached, events drive re-syncs; the periodic pass
+# only catches folders registered by other processes and missed events.
+WATCHED_SYNC_INTERVAL_SECONDS = 600
+SEARCH_LIMIT = 200  # max ranked FTS hits returned per query
 
 NOTE_SEPARATOR = "\n<!-- note -->\n"
 CHECKBOX_RE = re.compile(r'^(\s*[-*+]?\s*)\[([xX ])\](\s+)(.*)$')
 NOTE_HEADER_RE = re.compile(r'^## (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\s+-\s+(.*))?$')
+# Fence delimiter line: 3+ backticks or tildes, indented at most 3 spaces
+# (as in list items); with 4+ spaces or a tab it's an indented code line,
+# per CommonMark. Group 2 is the info string / trailing text.
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$')
+CHECKBOX_MARK_RE = re.compile(r'\[([xX ])\]')
+BACKTICK_RUN_RE = re.compile(r'`+')
 
 
 def get_db_path() -> Path:
@@ -79,21 +144,147 @@ def hash_task(line: str) -> str:
     return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
 
 
-def _code_regions(text: str):
-    """Same logic as Note._code_regions in noteflow.py — used here to skip
-    fenced/inline code when scanning. Duplicated to keep folders.py
-    standalone."""
-    regions = []
-    fence_re = re.compile(r'(^|\n)(```|~~~)[^\n]*\n.*?\n\2(?=\n|$)', re.DOTALL)
-    for m in fence_re.finditer(text):
-        regions.append((m.start(), m.end()))
-    inline_re = re.compile(r'(`+)[^`\n]+?\1')
-    for m in inline_re.finditer(text):
-        pos = m.start()
-        if any(s <= pos < e for s, e in regions):
+###############################################################################
+# Markdown scanner
+###############################################################################
+class ScanToken(NamedTuple):
+    """One item yielded by scan_markdown(). Offsets index the scanned text."""
+    kind: str           # "header" | "checkbox" | "code"
+    start: int
+    end: int
+    line_number: int    # 1-based line the token starts on
+    line_start: int     # offset of that line
+    line: str           # that source line
+    leading: bool = False  # checkbox that begins a task line (CHECKBOX_RE)
+
+
+def _inline_code_spans(line: str) -> List[tuple]:
+    """(start, end) of `code` spans in one line.
+
+    A run of N backticks opens a span closed by the next run of exactly N
+    backticks; a run with no partner is literal text.
+    """
+    runs = [(m.start(), m.end()) for m in BACKTICK_RUN_RE.finditer(line)]
+    if len(runs) < 2:
+        return []
+    by_length: Dict[int, List[int]] = {}
+    for i, (a, b) in enumerate(runs):
+        by_length.setdefault(b - a, []).append(i)
+    spans = []
+    i = 0
+    while i < len(runs):
+        a, b = runs[i]
+        same = by_length[b - a]
+        k = bisect.bisect_right(same, i)
+        if k < len(same):
+            j = same[k]
+            spans.append((a, runs[j][1]))
+            i = j + 1
+        else:
+            i += 1
+    return spans
+
+
+def scan_markdown(text: str) -> Iterator[ScanToken]:
+    """Tokenize notes markdown in one line-oriented pass.
+
+    Yields, in source order: note headers, checkboxes that sit outside
+    code, and code spans (whole fenced blocks, inline `code`). Fence state
+    is carried from line to line, so the cost is linear in the text no
+    matter how much code it holds. An unclosed fence runs to the end of
+    the text, as it does in the markdown renderer.
+
+    Both Note._parse_tasks (web UI task indexes) and
+    FolderRegistry._extract_tasks (tasks.db) are built on this, so they
+    always agree on what is a task.
+    """
+    offset = 0
+    fence = None  # (char, run length, start offset, line number, line start, line)
+    line_end = 0
+    for line_no, line in enumerate(text.split('\n'), start=1):
+        line_end = offset + len(line)
+        fm = FENCE_RE.match(line) if ('`' in line or '~' in line) else None
+        if fence is not None:
+            run = fm.group(1) if fm else ''
+            if run and run[0] == fence[0] and len(run) >= fence[1] and not fm.group(2).strip():
+                yield ScanToken("code", fence[2], line_end, fence[3], fence[4], fence[5])
+                fence = None
+            offset = line_end + 1
+            continue
+        # A backtick fence's info string can't contain backticks.
+        if fm and not (fm.group(1)[0] == '`' and '`' in fm.group(2)):
+            fence = (fm.group(1)[0], len(fm.group(1)), offset, line_no, offset, line)
+            offset = line_end + 1
             continue
-        regions.append((m.start(), m.end()))
-    return regions
+        if line.startswith('## ') and NOTE_HEADER_RE.match(line):
+            yield ScanToken("header", offset, line_end, line_no, offset, line)
+            offset = line_end + 1
+            continue
+        if '[' in line:
+            lead = CHECKBOX_RE.match(line)
+            lead_pos = lead.end(1) if lead else -1
+            pos = 0
+            for code_start, code_end in _inline_code_spans(line) + [(len(line), len(line))]:
+                for m in CHECKBOX_MARK_RE.finditer(line, pos, code_start):
+                    yield ScanToken("checkbox", offset + m.start(), offset + m.end(),
+                                    line_no, offset, line, m.start() == lead_pos)
+                if code_end > code_start:
+                    yield ScanToken("code", offset + code_start, offset + code_end,
+                                    line_no, offset, line)
+                pos = code_end
+        elif '`' in line:
+            for code_start, code_end in _inline_code_spans(line):
+                yield ScanToken("code", offset + code_start, offset + code_end,
+                                line_no, offset, line)
+        offset = line_end + 1
+    if fence is not None:
+        yield ScanToken("code", fence[2], line_end, fence[3], fence[4], fence[5])
+
+
+def _code_regions(text: str) -> List[tuple]:
+    """(start, end) offsets of every fenced block and inline code span."""
+    return [(t.start, t.end) for t in scan_markdown(text) if t.kind == "code"]
+
+
+def _split_notes(content: str) -> List[Dict]:
+    """Split notes.md into the same note blocks NoteManager parses.
+
+    Block i here is note i in the web UI, so search hits can carry an
+    index the frontend can scroll to.
+    """
+    out: List[Dict] = []
+    for raw in (n.strip() for n in content.split(NOTE_SEPARATOR)):
+        raw = re.sub(r'\n{3,}', '\n', raw)
+        if not raw.startswith("## "):
+            continue
+        lines = raw.split('\n', 1)
+        title = lines[0].replace('## ', '')
+        timestamp = ""
+        hm = NOTE_HEADER_RE.match(lines[0])
+        if hm:
+            timestamp = hm.group(1)
+            title = hm.group(2) or ""
+        out.append({
+            'note_index': len(out),
+            'note_timestamp': timestamp,
+            'title': title,
+            'body': lines[1].strip() if len(lines) > 1 else '',
+        })
+    return out
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 MATCH expression: every word, prefix-matched.
+
+    Words are quoted so FTS syntax characters in user input (-, ", *, :)
+    can't produce a query error.
+    """
+    terms = re.findall(r'\w+', query or "", re.UNICODE)
+    return ' '.join(f'"{t}"*' for t in terms)
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
 
 
 def _read_notes(folder_path: Path) -> str:
@@ -117,12 +308,22 @@ class FolderRegistry:
     """SQLite-backed registry of folders, plus their task cache.
 
     Thread-safe via a single connection lock; we use stdlib sqlite3 in
-    check_same_thread=False mode and serialize writes with a Python lock,
-    which is plenty for our load.
+    check_same_thread=False mode and serialize every statement, reads
+    included, with a Python lock, which is plenty for our load. Readers
+    must take it too: a sync's transaction runs on the shared connection,
+    so an unlocked query could see a folder's rows half rewritten.
     """
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None,
+                 sync_workers: int = SYNC_WORKERS):
         self.db_path = db_path or get_db_path()
+        self.sync_workers = max(1, int(sync_workers))
+        # Per-folder timings from the most recent sync_all(): dicts of
+        # {folder_id, path, status, task_count, scan_ms, write_ms}.
+        self.last_sync_stats: List[Dict] = []
+        # Bumped by every write that changes what get_all_tasks() or the
+        # folder list return; see the generation property.
+        self._generation = 0
         self._lock = threading.Lock()
         self._conn = sqlite3.connect(
             str(self.db_path),
@@ -132,9 +333,45 @@ class FolderRegistry:
         self._conn.row_factory = sqlite3.Row
         self._conn.execute("PRAGMA foreign_keys = ON")
         self._conn.executescript(SCHEMA)
+        self._migrate()
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable, search will scan notes.md: {e}")
+            self.fts_enabled = False
+        self._watcher = None
+        # folder_id -> (notes.md path, callback) registered with the watcher
+        self._watches: Dict[int, tuple] = {}
+        # folder_id -> "run again" flag, for folders with a watcher-triggered
+        # sync queued or running; events for them meanwhile just set the flag.
+        self._watched_syncs: Dict[int, bool] = {}
+        self._watched_syncs_lock = threading.Lock()
+        # Called as listener(folder_id, task_count) after a sync that found
+        # notes.md changed.
+        self._sync_listeners: List[Callable[[int, int], None]] = []
         self._sync_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
 
+    @property
+    def generation(self) -> str:
+        """Changes whenever registry contents do; read APIs use it as their ETag.
+
+        Combines our own write counter with SQLite's data_version, which
+        moves when another connection (e.g. the `noteflow tasks` CLI)
+        commits to tasks.db.
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return f"{self._generation}.{data_version}"
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a DB was first created."""
+        have = {r["name"] for r in self._conn.execute("PRAGMA table_info(folders)")}
+        for name, decl in FOLDER_STATE_COLUMNS.items():
+            if name not in have:
+                self._conn.execute(f"ALTER TABLE folders ADD COLUMN {name} {decl}")
+
     # -- folder lifecycle ------------------------------------------------
     def add_folder(self, path) -> Dict:
         """Register a folder. Reactivates a previously-forgotten one."""
@@ -148,7 +385,9 @@ class FolderRegistry:
             folder_id = cur.lastrowid or self._conn.execute(
                 "SELECT id FROM folders WHERE path = ?", (resolved,)
             ).fetchone()["id"]
+            self._generation += 1
         self.sync_folder(folder_id)
+        self._watch_folder(folder_id, resolved)
         return self.get_folder(folder_id)
 
     def forget_folder(self, folder_id: int) -> bool:
@@ -156,84 +395,224 @@ class FolderRegistry:
             cur = self._conn.execute(
                 "UPDATE folders SET active = 0 WHERE id = ?", (folder_id,)
             )
-            return cur.rowcount > 0
+            forgotten = cur.rowcount > 0
+            self._generation += 1
+        self._unwatch_folder(folder_id)
+        return forgotten
 
     def get_folder(self, folder_id: int) -> Optional[Dict]:
-        row = self._conn.execute(
-            "SELECT id, path, last_scan, active FROM folders WHERE id = ?",
-            (folder_id,),
-        ).fetchone()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, path, last_scan, active FROM folders WHERE id = ?",
+                (folder_id,),
+            ).fetchone()
         return dict(row) if row else None
 
     def list_active(self) -> List[Dict]:
-        rows = self._conn.execute(
-            "SELECT id, path, last_scan, active FROM folders WHERE active = 1 ORDER BY path"
-        ).fetchall()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, path, last_scan, active FROM folders WHERE active = 1 ORDER BY path"
+            ).fetchall()
         return [dict(r) for r in rows]
 
     # -- sync ------------------------------------------------------------
-    def sync_folder(self, folder_id: int) -> int:
+    def sync_folder(self, folder_id: int, force: bool = False) -> int:
         """Re-scan notes.md for `folder_id`, update task cache, return task count.
 
+        Skips the work when notes.md is unchanged since the last sync: a
+        matching (size, mtime) costs one stat(), and a touched-but-identical
+        file costs one read + hash. Otherwise every write lands in a single
+        transaction.
+
         Uses UPSERT keyed on (folder_id, task_hash) so row IDs stay stable
         across syncs — frontends and CLIs can hold onto task IDs and
         still target the right task after a re-scan.
         """
-        folder = self.get_folder(folder_id)
-        if not folder:
+        with self._lock:
+            row = self._conn.execute(
+                _FOLDER_STATE_SELECT + " WHERE id = ?", (folder_id,)
+            ).fetchone()
+        if not row:
             return 0
-        folder_path = Path(folder["path"])
+        return self._apply_scan(self._scan_folder(dict(row), force))
+
+    def _scan_folder(self, row: Dict, force: bool = False) -> Dict:
+        """Read and parse one folder's notes.md. Touches no DB state, so
+        sync_all() runs it on worker threads."""
+        started = time.perf_counter()
+        folder_path = Path(row["path"])
+        scan = {"folder_id": row["id"], "path": row["path"], "status": "unchanged",
+                "task_count": row["task_count"]}
+        try:
+            st = (folder_path / "notes.md").stat()
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            size, mtime_ns = 0, None
+        if (not force and row["task_count"] is not None
+                and row["file_size"] == size and row["file_mtime_ns"] is not None
+                and row["file_mtime_ns"] == mtime_ns):
+            scan["scan_ms"] = (time.perf_counter() - started) * 1000
+            return scan
+
         content = _read_notes(folder_path)
+        content_hash = _content_hash(content)
+        # Only remember an mtime old enough that a same-tick rewrite can't
+        # hide behind it; NULL forces the hash check next time.
+        if mtime_ns is None or mtime_ns >= time.time_ns() - RACY_MTIME_NS:
+            mtime_ns = None
+        scan.update(file_size=size, file_mtime_ns=mtime_ns, content_hash=content_hash)
 
-        tasks = self._extract_tasks(content)
-        now = datetime.utcnow().isoformat()
-        notes_path = str(folder_path / "notes.md")
-        current_hashes = {t['task_hash'] for t in tasks}
+        if (not force and row["task_count"] is not None
+                and row["content_hash"] == content_hash):
+            scan["status"] = "touched"
+        else:
+            # Duplicate hashes within one folder keep the first occurrence
+            # (later sibling tasks lose).
+            unique: Dict[str, Dict] = {}
+            for t in self._extract_tasks(content):
+                unique.setdefault(t['task_hash'], t)
+            scan.update(
+                status="changed",
+                tasks=list(unique.values()),
+                notes=_split_notes(content) if self.fts_enabled else [],
+                task_count=len(unique),
+            )
+        scan["scan_ms"] = (time.perf_counter() - started) * 1000
+        return scan
 
-        with self._lock:
-            # Prune tasks whose hash no longer appears in notes.md.
-            existing = self._conn.execute(
-                "SELECT task_hash FROM tasks WHERE folder_id = ?", (folder_id,)
-            ).fetchall()
-            for r in existing:
-                if r["task_hash"] not in current_hashes:
-                    self._conn.execute(
-                        "DELETE FROM tasks WHERE folder_id = ? AND task_hash = ?",
-                        (folder_id, r["task_hash"]),
-                    )
-            # Upsert each task. Skip duplicate hashes within one folder by
-            # taking the first occurrence (later sibling tasks lose).
-            seen = set()
-            for t in tasks:
-                if t['task_hash'] in seen:
-                    continue
-                seen.add(t['task_hash'])
+    def _apply_scan(self, scan: Dict) -> int:
+        """Write one _scan_folder() result to the DB; returns its task count."""
+        started = time.perf_counter()
+        folder_id = scan["folder_id"]
+        if scan["status"] == "touched":
+            with self._lock:
                 self._conn.execute(
-                    "INSERT INTO tasks "
-                    "(folder_id, file_path, line_number, content, completed, last_updated, task_hash) "
-                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
-                    "ON CONFLICT(folder_id, task_hash) DO UPDATE SET "
-                    "  file_path=excluded.file_path, "
-                    "  line_number=excluded.line_number, "
-                    "  content=excluded.content, "
-                    "  completed=excluded.completed, "
-                    "  last_updated=excluded.last_updated",
-                    (folder_id, notes_path, t['line_number'], t['content'],
-                     1 if t['completed'] else 0, now, t['task_hash']),
+                    "UPDATE folders SET file_size = ?, file_mtime_ns = ? WHERE id = ?",
+                    (scan["file_size"], scan["file_mtime_ns"], folder_id),
                 )
-            self._conn.execute(
-                "UPDATE folders SET last_scan = ? WHERE id = ?",
-                (now, folder_id),
-            )
-        return len(seen)
+        elif scan["status"] == "changed":
+            now = datetime.utcnow().isoformat()
+            notes_path = str(Path(scan["path"]) / "notes.md")
+            tasks = scan["tasks"]
+            current_hashes = {t['task_hash'] for t in tasks}
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Prune tasks whose hash no longer appears in notes.md.
+                    existing = self._conn.execute(
+                        "SELECT task_hash FROM tasks WHERE folder_id = ?", (folder_id,)
+                    ).fetchall()
+                    self._conn.executemany(
+                        "DELETE FROM tasks WHERE folder_id = ? AND task_hash = ?",
+                        [(folder_id, r["task_hash"]) for r in existing
+                         if r["task_hash"] not in current_hashes],
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO tasks "
+                        "(folder_id, file_path, line_number, content, completed, last_updated, task_hash) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(folder_id, task_hash) DO UPDATE SET "
+                        "  file_path=excluded.file_path, "
+                        "  line_number=excluded.line_number, "
+                        "  content=excluded.content, "
+                        "  completed=excluded.completed, "
+                        "  last_updated=excluded.last_updated",
+                        [(folder_id, notes_path, t['line_number'], t['content'],
+                          1 if t['completed'] else 0, now, t['task_hash'])
+                         for t in tasks],
+                    )
+                    if self.fts_enabled:
+                        # Rebuild this folder's slice of the search index; the
+                        # triggers keep notes_fts in step with the notes rows.
+                        self._conn.execute("DELETE FROM notes WHERE folder_id = ?", (folder_id,))
+                        self._conn.executemany(
+                            "INSERT INTO notes (folder_id, note_index, note_timestamp, title, body) "
+                            "VALUES (?, ?, ?, ?, ?)",
+                            [(folder_id, n['note_index'], n['note_timestamp'], n['title'], n['body'])
+                             for n in scan["notes"]],
+                        )
+                    self._conn.execute(
+                        "UPDATE folders SET last_scan = ?, file_size = ?, file_mtime_ns = ?, "
+                        "content_hash = ?, task_count = ? WHERE id = ?",
+                        (now, scan["file_size"], scan["file_mtime_ns"],
+                         scan["content_hash"], len(tasks), folder_id),
+                    )
+                    self._conn.execute("COMMIT")
+                    self._generation += 1
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            for listener in list(self._sync_listeners):
+                try:
+                    listener(folder_id, len(tasks))
+                except Exception as e:
+                    print(f"sync listener failed: {e}")
+        scan["write_ms"] = (time.perf_counter() - started) * 1000
+        return scan["task_count"]
+
+    def add_sync_listener(self, listener: Callable[[int, int], None]) -> None:
+        """Call `listener(folder_id, task_count)` whenever a sync finds notes.md changed."""
+        self._sync_listeners.append(listener)
+
+    def ensure_indexed(self, folder_id: int) -> None:
+        """Re-sync `folder_id` if notes.md changed since its last sync.
+
+        sync_folder() already short-circuits on an unchanged file, so this
+        is a stat() per folder in the common case.
+        """
+        self.sync_folder(folder_id)
+
+    def sync_all(self, workers: Optional[int] = None) -> int:
+        """Sync every active folder; returns the total task count.
 
-    def sync_all(self) -> int:
+        Up to `workers` (default self.sync_workers) folders are read and
+        parsed concurrently; each result is written to the DB on the
+        calling thread as soon as its scan finishes. Per-folder timings are
+        left in self.last_sync_stats.
+        """
+        with self._lock:
+            rows = [dict(r) for r in self._conn.execute(
+                _FOLDER_STATE_SELECT + " WHERE active = 1 ORDER BY path"
+            ).fetchall()]
+        workers = max(1, min(workers or self.sync_workers, len(rows) or 1))
+        stats: List[Dict] = []
         total = 0
-        for folder in self.list_active():
-            try:
-                total += self.sync_folder(folder["id"])
-            except Exception as e:
-                print(f"sync_folder({folder['id']}) failed: {e}")
+
+        def _record(row: Dict, scan: Optional[Dict], error: Optional[Exception]):
+            nonlocal total
+            if error is None:
+                try:
+                    total += self._apply_scan(scan)
+                except Exception as e:
+                    error = e
+            if error is not None:
+                print(f"sync_folder({row['id']}) failed: {error}")
+                scan = {"status": "error", "task_count": None, "scan_ms": None}
+            stats.append({
+                "folder_id": row["id"],
+                "path": row["path"],
+                "status": scan["status"],
+                "task_count": scan["task_count"],
+                "scan_ms": scan.get("scan_ms"),
+                "write_ms": scan.get("write_ms"),
+            })
+
+        if workers == 1:
+            for row in rows:
+                try:
+                    scan, error = self._scan_folder(row), None
+                except Exception as e:
+                    scan, error = None, e
+                _record(row, scan, error)
+        else:
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix="noteflow-sync") as pool:
+                futures = {pool.submit(self._scan_folder, row): row for row in rows}
+                for future in as_completed(futures):
+                    error = future.exception()
+                    _record(futures[future], None if error else future.result(), error)
+
+        self.last_sync_stats = stats
         return total
 
     @staticmethod
@@ -243,38 +622,26 @@ class FolderRegistry:
         Returns a list of {line_number, content, completed, task_hash,
         note_title, note_timestamp}. Line numbers are 1-based against the
         raw file content. Note headers are tracked so each task knows
-        which note it belongs to.
+        which note it belongs to. A task is a line that starts with a
+        checkbox (CHECKBOX_RE) outside fenced code.
         """
         out: List[Dict] = []
-        regions = _code_regions(content)
         note_title = ""
         note_timestamp = ""
-        # Walk lines with a running byte offset — O(n). The previous
-        # implementation re-split the whole file for each line (O(n²)).
-        offset = 0
-        for line_no, line in enumerate(content.splitlines(), start=1):
-            offset_end = offset + len(line)
-            if any(s <= offset < e or s < offset_end <= e for s, e in regions):
-                offset = offset_end + 1  # +1 for the '\n' consumed by splitlines
-                continue
-            header = NOTE_HEADER_RE.match(line)
-            if header:
+        for tok in scan_markdown(content):
+            if tok.kind == "header":
+                header = NOTE_HEADER_RE.match(tok.line)
                 note_timestamp = header.group(1)
                 note_title = header.group(2) or ""
-                offset = offset_end + 1
-                continue
-            m = CHECKBOX_RE.match(line)
-            if m:
-                checked = m.group(2).lower() == 'x'
+            elif tok.kind == "checkbox" and tok.leading:
                 out.append({
-                    'line_number': line_no,
-                    'content': line,
-                    'completed': checked,
-                    'task_hash': hash_task(line),
+                    'line_number': tok.line_number,
+                    'content': tok.line,
+                    'completed': content[tok.start + 1] in 'xX',
+                    'task_hash': hash_task(tok.line),
                     'note_title': note_title,
                     'note_timestamp': note_timestamp,
                 })
-            offset = offset_end + 1
         return out
 
     # -- queries ---------------------------------------------------------
@@ -288,17 +655,19 @@ class FolderRegistry:
         if not include_done:
             sql += "AND t.completed = 0 "
         sql += "ORDER BY f.path, t.line_number"
-        rows = self._conn.execute(sql).fetchall()
+        with self._lock:
+            rows = self._conn.execute(sql).fetchall()
         return [self._row_to_task(r) for r in rows]
 
     def get_task(self, task_id: int) -> Optional[Dict]:
-        row = self._conn.execute(
-            "SELECT t.id, t.folder_id, t.file_path, t.line_number, t.content, "
-            "       t.completed, t.task_hash, f.path AS folder_path "
-            "FROM tasks t JOIN folders f ON f.id = t.folder_id "
-            "WHERE t.id = ?",
-            (task_id,),
-        ).fetchone()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT t.id, t.folder_id, t.file_path, t.line_number, t.content, "
+                "       t.completed, t.task_hash, f.path AS folder_path "
+                "FROM tasks t JOIN folders f ON f.id = t.folder_id "
+                "WHERE t.id = ?",
+                (task_id,),
+            ).fetchone()
         return self._row_to_task(row) if row else None
 
     @staticmethod
@@ -354,15 +723,92 @@ class FolderRegistry:
         return self.get_task(task_id) or {**task, 'completed': not task['completed']}
 
     # -- search ----------------------------------------------------------
+    def _fts_search(self, query: str, folder_id: Optional[int] = None,
+                    limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """Ranked FTS5 query; returns hits best-first.
+
+        Each hit: {folder_id, folder_path, note_index, note_timestamp,
+        title, snippet, count}. Title matches weigh more than body matches.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT n.folder_id, f.path AS folder_path, n.note_index, "
+            "       n.note_timestamp, n.title, n.body, "
+            "       snippet(notes_fts, 1, '', '', '…', 16) AS snippet "
+            "FROM notes_fts "
+            "JOIN notes n ON n.id = notes_fts.rowid "
+            "JOIN folders f ON f.id = n.folder_id "
+            "WHERE notes_fts MATCH ? AND f.active = 1 "
+        )
+        params: list = [match]
+        if folder_id is not None:
+            sql += "AND n.folder_id = ? "
+            params.append(folder_id)
+        sql += "ORDER BY bm25(notes_fts, 5.0, 1.0) LIMIT ?"
+        params.append(limit)
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"FTS query failed for {query!r}: {e}")
+            return []
+        needle = query.strip().lower()
+        hits = []
+        for r in rows:
+            haystack = f"{r['title']}\n{r['body']}".lower()
+            hits.append({
+                'folder_id': r['folder_id'],
+                'folder_path': r['folder_path'],
+                'note_index': r['note_index'],
+                'note_timestamp': r['note_timestamp'],
+                'title': r['title'],
+                'snippet': r['snippet'].replace('\n', ' '),
+                'count': max(1, haystack.count(needle)),
+            })
+        return hits
+
+    def search_folder(self, folder_id: int, query: str) -> List[Dict]:
+        """Ranked full-text hits within one folder (index synced on demand)."""
+        self.ensure_indexed(folder_id)
+        return self._fts_search(query, folder_id=folder_id)
+
     def search_all(self, query: str) -> List[Dict]:
-        """Substring search across every active folder's notes.md.
+        """Full-text search across every active folder's notes.
+
+        Uses the FTS5 index (ranked, prefix-matched) when available and
+        falls back to a substring scan of each notes.md otherwise.
 
-        Returns a list of folder-grouped results:
-          [{folder_id, folder_path, matches: [{note_title, snippet, count}]}]
+        Returns a list of folder-grouped results, folders ordered by their
+        best hit:
+          [{folder_id, folder_path, matches: [{note_title, note_index, snippet, count}]}]
         """
         q = (query or "").strip().lower()
         if not q:
             return []
+        if not self.fts_enabled:
+            return self._search_all_scan(q)
+        # A stat() per folder keeps results current between background syncs.
+        for folder in self.list_active():
+            self.ensure_indexed(folder["id"])
+        grouped: Dict[int, Dict] = {}
+        for hit in self._fts_search(q):
+            group = grouped.setdefault(hit['folder_id'], {
+                'folder_id': hit['folder_id'],
+                'folder_path': hit['folder_path'],
+                'matches': [],
+            })
+            group['matches'].append({
+                'note_title': hit['title'] or hit['note_timestamp'] or '(untitled)',
+                'note_index': hit['note_index'],
+                'snippet': hit['snippet'],
+                'count': hit['count'],
+            })
+        return list(grouped.values())
+
+    def _search_all_scan(self, q: str) -> List[Dict]:
+        """Substring search fallback for SQLite builds without FTS5."""
         results = []
         for folder in self.list_active():
             content = _read_notes(Path(folder["path"]))
@@ -396,15 +842,77 @@ class FolderRegistry:
                 })
         return results
 
+    # -- file watching ---------------------------------------------------
+    def _watch_folder(self, folder_id: int, path) -> None:
+        if self._watcher is None or folder_id in self._watches:
+            return
+        notes_path = Path(path) / "notes.md"
+
+        def _on_change(_path, folder_id=folder_id):
+            # Parsing and SQLite writes happen on the db pool: callbacks
+            # must not hold up the watcher thread (and every other folder).
+            with self._watched_syncs_lock:
+                if folder_id in self._watched_syncs:
+                    self._watched_syncs[folder_id] = True
+                    return
+                self._watched_syncs[folder_id] = False
+            executors.submit("db", self._watched_sync, folder_id)
+
+        self._watches[folder_id] = (notes_path, _on_change)
+        self._watcher.watch(notes_path, _on_change)
+
+    def _watched_sync(self, folder_id: int) -> None:
+        """Sync one watched folder, once more per burst of events that
+        arrived meanwhile; one at a time per folder."""
+        while True:
+            with self._watched_syncs_lock:
+                self._watched_syncs[folder_id] = False
+            try:
+                self.sync_folder(folder_id)
+            except Exception as e:
+                print(f"sync_folder({folder_id}) failed: {e}")
+            with self._watched_syncs_lock:
+                if not self._watched_syncs[folder_id]:
+                    del self._watched_syncs[folder_id]
+                    return
+
+    def _unwatch_folder(self, folder_id: int) -> None:
+        entry = self._watches.pop(folder_id, None)
+        if entry is not None and self._watcher is not None:
+            self._watcher.unwatch(entry[0], entry[1])
+
+    def _refresh_watches(self) -> None:
+        """Match the watch set to the active folders (other processes may
+        have registered or forgotten folders in the shared DB)."""
+        active = {f["id"]: f["path"] for f in self.list_active()}
+        for folder_id in list(self._watches):
+            if folder_id not in active:
+                self._unwatch_folder(folder_id)
+        for folder_id, path in active.items():
+            self._watch_folder(folder_id, path)
+
     # -- background sync -------------------------------------------------
-    def start_background_sync(self, interval: int = SYNC_INTERVAL_SECONDS):
+    def start_background_sync(self, interval: int = SYNC_INTERVAL_SECONDS,
+                              watcher=None):
+        """Keep the DB in step with every active folder's notes.md.
+
+        With a `watcher` (watcher.FileWatcher) each folder is re-synced as
+        soon as its notes.md changes, and the periodic full pass drops to
+        WATCHED_SYNC_INTERVAL_SECONDS. Without one, every folder is
+        re-synced each `interval` seconds.
+        """
         if self._sync_thread and self._sync_thread.is_alive():
             return
         self._stop_event.clear()
+        if watcher is not None:
+            self._watcher = watcher
+            interval = max(interval, WATCHED_SYNC_INTERVAL_SECONDS)
 
         def _loop():
             while not self._stop_event.is_set():
                 try:
+                    if self._watcher is not None:
+                        self._refresh_watches()
                     self.sync_all()
                 except Exception as e:
                     print(f"background sync error: {e}")
@@ -636,6 +1144,14 @@ document.addEventListener('DOMContentLoaded', () => {
   });
   document.getElementById('showDone').addEventListener('change', refresh);
   refresh();
+  // Folders re-sync as their notes.md changes; refresh when one lands.
+  if ('EventSource' in window) {
+    let pending = null;
+    new EventSource('/api/events').addEventListener('folder_synced', () => {
+      clearTimeout(pending);
+      pending = setTimeout(refresh, 250);
+    });
+  }
 });
 </script>
 </body>
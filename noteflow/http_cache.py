@@ -0,0 +1,238 @@
+"""On-disk HTTP cache for the web archiver's resource fetches.
+
+Archiving several pages from one site, or re-archiving a page, used to
+download every stylesheet, font and image again. Responses are now kept
+under the user cache dir (~/.cache/noteflow-py/archive-http on Linux)
+and reused across archive runs and processes:
+
+  - freshness follows Cache-Control (max-age, s-maxage, no-cache,
+    no-store), Expires and Age, with the usual 10%-of-age heuristic for
+    responses that only carry Last-Modified
+  - stale entries are revalidated with If-None-Match / If-Modified-Since;
+    a 304 refreshes the entry instead of re-downloading the body
+  - the total body size is capped at max_bytes; the least recently used
+    entries are evicted first
+
+Bodies are plain files named by the SHA-256 of their URL; the metadata
+lives in an SQLite index beside them. Like tasks.db, it's only a cache:
+deleting the directory is always safe.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Mapping, NamedTuple, Optional
+
+import platformdirs
+
+
+###############################################################################
+# Constants
+###############################################################################
+MAX_BYTES = 256 * 1024 * 1024   # total body size kept on disk
+HEURISTIC_FRACTION = 0.1        # of (Date - Last-Modified), per RFC 9111 4.2.2
+HEURISTIC_MAX = 24 * 3600       # cap on heuristic freshness, seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url            TEXT PRIMARY KEY,
+    file           TEXT NOT NULL,
+    content_type   TEXT,
+    etag           TEXT,
+    last_modified  TEXT,
+    fresh_until    REAL NOT NULL,
+    size           INTEGER NOT NULL,
+    last_used      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used);
+"""
+
+
+def default_root() -> Path:
+    return Path(platformdirs.user_cache_dir("noteflow-py")) / "archive-http"
+
+
+class CacheEntry(NamedTuple):
+    url: str
+    path: Path
+    content_type: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional-request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _cache_control(headers: Mapping[str, str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (headers.get("cache-control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds a response stays fresh, or None if it must not be stored.
+
+    0 means "store, but revalidate before every use".
+    """
+    now = time.time() if now is None else now
+    directives = _cache_control(headers)
+    if "no-store" in directives or headers.get("vary", "").strip() == "*":
+        return None
+    try:
+        age = max(0.0, float(headers.get("age") or 0))
+    except ValueError:
+        age = 0.0
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name):
+            try:
+                return max(0.0, int(directives[name]) - age)
+            except ValueError:
+                return 0.0
+    date = _http_date(headers.get("date")) or now
+    expires = headers.get("expires")
+    if expires is not None:
+        expires_at = _http_date(expires)
+        return max(0.0, expires_at - date - age) if expires_at is not None else 0.0
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None and last_modified < date:
+        return min(HEURISTIC_MAX, (date - last_modified) * HEURISTIC_FRACTION)
+    return 0.0
+
+
+class HttpCache:
+    """The cache directory. Thread-safe; several processes may share it."""
+
+    def __init__(self, root: Path, max_bytes: int = MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(root / "index.db"), check_same_thread=False,
+                                     isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _body_path(self, url: str) -> Path:
+        return self.root / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """The entry for `url` (fresh or stale), or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file, content_type, etag, last_modified, fresh_until FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE url = ?", (now, url))
+        file, content_type, etag, last_modified, fresh_until = row
+        return CacheEntry(url, self.root / file, content_type, etag, last_modified, fresh_until > now)
+
+    def copy_body(self, entry: CacheEntry, dest: Path) -> bool:
+        """Copy the cached body to `dest`; False if it has gone (evicted by
+        another process), in which case the entry is dropped."""
+        try:
+            shutil.copyfile(entry.path, dest)
+            return True
+        except OSError:
+            self.remove(entry.url)
+            return False
+
+    def store(self, url: str, src: Path, headers: Mapping[str, str]) -> bool:
+        """Cache the 200 response body at `src`; False if it isn't storable."""
+        lifetime = freshness_lifetime(headers)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if lifetime is None or (lifetime == 0 and not etag and not last_modified):
+            return False  # not storable, or never reusable without validators
+        body = self._body_path(url)
+        tmp_path = body.with_name(f"{body.name}.{os.urandom(4).hex()}.part")
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, body)
+            size = body.stat().st_size
+        except OSError as e:
+            print(f"HTTP cache: could not store {url}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, file, content_type, etag, last_modified, fresh_until, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body.name, headers.get("content-type"), etag, last_modified,
+                 now + lifetime, size, now),
+            )
+        self.evict()
+        return True
+
+    def revalidated(self, url: str, headers: Mapping[str, str]) -> None:
+        """Record a 304 for `url`: new freshness, and validators if sent."""
+        lifetime = freshness_lifetime(headers)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET fresh_until = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time() + (lifetime or 0.0), headers.get("etag"),
+                 headers.get("last-modified"), url),
+            )
+
+    def remove(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+        self._body_path(url).unlink(missing_ok=True)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under max_bytes; returns how many."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            victims = []
+            for url, file, size in self._conn.execute(
+                    "SELECT url, file, size FROM entries ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                victims.append((url, file))
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE url = ?", [(u,) for u, _ in victims])
+        for _, file in victims:
+            (self.root / file).unlink(missing_ok=True)
+        return len(victims)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
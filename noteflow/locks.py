@@ -0,0 +1,86 @@
+"""Readers-writer lock guarding a NoteManager's notes.
+
+Handlers that only read the notes (/api/notes, /api/search, /api/ai/ask,
+the task list) take the read side and may run concurrently — including
+while their render runs in the cpu pool. Handlers that change the
+collection (add/update/delete, task toggles, reloading notes.md from
+disk) take the write side, which waits for in-flight readers and keeps
+new ones out, so no reader ever sees a half-reindexed collection.
+
+The lock is writer-preferring: once a writer is waiting, new readers
+queue behind it, so a steady stream of page loads can't starve a
+checkbox click. It is not reentrant — don't take either side while
+already holding one.
+
+It is an asyncio primitive: waiting never blocks the event loop, and the
+holder may await executor work. Create one per event loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from typing import AsyncIterator
+
+
+class AsyncRWLock:
+    """Shared/exclusive asyncio lock.
+
+    Usage:
+        async with lock.read():
+            ...
+        async with lock.write():
+            ...
+    """
+
+    def __init__(self):
+        self._cond = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @property
+    def readers(self) -> int:
+        return self._readers
+
+    @property
+    def writer_active(self) -> bool:
+        return self._writer
+
+    @property
+    def in_use(self) -> bool:
+        """True while anyone holds or waits for either side."""
+        return bool(self._readers or self._writer or self._writers_waiting)
+
+    @contextlib.asynccontextmanager
+    async def read(self) -> AsyncIterator[None]:
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: not self._writer and not self._writers_waiting
+            )
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self) -> AsyncIterator[None]:
+        async with self._cond:
+            self._writers_waiting += 1
+            try:
+                await self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+                # A cancelled writer may have been the only thing holding
+                # readers back.
+                self._cond.notify_all()
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._writer = False
+                self._cond.notify_all()
@@ -4,293 +4,82 @@
 import os
 import sys
 import re
-import json
 import asyncio
 import html
 import mimetypes
 import argparse
 import threading
 import webbrowser
-from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
-from urllib.parse import urlparse, quote
+from typing import Callable, Optional, Dict, List
+from urllib.parse import urlparse, quote, unquote
 from fastapi import FastAPI, HTTPException, Form, UploadFile, File, Path as FastAPIPath, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from markdown_it import MarkdownIt
-import platformdirs
 import socket
 import psutil
 import platform
 import signal
+import tempfile
 import time
-from mdit_py_plugins.dollarmath import dollarmath_plugin
 
 from . import archiver
+from . import archive_index
+from . import archive_jobs
 from . import folders as folders_module
 from . import ai as ai_module
 from . import sigils
+from . import render_cache
+from . import watcher as watcher_module
+from . import events as events_module
+from . import executors
+from . import workspaces
+from . import render
+from . import responses
+from .config import (
+    AUTOSAVE_INTERVALS,
+    ARCHIVE_FORMATS,
+    FONT_SCALE_MAX,
+    FONT_SCALE_MIN,
+    FONT_SCALE_SECTIONS,
+    THEMES,
+    _clamp_font_scale,
+    _default_autosave,
+    _default_font_scales,
+    load_config,
+    save_config,
+)
+from .notes import (
+    Note,
+    NoteManager,
+    create_directories,
+    validate_folder_path,
+)
+from .render import (
+    RENDERER_VERSION,
+    parse_markdown,
+    set_render_cache,
+    set_task_lookup,
+)
+# Re-exported: these lived in this module before the split, and importers
+# still reach them as noteflow.noteflow.<name>.
+from .notes import NOTE_SEPARATOR, Task  # noqa: F401
+from .render import normalize_list_markers  # noqa: F401
 
 ###############################################################################
 # Constants & Configuration
 ###############################################################################
 __version__ = "0.7.6"
-NOTE_SEPARATOR = "\n<!-- note -->\n"
+# Edits arriving within SAVE_DELAY_SECONDS of each other share one write;
+# a steady stream of edits is still written at least every SAVE_MAX_DELAY_SECONDS.
+SAVE_DELAY_SECONDS = 0.3
+SAVE_MAX_DELAY_SECONDS = 2.0
 APP_PORT = None
 CURRENT_THEME = "dark-orange" # Default theme
 
-# Theme Definitions
-THEMES = {
-    'light-blue': {
-        # Main colors
-        'background': '#1e3c72',          # Main background color
-        'accent': '#ff8c00',              # Accent color
-        'text_color': '#757575',          # Global text color
-        'link_color': '#4a90e2',          # Link color
-        'visited_link_color': '#7c7c9c',  # Visited link color
-        'hover_link_color': '#66b3ff',    # Hovered link color
-
-        # Labels
-        'label_background': '#000000',    # Label backgrounds
-        'note_label_border': '#000000',   # Label borders
-        'links_label_border': '#000000',
-        'header_text': '#666666',         # Label text color
-
-        # Content boxes
-        'box_background': '#ffffff',      # Box backgrounds
-        'note_border': '#000000',         # Box borders
-        'tasks_border': '#000000',
-        'links_border': '#000000',
-
-        # Input fields
-        'input_background': '#ffffff',    # Input backgrounds
-        'input_border': '#26292c',        # Input borders
-
-        # Code highlighting
-        'code_background': '#fdf6e3',     # Code block background
-        'code_style': 'github',           # Highlight.js theme
-
-        # Button Colors
-        'button_bg': '#313437',
-        'button_text': '#ff8c00',
-        'button_border': '#313437',
-        'button_hover': '#3a3f47',
-
-        # Admin Panel Colors
-        'admin_button_bg': '#313437',
-        'admin_button_text': '#ff8c00',
-        'admin_label_border': '#000000',
-        'admin_border': '#000000',
-
-        # Table colors for light theme
-        'table_border': '#e0e0e0',
-        'table_header_bg': '#f5f5f5',
-        'table_header_text': '#333333',
-        'table_row_bg': '#ffffff',
-        'table_row_alt_bg': '#f9f9f9',
-        'table_cell_text': '#333333',
-
-        # MathJax colors
-        'math_color': '#e65100',
-    },
-    'dark-blue': {
-        # Main colors
-        'background': '#1e3c72',          # Main background color
-        'accent': '#ff8c00',              # Accent color
-        'text_color': '#c0c0c0',          # Global text color
-        'link_color': '#4a90e2',          # Link color
-        'visited_link_color': '#7c7c9c',  # Visited link color
-        'hover_link_color': '#66b3ff',    # Hovered link color
-
-        # Labels
-        'label_background': '#000000',    # Label backgrounds
-        'note_label_border': '#000000',   # Label borders
-        'links_label_border': '#000000',
-        'header_text': '#666666',         # Label text color
-
-        # Content boxes
-        'box_background': '#26292c',      # Box backgrounds
-        'note_border': '#000000',         # Box borders
-        'tasks_border': '#000000',
-        'links_border': '#000000',
-
-        # Input fields
-        'input_background': '#313437',    # Input backgrounds
-        'input_border': '#26292c',        # Input borders
-
-        # Code highlighting
-        'code_background': '#fdf6e3',     # Code block background
-        'code_style': 'github',           # Highlight.js theme
-
-        # Button Colors
-        'button_bg': '#313437',
-        'button_text': '#ff8c00',
-        'button_border': '#313437',
-        'button_hover': '#3a3f47',
-
-        # Admin Panel Colors
-        'admin_button_bg': '#313437',
-        'admin_button_text': '#ff8c00',
-        'admin_label_border': '#000000',
-        'admin_border': '#000000',
-
-        # New table-specific colors
-        'table_border': '#404040',        # Table and cell borders
-        'table_header_bg': '#26292c',     # Table header background
-        'table_header_text': '#df8a3e',   # Table header text color
-        'table_row_bg': '#313437',        # Default row background
-        'table_row_alt_bg': '#26292c',    # Alternating row background
-        'table_cell_text': '#c0c0c0',     # Table cell text color
-
-        # MathJax colors
-        'math_color': '#e65100',
-    },
-    'dark-orange': {
-        # Main colors
-        'background': '#313437',          # Main background color
-        'accent': '#df8a3e',              # Accent color
-        'text_color': '#c0c0c0',          # Global text color
-        'link_color': '#66d9ff',          # Link color
-        'visited_link_color': '#8c8c8c',  # Visited link color
-        'hover_link_color': '#00bfff',    # Hovered link color
-
-        # Labels
-        'label_background': '#313437',    # Label backgrounds
-        'note_label_border': '#000000',   # Label borders
-        'links_label_border': '#000000',
-        'header_text': '#5084a7',         # Label text color
-
-        # Content boxes
-        'box_background': '#26292c',      # Box backgrounds
-        'note_border': '#000000',         # Box borders
-        'tasks_border': '#000000',
-        'links_border': '#000000',
-
-        # Input fields
-        'input_background': '#26292c',    # Input backgrounds
-        'input_border': '#26292c',        # Input borders
-
-        # Code highlighting
-        'code_background': '#fdf6e3',     # Code block background
-        'code_style': 'github',           # Highlight.js theme
-
-        # Button Colors
-        'button_bg': '#313437',
-        'button_text': '#ff8c00',
-        'button_border': '#313437',
-        'button_hover': '#3a3f47',
-
-        # Admin Panel Colors
-        'admin_button_bg': '#313437',
-        'admin_button_text': '#ff8c00',
-        'admin_label_border': '#000000',
-        'admin_border': '#000000',
-
-        # New table-specific colors
-        'table_border': '#404040',        # Table and cell borders
-        'table_header_bg': '#26292c',     # Table header background
-        'table_header_text': '#df8a3e',   # Table header text color
-        'table_row_bg': '#313437',        # Default row background
-        'table_row_alt_bg': '#26292c',    # Alternating row background
-        'table_cell_text': '#c0c0c0',     # Table cell text color
-
-        # MathJax colors
-        'math_color': '#e65100',
-    }
-}
-
-def get_config_file():
-    """Get the path to the config file, creating directories if needed."""
-    # Use a Python-specific dir name so we don't share config / DB with the
-    # Go rewrite (noteflow-go) if both are installed on the same machine.
-    config_dir = Path(platformdirs.user_config_dir("noteflow-py"))
-    config_dir.mkdir(parents=True, exist_ok=True)
-    return config_dir / "noteflow.json"
-
-FONT_SCALE_SECTIONS = ("notes", "tasks", "links")
-FONT_SCALE_MIN = 0.8
-FONT_SCALE_MAX = 1.6
-
-AUTOSAVE_INTERVALS = (1, 3, 5)
-
-def _default_autosave():
-    return {"enabled": True, "interval": 1}
-
-def _default_font_scales():
-    return {s: 1.0 for s in FONT_SCALE_SECTIONS}
-
-def _clamp_font_scale(value) -> float:
-    try:
-        v = float(value)
-    except (TypeError, ValueError):
-        return 1.0
-    return max(FONT_SCALE_MIN, min(FONT_SCALE_MAX, v))
-
-def load_config():
-    """Load configuration from JSON file or create default if not exists.
-
-    Only rewrites the file when normalization actually changes values, so
-    startup (and concurrent tools) don't thrash the config on every load.
-    """
-    config_file = get_config_file()
-
-    default_config = {
-        "theme": "dark-orange",
-        "font_scales": _default_font_scales(),
-        "autosave": _default_autosave(),
-        "archive_ssl_verify": True,
-        "ai": dict(ai_module.DEFAULT_AI_CONFIG),
-    }
-
-    try:
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                raw = json.load(f)
-            config = dict(raw) if isinstance(raw, dict) else {}
-            if config.get('theme') not in THEMES:
-                print(f"Warning: Theme '{config.get('theme')}' not found, defaulting to dark-orange")
-                config['theme'] = default_config['theme']
-            # Normalize font_scales — fill in missing sections, clamp values.
-            scales = config.get('font_scales') or {}
-            config['font_scales'] = {
-                s: _clamp_font_scale(scales.get(s, 1.0)) for s in FONT_SCALE_SECTIONS
-            }
-            # Normalize autosave — fill in defaults for missing keys.
-            raw_as = config.get('autosave') or {}
-            config['autosave'] = {
-                "enabled": bool(raw_as.get("enabled", True)),
-                "interval": raw_as.get("interval", 1) if raw_as.get("interval") in AUTOSAVE_INTERVALS else 1,
-            }
-            # Normalize archive SSL verification flag.
-            config['archive_ssl_verify'] = bool(config.get('archive_ssl_verify', True))
-            # Normalize AI block — fill in any missing keys.
-            config['ai'] = ai_module.merge_ai_config(config)
-            if config != raw:
-                with open(config_file, 'w') as f:
-                    json.dump(config, f, indent=4)
-            return config
-        else:
-            with open(config_file, 'w') as f:
-                json.dump(default_config, f, indent=4)
-            return default_config
-    except Exception as e:
-        print(f"Error loading config: {e}")
-        return default_config
-
-def save_config(config):
-    """Save configuration to JSON file."""
-    config_file = get_config_file()
-    try:
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
-    except Exception as e:
-        print(f"Error saving config: {e}")
-        return False
-
 config = load_config()
 CURRENT_THEME = config.get('theme', 'light-blue')
 if CURRENT_THEME not in THEMES:
@@ -299,6 +88,8 @@ FONT_SCALES = config.get('font_scales') or _default_font_scales()
 AUTOSAVE = config.get('autosave') or _default_autosave()
 ARCHIVE_SSL_VERIFY = bool(config.get('archive_ssl_verify', True))
 archiver.set_ssl_verify(ARCHIVE_SSL_VERIFY)
+ARCHIVE_FORMAT = config.get('archive_format') if config.get('archive_format') in ARCHIVE_FORMATS else ARCHIVE_FORMATS[0]
+archiver.set_archive_format(ARCHIVE_FORMAT)
 AI_CONFIG = ai_module.merge_ai_config(config)
 
 def get_git_context(folder_path: Path) -> Dict:
@@ -356,355 +147,109 @@ def get_git_context(folder_path: Path) -> Dict:
 ###############################################################################
 # Core Classes
 ###############################################################################
-class NoteManager:
-    """Central manager for notes collection.
-    
-    Attributes:
-        notes (List[Note]): All notes
-        checkbox_index (int): Counter for task IDs
-        file_path (Path): Notes storage location
-        needs_save (bool): Unsaved changes flag
-        base_path (Path): Base directory for all file operations
+class SaveScheduler:
+    """Coalesce saves from bursts of edits into one write per NoteManager.
+
+    Route handlers mutate a manager and call request(manager) instead of
+    manager.save(). Once edits have been quiet for `delay` seconds (or
+    `max_delay` after the first pending edit) the write runs in the io pool
+    while holding the manager's read lock, so ten quick checkbox clicks cost
+    one save and a handler's mutation never interleaves with it. flush_async()
+    writes immediately for /api/flush and shutdown; flush() is the
+    synchronous version for callers without an event loop.
     """
-    def __init__(self, base_path: Path):
-        self.notes: List[Note] = []
-        self.checkbox_index: int = 0
-        self.file_path: Optional[Path] = None
-        self.needs_save: bool = False
-        self.base_path = base_path
-        self._file_mtime: Optional[float] = None
-        self._load_notes()
-
-    def _load_notes(self):
-        """Initialize and load notes from file"""
-        self.file_path = self.base_path / "notes.md"
-        if not self.file_path.exists():
-            self.file_path.write_text("")
-            self._file_mtime = self.file_path.stat().st_mtime
-            self.notes = []
-            self.checkbox_index = 0
-            self.needs_save = False
-            return
 
+    def __init__(self, delay: float = SAVE_DELAY_SECONDS,
+                 max_delay: float = SAVE_MAX_DELAY_SECONDS):
+        self.delay = delay
+        self.max_delay = max_delay
+        self.saves = 0  # writes performed, for tests and diagnostics
+        self._pending: Dict[int, NoteManager] = {}
+        self._first_request: Optional[float] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def request(self, manager: NoteManager) -> None:
+        """Schedule `manager` to be saved. Saves at once outside an event loop."""
         try:
-            # First try UTF-8
-            content = self.file_path.read_text(encoding='utf-8')
-        except UnicodeDecodeError:
-            try:
-                # If UTF-8 fails, try Windows-1252 (cp1252)
-                content = self.file_path.read_text(encoding='cp1252')
-            except UnicodeDecodeError:
-                # If both fail, use UTF-8 with error handling
-                content = self.file_path.read_text(encoding='utf-8', errors='replace')
-
-        # Normalize CRLF to LF — external editors on Windows save with \r\n
-        # and stray \r chars corrupt header regex matches downstream.
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
-
-        self._parse_notes(content)
-        try:
-            self._file_mtime = self.file_path.stat().st_mtime
-        except OSError:
-            self._file_mtime = None
-        self.needs_save = False
-
-    def _parse_notes(self, content: str):
-        """Parse raw content into Note objects"""
-        self.notes = []
-        self.checkbox_index = 0
-
-        # Split content by note separator and parse each note
-        raw_notes = [n.strip() for n in content.split(NOTE_SEPARATOR) if n.strip()]
-        for raw_note in raw_notes:
-            # Remove excessive newlines
-            raw_note = re.sub(r'\n{3,}', '\n', raw_note)
-            if raw_note.startswith("## "):
-                note = Note.from_text(raw_note, self)
-                self.notes.append(note)
-
-    def reindex_tasks(self):
-        """Rebuild contiguous task indexes after structural edits.
-
-        Task IDs are session-local counters used by checkboxes. Without a
-        full reindex, Note.update() would keep allocating new IDs forever.
-        """
-        self.checkbox_index = 0
-        for note in self.notes:
-            note.tasks = []
-            note._html_cache = None
-            note._parse_tasks()
-
-    def disk_changed(self) -> bool:
-        """True if notes.md on disk is newer than our last load/save."""
-        if not self.file_path or not self.file_path.exists():
-            return False
-        try:
-            mtime = self.file_path.stat().st_mtime
-        except OSError:
-            return False
-        if self._file_mtime is None:
-            return True
-        # Float mtimes can jitter slightly; 1ms slack avoids false positives.
-        return mtime > (self._file_mtime + 0.001)
-
-    def reload_if_changed(self, force: bool = False) -> bool:
-        """Reload notes.md when an external editor changed it.
-
-        Skips reload while we have unsaved in-memory edits (unless force)
-        so autosave/typing aren't clobbered by a concurrent write race.
-        Returns True if notes were reloaded.
-        """
-        if self.needs_save and not force:
-            return False
-        if not force and not self.disk_changed():
-            return False
-        self._load_notes()
-        return True
-
-    def save(self):
-        """Atomically save notes to disk if modified.
-
-        Writes to a sibling temp file then os.replace() so a crash mid-write
-        cannot leave a truncated notes.md.
-        """
-        if not self.needs_save:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            manager.save()
+            self.saves += 1
             return
-        content = self.render_notes()
-        path = self.file_path
-        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        if self._loop is not loop:
+            # A previous loop went away with work pending — don't lose it.
+            self.flush()
+            self._loop = loop
+        self._pending[id(manager)] = manager
+        now = loop.time()
+        if self._first_request is None:
+            self._first_request = now
+        deadline = min(now + self.delay, self._first_request + self.max_delay)
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = loop.call_at(deadline, self._fire)
+
+    @property
+    def pending(self) -> bool:
+        return any(m.needs_save for m in self._pending.values())
+
+    def is_pending(self, manager: NoteManager) -> bool:
+        return id(manager) in self._pending
+
+    def _fire(self) -> None:
+        self._handle = None
+        self._task = self._loop.create_task(self._save_pending())
+
+    async def _save_pending(self) -> None:
         try:
-            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
-                f.write(content)
-                f.flush()
-                os.fsync(f.fileno())
-            os.replace(tmp_path, path)
-            try:
-                self._file_mtime = path.stat().st_mtime
-            except OSError:
-                self._file_mtime = time.time()
-            self.needs_save = False
-        except Exception:
-            try:
-                if tmp_path.exists():
-                    tmp_path.unlink()
-            except OSError:
-                pass
-            raise
-
-    def render_notes(self) -> str:
-        """Render all notes with proper indexing"""
-        rendered = []
-        for note in self.notes:
-            rendered.append(note.render())
-        return NOTE_SEPARATOR.join(rendered)
-
-    def build_task_lookup(self) -> Dict[str, int]:
-        """Map normalized task line text → task index (first match wins)."""
-        lookup: Dict[str, int] = {}
-        for note in self.notes:
-            for task in note.tasks:
-                key = normalize_list_markers(task.text.strip())
-                if key not in lookup:
-                    lookup[key] = task.index
-        return lookup
-
-    def get_active_tasks(self) -> List[Dict]:
-        """Return all unchecked tasks, priority-flagged first.
-
-        Tasks carrying a !p1/!p2/!p3 marker sort ahead of unflagged tasks,
-        in ascending priority order (p1 highest). The sort is stable, so
-        within a tier tasks keep their original note order.
+            await self.flush_async()
+        except Exception as e:
+            print(f"Deferred save failed, retrying: {e}")
+            if self._handle is None:
+                self._first_request = self._loop.time()
+                self._handle = self._loop.call_later(self.max_delay, self._fire)
+
+    async def flush_async(self) -> int:
+        """Write every pending manager now, off the event loop.
+
+        Each save runs in the io pool under the manager's read lock (a save
+        only reads notes, so page loads carry on meanwhile). Returns the
+        number of saves made; a failing manager stays pending and the error
+        propagates.
         """
-        self.reload_if_changed()
-        tasks = []
-        for note in self.notes:
-            tasks.extend(note.get_unchecked_tasks())
-
-        def priority_rank(task: Dict) -> int:
-            match = re.search(r'(?:^|\s)!p([1-3])\b', task['text'], re.IGNORECASE)
-            return int(match.group(1)) if match else 4
-
-        return sorted(tasks, key=priority_rank)
-
-    def remove_asset_references(self, filename: str):
-        """Remove all markdown image/link references to a given asset filename."""
-        pattern = re.compile(
-            r'!\[[^\]]*\]\(<[^>]*/' + re.escape(filename) + r'>\)\n?'
-            r'|!\[[^\]]*\]\([^)]*/' + re.escape(filename) + r'\)\n?'
-        )
-        changed = False
-        for note in self.notes:
-            new_content = pattern.sub('', note.content)
-            if new_content != note.content:
-                note.content = new_content
-                note._html_cache = None
-                changed = True
-        if changed:
-            self.needs_save = True
-            self.save()
-
-    def add_note(self, title: str, content: str):
-        """Add a new note"""
-        note = Note(
-            title=title,
-            content=content,
-            timestamp=datetime.now(),
-            manager=self
-        )
-        self.notes.insert(0, note)  # Add to start of list
-        self.reindex_tasks()
-        self.needs_save = True
-
-    def update_task(self, task_index: int, checked: bool):
-        """Update task completion status"""
-        for note in self.notes:
-            if note.update_task(task_index, checked):
-                note._html_cache = None
-                self.needs_save = True
-                return True
-        return False
-
-class Note:
-    """Single note with content and tasks.
-    
-    Attributes:
-        title (str): Note title
-        content (str): Main content
-        timestamp (datetime): Creation time
-        manager (NoteManager): Parent manager
-        tasks (List[Task]): Tasks in note
-    """
-    def __init__(self, title: str, content: str, timestamp: datetime, manager: NoteManager):
-        self.title = title
-        self.content = content
-        self.timestamp = timestamp
-        self.manager = manager
-        self.tasks: List[Task] = []
-        self._html_cache: Optional[tuple] = None  # (content, html)
-        self._parse_tasks()
-
-    @classmethod
-    def from_text(cls, text: str, manager: NoteManager):
-        """Create Note object from markdown text"""
-        lines = text.split('\n', 1)
-        header = lines[0].replace('## ', '')
-        
-        # Parse timestamp and title
-        timestamp_match = re.match(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?: - )?(.*)?', header)
-        if timestamp_match:
-            timestamp = datetime.strptime(timestamp_match.group(1), "%Y-%m-%d %H:%M:%S")
-            title = timestamp_match.group(2) or ""
-        else:
-            timestamp = datetime.now()
-            title = header
-
-        content = lines[1].strip() if len(lines) > 1 else ''
-        return cls(title, content, timestamp, manager)
-
-    def _parse_tasks(self):
-        """Extract tasks from note content, skipping checkboxes inside code regions."""
-        self.tasks = []
-        checkbox_pattern = re.compile(r'\[([xX ])\]')
-
-        code_regions = self._code_regions(self.content)
-
-        for match in checkbox_pattern.finditer(self.content):
-            if any(start <= match.start() < end for start, end in code_regions):
-                continue  # Inside a fenced or inline code region — skip
-            task = Task(
-                index=self.manager.checkbox_index,
-                checked=match.group(1).lower() == 'x',
-                text=self._extract_task_text(match.start())
-            )
-            self.tasks.append(task)
-            self.manager.checkbox_index += 1
-
-    @staticmethod
-    def _code_regions(text: str) -> List[tuple]:
-        """Return (start, end) offsets covering markdown code regions.
-
-        Shared implementation lives in folders.py so task scanners stay in
-        lockstep; this wrapper keeps call sites on Note unchanged.
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._first_request = None
+        saved = 0
+        for key, manager in list(self._pending.items()):
+            async with manager.lock.read():
+                if manager.needs_save:
+                    await executors.run_io(manager.save)
+                    saved += 1
+                self._pending.pop(key, None)
+        self.saves += saved
+        return saved
+
+    def flush(self) -> int:
+        """Write every pending manager now. Returns the number of saves made.
+
+        A manager that fails to save stays pending and the error propagates.
         """
-        return folders_module._code_regions(text)
-
-    def rendered_html(self) -> str:
-        """Markdown→HTML for this note, cached until content changes."""
-        if self._html_cache is not None and self._html_cache[0] == self.content:
-            return self._html_cache[1]
-        html_out = parse_markdown(self.content)
-        self._html_cache = (self.content, html_out)
-        return html_out
-
-    def _extract_task_text(self, checkbox_pos: int) -> str:
-        """Extract the full text of a task item"""
-        # Find the end of the line
-        content_after = self.content[checkbox_pos:]
-        line_end = content_after.find('\n')
-        if line_end == -1:
-            line_end = len(content_after)
-        
-        # Include the checkbox markers in the task text for exact matching
-        return content_after[:line_end].strip()
-
-    def render(self) -> str:
-        """Render note with proper task indexing"""
-        timestamp_str = self.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        title_str = f" - {self.title}" if self.title else ""
-        # Add an extra newline before the note separator
-        return f"## {timestamp_str}{title_str}\n\n{self.content}\n"
-
-    def get_unchecked_tasks(self) -> List[Dict]:
-        """Return unchecked tasks"""
-        return [
-            {
-                'index': task.index,
-                'text': task.text.replace('[x]', '').replace('[ ]', '').strip(),  # Remove checkbox markers
-                'note_title': self.title,
-                'timestamp': self.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            for task in self.tasks
-            if not task.checked
-        ]
-
-    def update_task(self, task_index: int, checked: bool) -> bool:
-        for task in self.tasks:
-            if task.index == task_index:
-                old_mark = '[x]' if not checked else '[ ]'
-                new_mark = '[x]' if checked else '[ ]'
-                
-                # The original line for this task
-                old_line = task.text
-                # Create the new line by replacing the checkbox in the original line
-                new_line = old_line.replace('[x]', '[ ]').replace('[ ]', new_mark, 1)
-                
-                # Update both the note content and the task text using the exact line replacement
-                self.content = self.content.replace(old_line, new_line, 1)
-                task.text = new_line
-                task.checked = checked
-                return True
-        return False
-
-    def update(self, title: str, content: str):
-        """Update note content and title, then reindex all task IDs."""
-        self.title = title
-        self.content = content
-        self._html_cache = None
-        self.manager.reindex_tasks()
-        self.manager.needs_save = True
-
-class Task:
-    """Checkbox task within a note.
-    
-    Attributes:
-        index (int): Unique ID
-        checked (bool): Completion state
-        text (str): Task description
-    """
-    def __init__(self, index: int, checked: bool, text: str):
-        self.index = index
-        self.checked = checked
-        self.text = text
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._first_request = None
+        saved = 0
+        for key, manager in list(self._pending.items()):
+            if manager.needs_save:
+                manager.save()
+                saved += 1
+            del self._pending[key]
+        self.saves += saved
+        return saved
 
 ###############################################################################
 # FastAPI Setup
@@ -718,281 +263,269 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static directories
-app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
-app.mount("/fonts", StaticFiles(directory=Path(__file__).parent / "fonts"), name="fonts")
+# Change events pushed to open tabs over /api/events (see events.py).
+event_bus = events_module.EventBus(boot_id=responses.BOOT_ID)
 
-# Function to mount assets directory
-def mount_assets_directory(app: FastAPI, base_path: Path):
-    """Mount the assets directory for the given base path"""
-    app.mount("/assets", StaticFiles(directory=base_path / "assets"), name="assets")
+# Deferred, coalesced notes.md writes (see SaveScheduler).
+save_scheduler = SaveScheduler()
+
+async def _flush_pending_saves():
+    await save_scheduler.flush_async()
+    pool = getattr(app.state, "workspaces", None)
+    if pool is not None:
+        await executors.run_io(pool.close)
+    executors.shutdown()
+
+app.router.on_shutdown.append(_flush_pending_saves)
 
 ###############################################################################
-# Helper Functions
+# Workspace routing (see workspaces.py)
 ###############################################################################
-def create_directories(base_path: Path):
-    """Create necessary directories relative to the given base path"""
-    directories = [
-        base_path / "assets",
-        base_path / "assets/images",
-        base_path / "assets/files",
-        base_path / "assets/sites"
-    ]
-    for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+_WORKSPACE_PATH_RE = re.compile(r'^/f/(\d+)(/.*)?$')
 
-def find_free_port(start_port=8000):
-    """Find an available port starting from start_port."""
-    port = start_port
-    while port < 65535:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.bind(('', port))
-                return port
-        except OSError:
-            port += 1
-    raise RuntimeError("No free ports found")
 
-def set_app_port(port: int):
-    """Set the application port globally."""
-    global APP_PORT
-    APP_PORT = port
-
-# Leading glyphs that look like a bullet but aren't a markdown list marker.
-# These commonly arrive when notes are pasted from Word/Outlook/Teams, whose
-# autocorrect turns "- " into an en-dash, etc. markdown-it only treats ASCII
-# '-', '*' and '+' as bullets, so without normalization these lines render as
-# plain paragraphs (no bullet) instead of a list.
-_BULLET_LOOKALIKES = (
-    '‐‑‒–—―'  # hyphen/dash variants, en/em dash
-    '−'                                # minus sign
-    '•‣⁃∙·●◦․'  # bullet/dot glyphs
-)
-_BULLET_LOOKALIKE_RE = re.compile(r'^(\s*)[' + _BULLET_LOOKALIKES + r'](\s+)')
+def active_manager() -> "NoteManager":
+    """NoteManager for the folder this request is for."""
+    ws = workspaces.current.get()
+    return ws.manager if ws is not None else note_manager
 
 
-def normalize_list_markers(text: str) -> str:
-    """Convert leading bullet look-alike glyphs into real markdown hyphens.
+render.set_fallback_notes(lambda: active_manager().notes)
 
-    Only a line-leading glyph followed by whitespace is rewritten, so dashes
-    used inside prose are untouched. Fenced code blocks are skipped so code
-    samples render verbatim.
-    """
-    out = []
-    in_fence = False
-    for line in text.split('\n'):
-        stripped = line.lstrip()
-        if stripped.startswith('```') or stripped.startswith('~~~'):
-            in_fence = not in_fence
-            out.append(line)
-            continue
-        if not in_fence:
-            line = _BULLET_LOOKALIKE_RE.sub(lambda m: m.group(1) + '-' + m.group(2), line)
-        out.append(line)
-    return '\n'.join(out)
-
-
-# Module-level task lookup used during markdown render. Populated by
-# get_notes / callers before parse_markdown so checkbox matching is O(1)
-# instead of scanning every task for every checkbox.
-_TASK_LOOKUP: Dict[str, int] = {}
-_MD_PARSER: Optional[MarkdownIt] = None
-
-
-def set_task_lookup(lookup: Optional[Dict[str, int]] = None):
-    """Install the task-line → index map used by the checkbox renderer."""
-    global _TASK_LOOKUP
-    _TASK_LOOKUP = lookup or {}
-
-
-def _render_math(tokens, idx, options, env):
-    token = tokens[idx]
-    body = token.content
-    if token.type == 'math_block':
-        return f'<div class="math-display">\\[{body}\\]</div>'
-    return f'<span class="math-inline">\\({body}\\)</span>'
-
-
-def _render_image(tokens, idx, options, env):
-    token = tokens[idx]
-    src = (token.attrGet('src') or '').strip('<>')
-    alt = token.content
-    title = token.attrGet('title')
-
-    if src.startswith(('http://', 'https://')) or '/assets/images/' in src:
-        img_url = src if src.startswith(('http://', 'https://', '/')) else f'/{src}'
-        title_attr = f' title="{title}"' if title else ''
-        escaped_url = html.escape(img_url, quote=True)
-
-        delete_btn = ''
-        if '/assets/images/' in img_url:
-            delete_btn = (
-                f'<button class="image-delete-btn" '
-                f'data-image-path="{escaped_url}" '
-                f'title="Delete image">&times;</button>'
-            )
 
-        return (
-            f'<div class="image-container">'
-            f'<img src="{img_url}" alt="{html.escape(alt)}"{title_attr} '
-            f'class="clickable-image" data-full-src="{escaped_url}">'
-            f'{delete_btn}'
-            f'</div>'
-        )
+def _folder_path(request: Request) -> Path:
+    ws = workspaces.current.get()
+    return ws.path if ws is not None else request.app.state.folder_path
 
-    filename = os.path.basename(src)
-    return (
-        f'<a href="{html.escape(src, quote=True)}" target="_blank" '
-        f'rel="noopener noreferrer" class="file-link">📎 {html.escape(filename)}</a>'
-    )
 
+def _folder_id(request: Request) -> Optional[int]:
+    ws = workspaces.current.get()
+    return ws.folder_id if ws is not None else getattr(request.app.state, "folder_id", None)
 
-def _render_blockquote_open(tokens, idx, options, env):
-    return '<blockquote class="markdown-blockquote">'
 
+def _event_scope() -> Optional[int]:
+    """Folder id change events are scoped to, so tabs only see their folder's."""
+    ws = workspaces.current.get()
+    return ws.folder_id if ws is not None else getattr(app.state, "folder_id", None)
 
-def _render_blockquote_close(tokens, idx, options, env):
-    return '</blockquote>'
 
+def _publish(event_type: str, data: Optional[Dict] = None):
+    """Publish a change event for the active folder."""
+    return event_bus.publish(event_type, data, scope=_event_scope())
 
-def _checkbox_replace(state, silent):
-    pos = state.pos
-    max_pos = state.posMax
 
-    if (pos + 3 > max_pos or
-            state.src[pos] != '[' or
-            state.src[pos + 2] != ']' or
-            state.src[pos + 1] not in [' ', 'x', 'X']):
-        return False
+def _workspace_urls(html_text: str) -> str:
+    """Point /assets/ (and /api/ download) links in rendered HTML at the active workspace."""
+    ws = workspaces.current.get()
+    if ws is None:
+        return html_text
+    return (html_text.replace('="/assets/', f'="{ws.prefix}/assets/')
+                     .replace('(/assets/', f'({ws.prefix}/assets/')
+                     .replace('="/api/', f'="{ws.prefix}/api/'))
 
-    if silent:
-        return False
 
-    checked = state.src[pos + 1].lower() == 'x'
+class WorkspaceMiddleware:
+    """Serve /f/{folder_id}/... with the normal routes for that folder.
 
-    line_start = pos
-    while line_start > 0 and state.src[line_start - 1] != '\n':
-        line_start -= 1
+    Strips the prefix and runs the request with workspaces.current set, so
+    handlers pick up the folder's NoteManager via active_manager(). Asset
+    files are served straight from the folder's assets/ directory —
+    including bare /assets/ URLs built by page JS, recognised by a /f/{id}/
+    Referer. Other requests pass through untouched.
+    """
 
-    line_end = pos
-    while line_end < max_pos and state.src[line_end] != '\n':
-        line_end += 1
+    def __init__(self, app):
+        self.app = app
 
-    # Source is already normalized by parse_markdown; lookup keys are too.
-    task_text = state.src[line_start:line_end].strip()
-    task_index = _TASK_LOOKUP.get(task_text)
-    if task_index is None:
-        # Fallback for callers that didn't install a lookup (AI render, etc.)
+    async def __call__(self, scope, receive, send):
+        target = self._workspace_target(scope) if scope["type"] == "http" else None
+        if target is None:
+            await self.app(scope, receive, send)
+            return
+        folder_id, rest = target
+        pool = getattr(scope["app"].state, "workspaces", None)
+        if pool is None:
+            response = JSONResponse({"detail": "Workspace mode is off (start with --workspace)"},
+                                    status_code=404)
+            await response(scope, receive, send)
+            return
+        ws = await executors.run_io(pool.get, folder_id)
+        if ws is None:
+            response = JSONResponse({"detail": "Folder not found"}, status_code=404)
+        elif not rest:
+            response = RedirectResponse(url=f"{ws.prefix}/")
+        elif rest.startswith("/assets/"):
+            response = await executors.run_io(_workspace_asset, ws, rest[len("/assets/"):])
+        else:
+            response = None
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        child = dict(scope)
+        child["path"] = rest
+        child["raw_path"] = rest.encode("utf-8")
+        token = workspaces.current.set(ws)
         try:
-            for note in note_manager.notes:
-                for task in note.tasks:
-                    if task_text == normalize_list_markers(task.text.strip()):
-                        task_index = task.index
-                        break
-                if task_index is not None:
-                    break
-        except NameError:
-            task_index = None
+            await _resume_archive_jobs(ws.path)
+            await self.app(child, receive, send)
+        finally:
+            workspaces.current.reset(token)
 
-    token = state.push('checkbox_inline', 'input', 0)
-    token.markup = state.src[pos:pos + 3]
-    token.attrs = token.attrs or []
-    token.attrs.append(['checked', 'true' if checked else 'false'])
-    token.attrs.append(['task_index', str(task_index) if task_index is not None else None])
+    @staticmethod
+    def _workspace_target(scope) -> Optional[tuple]:
+        """(folder_id, path within the workspace) for a workspace request."""
+        path = scope.get("path", "")
+        match = _WORKSPACE_PATH_RE.match(path)
+        if match is not None:
+            return int(match.group(1)), match.group(2) or ""
+        if path.startswith("/assets/"):
+            for name, value in scope.get("headers", ()):
+                if name == b"referer":
+                    referer = _WORKSPACE_PATH_RE.match(urlparse(value.decode("latin-1")).path)
+                    if referer is not None:
+                        return int(referer.group(1)), path
+        return None
+
+
+def _workspace_asset(ws: "workspaces.Workspace", relative: str):
+    assets_root = (ws.path / "assets").resolve()
+    target = (assets_root / unquote(relative)).resolve()
+    if not str(target).startswith(str(assets_root) + os.sep) or not target.is_file():
+        return JSONResponse({"detail": "Not Found"}, status_code=404)
+    return FileResponse(target)
+
+
+app.add_middleware(WorkspaceMiddleware)
+# Outermost, so workspace asset files pass through it untouched.
+app.add_middleware(responses.CompressionMiddleware)
 
-    state.pos = pos + 3
-    return True
+###############################################################################
+# Conditional GET (generation ETags, see responses.py)
+###############################################################################
+# Per-folder count of writes under assets/ made by this process (archives,
+# uploads, deletions). An upload finishing doesn't change any directory
+# mtime, so the counter is what moves /api/uploaded-files' ETag for it.
+_ASSET_GENERATIONS: Dict[str, int] = {}
 
 
-def _render_checkbox(tokens, idx, options, env):
-    token = tokens[idx]
-    attrs = dict(token.attrs or {})
-    checked = attrs.get('checked') == 'true'
-    task_index = attrs.get('task_index')
+def _bump_assets(folder_path: Path) -> None:
+    key = str(folder_path)
+    _ASSET_GENERATIONS[key] = _ASSET_GENERATIONS.get(key, 0) + 1
 
-    if task_index == 'None' or task_index is None:
-        return f'<input type="checkbox" {"checked" if checked else ""} disabled>'
 
-    return (f'<input type="checkbox" {"checked" if checked else ""} '
-            f'data-checkbox-index="{task_index}" '
-            f'id="task_{task_index}" name="task_{task_index}">')
+def _assets_generation(folder_path: Path) -> str:
+    """Our asset-write counter plus the assets/ subdirectory mtimes, which
+    also catch archives written by other processes (`noteflow append`)."""
+    parts = [str(_ASSET_GENERATIONS.get(str(folder_path), 0))]
+    for subdir in ("sites", "images", "files"):
+        try:
+            parts.append(str((folder_path / "assets" / subdir).stat().st_mtime_ns))
+        except OSError:
+            parts.append("0")
+    return ".".join(parts)
 
 
-def _get_md_parser() -> MarkdownIt:
-    """Build (once) the shared MarkdownIt instance used for all note renders."""
-    global _MD_PARSER
-    if _MD_PARSER is not None:
-        return _MD_PARSER
+def _not_modified(request: Optional[Request], etag: str) -> Optional[Response]:
+    """304 for a read API whose client already has `etag`."""
+    if request is None:
+        return None
+    return responses.not_modified(request.headers, etag)
 
-    md = MarkdownIt('zero')
-    for rule in (
-        'table', 'emphasis', 'link', 'paragraph', 'heading', 'list',
-        'image', 'code', 'fence', 'blockquote', 'strikethrough', 'escape',
-        'backticks', 'html_block', 'inline',
-    ):
-        md.enable(rule)
-    md.use(dollarmath_plugin, allow_digits=False)
 
-    md.inline.ruler.before('text', 'checkbox', _checkbox_replace)
-    md.renderer.rules['checkbox_inline'] = _render_checkbox
-    md.renderer.rules['image'] = _render_image
-    md.renderer.rules['blockquote_open'] = _render_blockquote_open
-    md.renderer.rules['blockquote_close'] = _render_blockquote_close
-    md.renderer.rules['math_inline'] = _render_math
-    md.renderer.rules['math_block'] = _render_math
+def _tagged(result, response: Optional[Response], etag: str):
+    """Attach `etag` to a handler result (a Response, or a dict FastAPI
+    serializes into the injected `response`)."""
+    target = result if isinstance(result, Response) else response
+    if target is not None:
+        target.headers["ETag"] = etag
+        target.headers["Cache-Control"] = "no-cache"
+    return result
 
-    _MD_PARSER = md
-    return md
 
+# Mount static directories
+app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
+app.mount("/fonts", StaticFiles(directory=Path(__file__).parent / "fonts"), name="fonts")
 
-def parse_markdown(content: str) -> str:
-    """Convert markdown to HTML with proper task handling and extended features.
+# Function to mount assets directory
+def mount_assets_directory(app: FastAPI, base_path: Path):
+    """Mount the assets directory for the given base path"""
+    app.mount("/assets", StaticFiles(directory=base_path / "assets"), name="assets")
 
-    Reuses a single MarkdownIt instance across calls. Call set_task_lookup()
-    before rendering notes so checkboxes resolve to stable task indexes in O(1).
-    """
-    content = normalize_list_markers(content)
-    return _get_md_parser().render(content)
+###############################################################################
+# Helper Functions
+###############################################################################
+def find_free_port(start_port=8000):
+    """Find an available port starting from start_port."""
+    port = start_port
+    while port < 65535:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind(('', port))
+                return port
+        except OSError:
+            port += 1
+    raise RuntimeError("No free ports found")
 
-def validate_folder_path(folder_path_input: Optional[str] = None) -> Path:
-    """
-    Validate and return the folder path to use for notes.md
-    If no path provided, uses current working directory
-    """
-    if folder_path_input:
-        path = Path(folder_path_input).resolve()
-        # Create folder if it doesn't exist
-        path.mkdir(parents=True, exist_ok=True)
-    else:
-        # Use current working directory
-        path = Path.cwd()
-    
-    return path
+def set_app_port(port: int):
+    """Set the application port globally."""
+    global APP_PORT
+    APP_PORT = port
 
 ###############################################################################
 # FastAPI Routes
 ###############################################################################
 # Core routes
+# Rendered main pages, keyed by everything that goes into them; cleared when
+# the theme or font scales change. Each entry holds the page precompressed.
+PAGE_CACHE_MAX = 32
+_PAGE_CACHE: Dict[tuple, responses.EncodedBody] = {}
+
+
+def _invalidate_page_cache():
+    _PAGE_CACHE.clear()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
-    """Render the main page"""
-    colors = THEMES[CURRENT_THEME]
-
-    folder_path = request.app.state.folder_path
+    """Render the main page.
 
+    Built once per (theme, font scales, folder) and served with a strong
+    ETag, so a reload with an unchanged page gets a 304.
+    """
+    folder_path = _folder_path(request)
+    ws = workspaces.current.get()
+    key = (CURRENT_THEME, tuple(sorted(FONT_SCALES.items())), str(folder_path or ""),
+           ws.prefix if ws is not None else None)
+    page = _PAGE_CACHE.get(key)
+    if page is None:
+        page = await executors.run_cpu(_build_page, *key)
+        if len(_PAGE_CACHE) >= PAGE_CACHE_MAX:
+            _PAGE_CACHE.pop(next(iter(_PAGE_CACHE)))
+        _PAGE_CACHE[key] = page
+    return page.response(request.headers, headers={"Cache-Control": "no-cache"})
+
+
+def _build_page(theme: str, font_scales: tuple, folder_path: str,
+                prefix: Optional[str]) -> responses.EncodedBody:
+    """Render and precompress the main page for one _PAGE_CACHE key."""
     rendered = HTML_TEMPLATE.replace(
         "<!-- THEME_STYLES -->",
-        THEMED_STYLES.format(colors=colors)
+        THEMED_STYLES.format(colors=THEMES[theme])
     )
+    scales = dict(font_scales)
     font_vars = "; ".join(
-        f"--font-scale-{section}: {FONT_SCALES.get(section, 1.0)}"
+        f"--font-scale-{section}: {scales.get(section, 1.0)}"
         for section in FONT_SCALE_SECTIONS
     ) + ";"
     rendered = rendered.replace("<!-- FONT_SCALE_VARS -->", font_vars)
-    return rendered.replace(
-        "{folder_path}",
-        str(folder_path) if folder_path else ""
-    )
+    if prefix is not None:
+        # The page's JS calls /api/... and /assets/... absolutely; send those
+        # to this workspace instead of the server's own folder.
+        rendered = rendered.replace(
+            "<head>", "<head>\n" + WORKSPACE_SHIM.replace("{prefix}", prefix), 1
+        )
+    rendered = rendered.replace("{folder_path}", folder_path)
+    return responses.EncodedBody(rendered.encode("utf-8"), "text/html; charset=utf-8")
 
 # Serve the favicon
 @app.get("/favicon.ico")
@@ -1001,24 +534,17 @@ async def favicon():
     return RedirectResponse(url="/static/favicon.ico")
 
 # Note routes
-@app.get("/api/notes")
-async def get_notes():
-    """Get all notes as HTML.
+NOTES_PAGE_MAX = 200  # upper bound on ?limit= for /api/notes pages
 
-    Reloads from disk when an external editor changed notes.md, reuses a
-    shared MarkdownIt parser, and serves per-note HTML from a content cache.
-    """
-    note_manager.reload_if_changed()
-    set_task_lookup(note_manager.build_task_lookup())
 
-    html_notes = []
-    for note_index, note in enumerate(note_manager.notes):
-        timestamp = note.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-        if note.title:
-            timestamp = f"{timestamp} - {note.title}"
-        rendered_content = note.rendered_html()
+def _render_note_html(note_index: int, note: "Note") -> str:
+    """Wrap one note's rendered markdown in its section chrome."""
+    timestamp = note.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    if note.title:
+        timestamp = f"{timestamp} - {note.title}"
+    rendered_content = _workspace_urls(note.rendered_html())
 
-        html_note = """
+    return """
         <div class="section-container">
             <div id="note-{note_index}" class="notes-item markdown-body">
                 <div class="post-header">
@@ -1039,18 +565,142 @@ async def get_notes():
             </div>
         </div>
         """.format(
-            note_index=note_index,
-            timestamp=html.escape(timestamp),
-            rendered_content=rendered_content
+        note_index=note_index,
+        timestamp=html.escape(timestamp),
+        rendered_content=rendered_content
+    )
+
+
+@app.get("/api/notes")
+async def get_notes(offset: int = 0, limit: Optional[int] = None,
+                    request: Request = None, response: Response = None):
+    """Get notes as HTML.
+
+    Reloads from disk when an external editor changed notes.md, reuses a
+    shared MarkdownIt parser, and serves per-note HTML from a content cache.
+
+    Without `limit` the whole collection is returned as one HTML document.
+    With `limit` only the window [offset, offset + limit) is rendered and
+    the response is JSON: {html, offset, count, total, next_offset}, where
+    next_offset is null once the last note has been served.
+
+    The ETag is the manager's generation: a poll with a matching
+    If-None-Match gets a 304 without rendering anything.
+    """
+    note_manager = active_manager()
+    await _reload_notes()
+    async with note_manager.lock.read():
+        etag = responses.generation_etag("notes", note_manager.generation)
+        unchanged = _not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        result = await executors.run_cpu(_notes_response, offset, limit)
+    return _tagged(result, response, etag)
+
+
+async def _reload_notes() -> None:
+    """Pick up external notes.md edits; the file read runs in the io pool.
+
+    The change check needs no lock; only an actual reload takes the write
+    side, so concurrent readers don't serialize on it.
+    """
+    note_manager = active_manager()
+    if note_manager.needs_save:
+        return
+    if not await executors.run_io(note_manager.disk_changed):
+        return
+    async with note_manager.lock.write():
+        await executors.run_io(note_manager.reload_if_changed)
+
+
+def _notes_response(offset: int, limit: Optional[int]):
+    """Render /api/notes (runs in the cpu pool)."""
+    note_manager = active_manager()
+    set_task_lookup(note_manager.build_task_lookup())
+
+    notes = note_manager.notes
+    total = len(notes)
+    if limit is None:
+        return HTMLResponse(''.join(
+            _render_note_html(note_index, note)
+            for note_index, note in enumerate(notes)
+        ))
+
+    offset = max(0, offset)
+    limit = max(1, min(limit, NOTES_PAGE_MAX))
+    end = min(total, offset + limit)
+    page_html = ''.join(
+        _render_note_html(note_index, notes[note_index])
+        for note_index in range(offset, end)
+    )
+    return {
+        "html": page_html,
+        "offset": offset,
+        "count": max(0, end - offset),
+        "total": total,
+        "next_offset": end if end < total else None,
+    }
+
+
+async def _publish_note_event(kind: str, note_index: int, task_from: int = 0,
+                              task_delta: int = 0):
+    """Push one note change to every open tab.
+
+    Task indexes are positional, so adding, removing or resizing a note
+    shifts every later checkbox: clients add `task_delta` to each
+    data-checkbox-index >= `task_from`. Duplicate task lines resolve to the
+    first match's index, which a shift can't model — `resync` tells
+    clients to refetch instead of patching. Callers hold note_manager.lock
+    (write side); the note HTML is rendered in the cpu pool.
+    """
+    note_manager = active_manager()
+    lookup = note_manager.build_task_lookup()
+    set_task_lookup(lookup)
+    data = {
+        "note_index": note_index,
+        "total": len(note_manager.notes),
+        "task_from": task_from,
+        "task_delta": task_delta,
+        "active_tasks": note_manager.get_active_tasks(),
+        "resync": len(lookup) != note_manager.checkbox_index,
+    }
+    if kind != "note_deleted":
+        data["html"] = await executors.run_cpu(
+            _render_note_html, note_index, note_manager.notes[note_index]
         )
-        html_notes.append(html_note)
+    _publish(kind, data)
 
-    return HTMLResponse(''.join(html_notes))
+
+@app.get("/api/events")
+async def events_stream(request: Request):
+    """Server-Sent Events stream of note/task/archive/folder changes."""
+    sub = event_bus.subscribe(request.headers.get("last-event-id"), scope=_event_scope())
+
+    async def _stream():
+        try:
+            yield f"retry: {events_module.RETRY_MS}\n\n"
+            while True:
+                event = await sub.next_event(events_module.HEARTBEAT_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": ping\n\n"
+                else:
+                    yield events_module.format_sse(event)
+        finally:
+            event_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/notes/status")
 async def notes_status():
     """Lightweight poll for external notes.md changes (no full render)."""
+    note_manager = active_manager()
     changed = note_manager.disk_changed() and not note_manager.needs_save
     return {
         "changed": changed,
@@ -1058,38 +708,62 @@ async def notes_status():
         "needs_save": note_manager.needs_save,
     }
 
+@app.post("/api/flush")
+async def flush_notes():
+    """Write any edits still waiting in the save scheduler to notes.md now.
+
+    Mutating routes return before their change is on disk; callers that
+    need durability (scripts, tests, "save before quit") call this.
+    """
+    try:
+        saved = await save_scheduler.flush_async()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Save failed: {e}")
+    return {"status": "success", "saved": saved}
+
 @app.post("/api/notes")
 async def add_note(request: Request, title: str = Form(...), content: str = Form(...)):
     """Add a new note"""
+    note_manager = active_manager()
     content = content.replace('\r\n', '\n').replace('\r', '\n')
 
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
 
     # Expand +file: sigils first so any embedded code is in place before
     # the archiver scans for +http URLs (a +file body wouldn't contain
     # one, but ordering is explicit so future sigils can compose).
-    content = sigils.expand_file_sigils(content, folder_path)
+    content = await executors.run_io(sigils.expand_file_sigils, content, folder_path)
 
+    # +links are archived in the background: the note is saved now with a
+    # placeholder per link, rewritten as each archive job finishes.
+    job_ids = []
     if '+http' in content:
-        print("Found +http link, processing...")
-        processed = await archiver.process_plus_links(content, folder_path, app_port=APP_PORT)
-        content = processed['markdown']
-
-    note_manager.add_note(title, content)
-    note_manager.save()
-    return {"status": "success", "note_index": 0}
+        print("Found +http link, queueing archive jobs...")
+        content, job_ids = await executors.run_io(_queue_plus_links, content, folder_path)
+
+    async with note_manager.lock.write():
+        content, pending = await _resolve_job_placeholders(content, folder_path)
+        note_manager.add_note(title, content)
+        save_scheduler.request(note_manager)
+        await _publish_note_event("note_added", 0, task_from=0,
+                                  task_delta=len(note_manager.notes[0].tasks))
+    for job_id in job_ids + pending:
+        _start_archive_job(folder_path, job_id)
+    return {"status": "success", "note_index": 0, "archive_jobs": job_ids}
 
 @app.delete("/api/notes/{note_index}")
 async def delete_note(note_index: int = FastAPIPath(...)):
     """Delete a note by index"""
+    note_manager = active_manager()
     try:
-        if 0 <= note_index < len(note_manager.notes):
-            # Remove the note at the specified index
-            note_manager.notes.pop(note_index)
-            note_manager.reindex_tasks()
-            note_manager.needs_save = True
-            note_manager.save()
-            return {"status": "success"}
+        async with note_manager.lock.write():
+            deleted = note_manager.delete_note(note_index)
+            if deleted is not None:
+                task_end, removed = deleted
+                save_scheduler.request(note_manager)
+                await _publish_note_event("note_deleted", note_index,
+                                          task_from=task_end, task_delta=-removed)
+                return {"status": "success"}
         raise HTTPException(status_code=404, detail="Note not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1097,8 +771,10 @@ async def delete_note(note_index: int = FastAPIPath(...)):
 @app.get("/api/notes/{note_index}")
 async def get_note(note_index: int):
     """Get a specific note for editing"""
+    note_manager = active_manager()
     try:
-        note = note_manager.notes[note_index]
+        async with note_manager.lock.read():
+            note = note_manager.notes[note_index]
         return {
             "timestamp": note.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
             "content": note.content,
@@ -1110,19 +786,31 @@ async def get_note(note_index: int):
 @app.put("/api/notes/{note_index}")
 async def update_note(note_index: int, title: str = Form(...), content: str = Form(...)):
     """Update an existing note"""
+    note_manager = active_manager()
     try:
-        note = note_manager.notes[note_index]
+        note_manager.notes[note_index]
         content = content.replace('\r\n', '\n').replace('\r', '\n')
 
-        content = sigils.expand_file_sigils(content, note_manager.base_path)
+        content = await executors.run_io(
+            sigils.expand_file_sigils, content, note_manager.base_path
+        )
 
+        job_ids = []
         if '+http' in content:
-            processed = await archiver.process_plus_links(content, note_manager.base_path, app_port=APP_PORT)
-            content = processed['markdown']
-
-        note.update(title, content)
-        note_manager.save()
-        return {"status": "success"}
+            content, job_ids = await executors.run_io(_queue_plus_links, content, note_manager.base_path)
+
+        async with note_manager.lock.write():
+            note = note_manager.notes[note_index]
+            content, pending = await _resolve_job_placeholders(content, note_manager.base_path)
+            task_end = note_manager.task_base(note_index) + len(note.tasks)
+            old_count = len(note.tasks)
+            note.update(title, content)
+            save_scheduler.request(note_manager)
+            await _publish_note_event("note_updated", note_index, task_from=task_end,
+                                      task_delta=len(note.tasks) - old_count)
+        for job_id in job_ids + pending:
+            _start_archive_job(note_manager.base_path, job_id)
+        return {"status": "success", "archive_jobs": job_ids}
     except IndexError:
         raise HTTPException(status_code=404, detail="Note not found")
     except Exception as e:
@@ -1130,30 +818,46 @@ async def update_note(note_index: int, title: str = Form(...), content: str = Fo
     
 # Task routes
 @app.get("/api/tasks")
-async def get_tasks():
+async def get_tasks(request: Request, response: Response):
     """Get active tasks"""
-    tasks = note_manager.get_active_tasks()
+    note_manager = active_manager()
+    await _reload_notes()
+    async with note_manager.lock.read():
+        etag = responses.generation_etag("tasks", note_manager.generation)
+        unchanged = _not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        tasks = note_manager.get_active_tasks()
     
     # Return JSON array of tasks instead of HTML
-    return tasks  # FastAPI will automatically convert this to JSON
+    return _tagged(tasks, response, etag)  # FastAPI will automatically convert this to JSON
 
 @app.post("/api/tasks/{task_index}")
 async def update_task(request: Request, task_index: int = FastAPIPath(...)):
     """Update task status without forcing a full notes re-render on the client."""
+    note_manager = active_manager()
     try:
         data = await request.json()
         checked = data.get('checked', False)
 
-        success = note_manager.update_task(task_index, checked)
+        async with note_manager.lock.write():
+            success = note_manager.update_task(task_index, checked)
+            if success:
+                save_scheduler.request(note_manager)
+                # Active tasks list is small; include it so the client can
+                # refresh the sidebar without a second round-trip.
+                active_tasks = note_manager.get_active_tasks()
+                _publish("task_toggled", {
+                    "task_index": task_index,
+                    "checked": checked,
+                    "active_tasks": active_tasks,
+                })
         if success:
-            note_manager.save()
             return JSONResponse({
                 "status": "success",
                 "task_index": task_index,
                 "checked": checked,
-                # Active tasks list is small; include it so the client can
-                # refresh the sidebar without a second round-trip.
-                "active_tasks": note_manager.get_active_tasks(),
+                "active_tasks": active_tasks,
             })
         return JSONResponse({"status": "error", "message": "Task not found"})
     except Exception as e:
@@ -1168,14 +872,258 @@ async def update_task(request: Request, task_index: int = FastAPIPath(...)):
 async def archive_webpage(request: Request, url: str):
     """Archive a webpage"""
 
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
     # archive_website() is blocking (network + subprocess); run it off the
-    # event loop so a slow/hung archive can't freeze the whole app.
-    result = await asyncio.to_thread(archiver.archive_website, url, folder_path)
+    # event loop, in its own pool so a slow/hung archive can't hold up saves.
+    result = await executors.run_in("net", archiver.archive_website, url, folder_path)
+    _bump_assets(folder_path)
     if result:
+        _publish("archive_added")
         return {"status": "success", "data": result}
     return {"status": "error", "message": "Failed to archive webpage"}
 
+###############################################################################
+# Archive jobs (see archive_jobs.py)
+###############################################################################
+# asyncio tasks of the jobs this process is running, by job id.
+_ARCHIVE_TASKS: Dict[str, asyncio.Task] = {}
+# Folders whose leftover queued jobs have been started since launch.
+_RESUMED_JOB_FOLDERS: set = set()
+
+
+def _queue_plus_links(content: str, folder_path: Path) -> tuple:
+    """Swap each +link in `content` for a job placeholder (one job per URL).
+
+    Returns (content, ids of the new jobs). Blocking: writes the job store.
+    """
+    store = archive_jobs.get_store(folder_path)
+    jobs: Dict[str, Dict] = {}
+
+    def replace(match):
+        url = match.group(1)
+        removed = archiver.self_reference(url, APP_PORT)
+        if removed is not None:
+            return removed['markdown']
+        if url not in jobs:
+            print(f"Queueing archive job for {url}")
+            jobs[url] = store.create(url)
+        return jobs[url]['placeholder']
+
+    content = archiver.PLUS_LINK_RE.sub(replace, content)
+    return content, [job['id'] for job in jobs.values()]
+
+
+async def _resolve_job_placeholders(content: str, folder_path: Path) -> tuple:
+    """Update stale job placeholders in note text about to be stored.
+
+    Call with the notes write lock held: a job records its result in the
+    store before taking the lock to substitute it, so text checked here
+    either already gets the result or still has a placeholder the job will
+    replace. Returns (content, ids of jobs still pending in it).
+    """
+    if 'archive-job:' not in content:
+        return content, []
+    store = await executors.run_io(archive_jobs.get_store, folder_path)
+    return await executors.run_io(store.resolve_placeholders, content)
+
+
+def _start_archive_job(folder_path: Path, job_id: str) -> None:
+    """Run a queued job in the background, in the current folder's context."""
+    if job_id in _ARCHIVE_TASKS:
+        return
+    task = asyncio.ensure_future(_run_archive_job(folder_path, job_id))
+    _ARCHIVE_TASKS[job_id] = task
+    task.add_done_callback(lambda _task: _ARCHIVE_TASKS.pop(job_id, None))
+
+
+async def _resume_archive_jobs(folder_path: Path) -> None:
+    """Start the jobs an earlier run left queued for this folder (once per folder)."""
+    key = str(folder_path)
+    if key in _RESUMED_JOB_FOLDERS:
+        return
+    _RESUMED_JOB_FOLDERS.add(key)
+    store = await executors.run_io(archive_jobs.get_store, folder_path)
+    for job in await executors.run_io(store.pending):
+        print(f"Resuming archive job for {job['url']}")
+        _start_archive_job(folder_path, job['id'])
+
+
+async def _resume_main_folder_jobs():
+    folder_path = getattr(app.state, "folder_path", None)
+    if folder_path is not None:
+        await _resume_archive_jobs(folder_path)
+
+app.router.on_startup.append(_resume_main_folder_jobs)
+
+
+async def _substitute_placeholder(placeholder: str, replacement: str) -> None:
+    """Rewrite a job placeholder in the notes of the current folder."""
+    ws = workspaces.current.get()
+    if ws is not None:
+        # The workspace may have been evicted from the pool since the job
+        # was queued; get() reopens it.
+        ws = await executors.run_io(app.state.workspaces.get, ws.folder_id)
+        if ws is None:
+            return
+        workspaces.current.set(ws)
+    note_manager = active_manager()
+    await _reload_notes()
+    async with note_manager.lock.write():
+        changed_indexes = note_manager.replace_text(placeholder, replacement)
+        if changed_indexes:
+            save_scheduler.request(note_manager)
+            for note_index in changed_indexes:
+                await _publish_note_event("note_updated", note_index)
+
+
+class _ArchiveGate:
+    """Settles, once, whether a job's archive is written or dropped.
+
+    The worker calls commit() just before writing its first file; the
+    deadline (or a cancel) calls abandon(). Whichever comes first wins, so
+    a job given up on leaves no files behind, and one whose files are
+    being written is left to finish rather than marked failed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcome: Optional[str] = None
+
+    def _settle(self, outcome: str) -> bool:
+        with self._lock:
+            if self._outcome is None:
+                self._outcome = outcome
+            return self._outcome == outcome
+
+    def commit(self) -> bool:
+        return self._settle("commit")
+
+    def abandon(self) -> bool:
+        return self._settle("abandon")
+
+
+def _archive_job_worker(store: "archive_jobs.JobStore", job_id: str, url: str,
+                        folder_path: Path, on_claim: Callable[[], None],
+                        gate: _ArchiveGate) -> Optional[Dict[str, str]]:
+    # Runs in the net pool; marked running only once a worker picks it up.
+    if not store.claim(job_id):
+        return None
+    on_claim()
+    return archiver.archive_website(url, folder_path, before_write=gate.commit)
+
+
+async def _run_archive_job(folder_path: Path, job_id: str) -> None:
+    store = await executors.run_io(archive_jobs.get_store, folder_path)
+    job = await executors.run_io(store.get, job_id)
+    if job is None or job['status'] not in archive_jobs.PENDING_STATES:
+        return
+    loop = asyncio.get_running_loop()
+    claimed = asyncio.Event()
+    gate = _ArchiveGate()
+
+    def on_claim():
+        try:
+            loop.call_soon_threadsafe(claimed.set)
+        except RuntimeError:
+            pass  # loop closed; nobody is timing this job any more
+
+    result, error = None, None
+    try:
+        # The net pool bounds how many jobs archive at once; the rest wait
+        # in its queue. The deadline starts once a worker claims the job.
+        work = asyncio.ensure_future(executors.run_in(
+            "net", _archive_job_worker, store, job_id, job['url'], folder_path, on_claim, gate))
+        claim = asyncio.ensure_future(claimed.wait())
+        try:
+            await asyncio.wait({work, claim}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            claim.cancel()
+        await asyncio.wait({work}, timeout=archiver.PLUS_LINKS_DEADLINE)
+        if not work.done() and gate.abandon():
+            # The worker runs on, but writes nothing; drop its outcome.
+            work.add_done_callback(lambda f: f.cancelled() or f.exception())
+            error = f"Timed out after {archiver.PLUS_LINKS_DEADLINE:.0f}s"
+        else:
+            # Done, or already writing its files: let it complete the job.
+            result = await work
+    except asyncio.CancelledError:
+        gate.abandon()
+        raise
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    if result:
+        status, replacement = archive_jobs.DONE, result['markdown']
+    else:
+        status, replacement = archive_jobs.FAILED, archive_jobs.failed_placeholder(job)
+        error = error or "Failed to archive webpage"
+        print(f"Archive job for {job['url']} failed: {error}")
+    # Store first, then notes (see _resolve_job_placeholders). A job
+    # cancelled meanwhile keeps its cancellation.
+    finished = await executors.run_io(store.update, job_id, expect=archive_jobs.PENDING_STATES,
+                                      status=status, error=error, placeholder=replacement)
+    if finished is None:
+        return
+    await _substitute_placeholder(job['placeholder'], replacement)
+    if result:
+        _bump_assets(folder_path)
+        _publish("archive_added")
+    _publish("archive_job", finished)
+
+
+async def _archive_job_or_404(request: Request, job_id: str) -> tuple:
+    folder_path = _folder_path(request)
+    store = await executors.run_io(archive_jobs.get_store, folder_path)
+    job = await executors.run_io(store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Archive job not found")
+    return folder_path, store, job
+
+
+@app.get("/api/archive/jobs")
+async def list_archive_jobs(request: Request):
+    """Archive jobs of this folder, newest first"""
+    folder_path = _folder_path(request)
+    await _resume_archive_jobs(folder_path)
+    store = await executors.run_io(archive_jobs.get_store, folder_path)
+    return {"jobs": await executors.run_io(store.list)}
+
+
+@app.post("/api/archive/jobs/{job_id}/retry")
+async def retry_archive_job(request: Request, job_id: str):
+    """Queue a failed archive job again"""
+    folder_path, store, job = await _archive_job_or_404(request, job_id)
+    pending = archive_jobs.pending_placeholder(job)
+    retried = await executors.run_io(store.update, job_id, expect=(archive_jobs.FAILED,),
+                                     status=archive_jobs.QUEUED, error=None, placeholder=pending)
+    if retried is None:
+        raise HTTPException(status_code=409, detail=f"Only failed jobs can be retried (job is {job['status']})")
+    await _substitute_placeholder(archive_jobs.failed_placeholder(job), pending)
+    job = retried
+    _start_archive_job(folder_path, job_id)
+    _publish("archive_job", job)
+    return {"status": "success", "job": job}
+
+
+@app.post("/api/archive/jobs/{job_id}/cancel")
+async def cancel_archive_job(request: Request, job_id: str):
+    """Drop a queued, running or failed archive job, leaving the plain URL in the note"""
+    _, store, job = await _archive_job_or_404(request, job_id)
+    # Checked and applied under the store lock, so a job finishing right
+    # now either wins (409) or sees the cancellation and leaves the note be.
+    before = await executors.run_io(store.cancel, job_id)
+    if before is None:
+        job = await executors.run_io(store.get, job_id) or job
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    task = _ARCHIVE_TASKS.pop(job_id, None)
+    if task is not None:
+        # A page already being fetched finishes in its worker thread, but
+        # its result is no longer substituted into the note.
+        task.cancel()
+    await _substitute_placeholder(before['placeholder'], before['url'])
+    job = await executors.run_io(store.get, job_id)
+    _publish("archive_job", job)
+    return {"status": "success", "job": job}
+
 # Theme routes
 @app.post("/api/theme")
 async def set_theme(theme: str):
@@ -1183,6 +1131,7 @@ async def set_theme(theme: str):
    global CURRENT_THEME
    if theme in THEMES:
        CURRENT_THEME = theme
+       _invalidate_page_cache()
        return {"status": "success", "theme": THEMES[theme]}
    return {"status": "error", "message": "Invalid theme"}
 
@@ -1203,6 +1152,7 @@ async def save_theme(theme: str = Form(...)):
     if save_config(config):
         global CURRENT_THEME
         CURRENT_THEME = theme
+        _invalidate_page_cache()
         return {"status": "success"}
     else:
         raise HTTPException(status_code=500, detail="Failed to save theme")
@@ -1212,6 +1162,8 @@ async def save_theme(theme: str = Form(...)):
 async def shutdown():
     """Shutdown this specific instance of the application using multiple approaches"""
     pid = os.getpid()
+    # The process may be killed outright below; don't leave edits pending.
+    await save_scheduler.flush_async()
     
     def shutdown_server():
         try:
@@ -1263,56 +1215,60 @@ async def shutdown():
     return JSONResponse({"status": "shutting down"})
 
 @app.get("/api/links")
-async def get_links(request: Request):
-    """API endpoint to get the links section."""
-    # Retrieve folder_path from app.state
-    folder_path = request.app.state.folder_path
-    
-    sites_path = folder_path / "assets" / "sites"  # Use absolute path based on folder_path
-    link_groups = {}
-    
-    if sites_path.exists():
-        # First, filter for just HTML files
-        html_files = [f for f in sites_path.glob("*.html")]
-        
-        pattern = re.compile(r'(\d{4}_\d{2}_\d{2}_\d{6})_([^-]+)-(.+?)\.html$')
+async def get_links(request: Request, response: Response, q: str = "",
+                    domain: Optional[str] = None, offset: int = 0,
+                    limit: Optional[int] = None):
+    """API endpoint to get the links section.
+
+    `q` filters archives by domain/title/URL/description/keywords and
+    `domain` by exact domain; `offset`/`limit` page through the result
+    (no limit returns everything, as before).
+    """
+    folder_path = _folder_path(request)
+    etag = responses.generation_etag("links", _assets_generation(folder_path))
+    unchanged = _not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    if limit is not None:
+        limit = max(1, min(limit, LINKS_PAGE_MAX))
+    result = await executors.run_io(_archived_links, folder_path, q, domain, max(0, offset), limit)
+    return _tagged(result, response, etag)
+
+
+LINKS_PAGE_MAX = 500  # cap on /api/links?limit=
+
+
+def _archived_links(folder_path: Path, q: str = "", domain: Optional[str] = None,
+                    offset: int = 0, limit: Optional[int] = None) -> Dict:
+    """Build the links section from the folder's archive index."""
+    entries, total = archive_index.get_index(folder_path).query(q, domain, offset, limit)
+
+    # Group this page's archives by domain (the index returns them sorted
+    # by domain, then time).
+    link_groups: Dict[str, List[Dict]] = {}
+    for entry in entries:
+        link_groups.setdefault(entry['domain'], []).append(entry)
 
-        for file in html_files:
-            match = pattern.match(file.name)
-            if match:
-                timestamp_str, title, domain = match.groups()
-                
-                # Convert timestamp to a displayable format
-                display_timestamp = datetime.strptime(timestamp_str, "%Y_%m_%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
-                
-                if domain not in link_groups:
-                    link_groups[domain] = {
-                        'domain': domain,
-                        'archives': []
-                    }
-                
-                link_groups[domain]['archives'].append({
-                    'timestamp': display_timestamp,
-                    'filename': file.name
-                })
-    # Generate HTML and Markdown output
-    # Sort domains alphabetically
-    sorted_domains = sorted(link_groups.keys())
-    
     html_parts = []
-    for domain in sorted_domains:
-        data = link_groups[domain]
+    for group_domain, archives in link_groups.items():
         html_parts.append(
-            f'<div class="archived-link"><a href="#">{html.escape(data["domain"])}</a>'
+            f'<div class="archived-link"><a href="#">{html.escape(group_domain)}</a>'
         )
-        for archive in data['archives']:
+        for archive in archives:
             # JSON-encode the filename so quotes/HTML entities can't break the onclick.
             safe_href = html.escape(quote(archive["filename"]), quote=True)
             safe_attr = html.escape(archive["filename"], quote=True)
+            tooltip = html.escape(
+                '\n'.join(part for part in (archive["title"], archive["description"]) if part),
+                quote=True,
+            )
             html_parts.append(
                 f'<span class="archive-reference">'
-                f'<a href="/assets/sites/{safe_href}" target="_blank">'
+                f'<a href="/assets/sites/{safe_href}" target="_blank" title="{tooltip}">'
                 f'site archive [{archive["timestamp"]}]</a>'
+                f'<a href="/api/archive-export?filename={safe_href}" '
+                f'style="display:inline;font-size:0.5rem;margin-left:5px;" '
+                f'title="Download as a single HTML file">export</a>'
                 f'<span style="color:red;cursor:pointer;font-size:0.5rem; margin-left:5px;" '
                 f'data-filename="{safe_attr}" '
                 f'onclick="deleteArchive(this.dataset.filename)">delete</span>'
@@ -1320,26 +1276,31 @@ async def get_links(request: Request):
             )
         html_parts.append('</div>')
 
+    next_offset = offset + len(entries)
     result = {
-        'html': '\n'.join(html_parts),
+        'html': _workspace_urls('\n'.join(html_parts)),
         'markdown': '\n'.join([
-            f"[{data['domain']} - [{archive['timestamp']}]](/assets/sites/{archive['filename']})"
-            for data in link_groups.values() 
-            for archive in data['archives']
-        ])
+            f"[{archive['domain']} - [{archive['timestamp']}]](/assets/sites/{archive['filename']})"
+            for archive in entries
+        ]),
+        'total': total,
+        'offset': offset,
+        'count': len(entries),
+        'next_offset': next_offset if next_offset < total else None,
     }
     
     return result
 
+
 @app.post("/api/archive-delete")
 async def delete_archive(request: Request):
+    note_manager = active_manager()
     data = await request.json()
     filename = data.get('filename')
     if not filename:
         return JSONResponse({"status": "error", "message": "No filename provided"}, status_code=400)
 
-    # Retrieve folder_path from app.state
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
     
     sites_path = folder_path / "assets" / "sites"
     html_path = sites_path / filename
@@ -1348,53 +1309,71 @@ async def delete_archive(request: Request):
     if not html_path.exists():
         return JSONResponse({"status": "error", "message": "File not found"}, status_code=404)
 
-    try:
-        # Delete the files
+    def _unlink_archive():
         html_path.unlink()
         if tags_path.exists():
             tags_path.unlink()
+        # Drop blobs ("blobs" archive format) no remaining archive uses.
+        removed = archiver.collect_blobs(sites_path)
+        if removed:
+            print(f"Removed {removed} unreferenced archive blob(s)")
 
-        # Update notes.md to mark references as deleted
-        changes_made = False
-
-        print(f"Looking for filename: {filename}")  # Debug log
-
-        for note in note_manager.notes:
-            lines = note.content.split('\n')
-            new_lines = []
-            note_changed = False  # Track if this note changed
-
-            for line in lines:
-                if filename in line:
-                    print(f"Found matching line: {line}")  # Debug log
-                    # Replace the line
-                    replaced_line = f"~~{line}~~ _(archived link deleted)_"
-                    # Only set changed if the replaced line differs
-                    if replaced_line != line:
-                        note_changed = True
-                    new_lines.append(replaced_line)
-                else:
-                    new_lines.append(line)
-
-            if note_changed:
-                print("Updating note content")  # Debug log
-                note.content = '\n'.join(new_lines)
-                changes_made = True  # Indicate that at least one note was changed
-
-        if changes_made:
-            print("Saving changes to notes.md")  # Debug log
-            note_manager.needs_save = True
-            note_manager.save()
-            print("Changes were made to notes")  # Debug log
-            return {"status": "success", "changes_made": changes_made}
-        else:
-            print("No changes were made to notes")  # Debug log
-            return {"status": "success", "changes_made": changes_made, "message": "No matching links found in notes"}
-
+    try:
+        # Delete the files
+        await executors.run_io(_unlink_archive)
+        await executors.run_io(archive_index.get_index(folder_path).remove, filename)
+        _bump_assets(_folder_path(request))
+        async with note_manager.lock.write():
+            return await _strike_archive_references(filename)
     except Exception as e:
         print(f"Error in delete_archive: {str(e)}")  # Debug log
         return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
 
+
+@app.get("/api/archive-export")
+async def export_archive(request: Request, filename: str):
+    """Download an archive as one standalone HTML file.
+
+    "blobs" archives get their shared resources inlined again; single-file
+    archives are returned as they are.
+    """
+    sites_path = _folder_path(request) / "assets" / "sites"
+    html_path = sites_path / filename
+    if Path(filename).name != filename or not filename.endswith(".html") or not html_path.is_file():
+        return JSONResponse({"status": "error", "message": "File not found"}, status_code=404)
+
+    fd, export_path = tempfile.mkstemp(prefix="noteflow-export-", suffix=".html")
+    os.close(fd)
+    try:
+        await executors.run_io(archiver.export_archive, html_path, Path(export_path))
+    except Exception as e:
+        os.unlink(export_path)
+        print(f"Error exporting archive {filename}: {e}")
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
+    return FileResponse(export_path, media_type="text/html", filename=filename,
+                        background=BackgroundTask(os.unlink, export_path))
+
+
+async def _strike_archive_references(filename: str) -> Dict:
+    """Strike through note lines linking a deleted archive. Caller holds the write lock."""
+    note_manager = active_manager()
+    print(f"Looking for filename: {filename}")  # Debug log
+    changed_indexes = note_manager.strike_references(filename)
+    changes_made = bool(changed_indexes)
+
+    if changes_made:
+        print("Saving changes to notes.md")  # Debug log
+        save_scheduler.request(note_manager)
+        for note_index in changed_indexes:
+            await _publish_note_event("note_updated", note_index)
+        _publish("archive_deleted", {"filename": filename})
+        print("Changes were made to notes")  # Debug log
+        return {"status": "success", "changes_made": changes_made}
+    else:
+        _publish("archive_deleted", {"filename": filename})
+        print("No changes were made to notes")  # Debug log
+        return {"status": "success", "changes_made": changes_made, "message": "No matching links found in notes"}
+
 @app.get("/api/current-theme")
 async def get_current_theme():
     """Get the currently active theme"""
@@ -1422,6 +1401,7 @@ async def set_font_scales(request: Request):
         if section in FONT_SCALE_SECTIONS:
             new_scales[section] = _clamp_font_scale(value)
     FONT_SCALES = new_scales
+    _invalidate_page_cache()
 
     cfg = load_config()
     cfg['font_scales'] = new_scales
@@ -1478,11 +1458,34 @@ async def set_archive_ssl_verify(request: Request):
     save_config(cfg)
     return {"status": "success", "enabled": ARCHIVE_SSL_VERIFY}
 
+@app.get("/api/archive-format")
+async def get_archive_format():
+    """Return the format new web archives are written in."""
+    return {"format": ARCHIVE_FORMAT, "formats": list(ARCHIVE_FORMATS)}
+
+@app.post("/api/archive-format")
+async def set_archive_format(request: Request):
+    """Switch between single-file and deduplicated ("blobs") archives and persist it."""
+    global ARCHIVE_FORMAT
+    try:
+        body = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(body, dict) or body.get("format") not in ARCHIVE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {ARCHIVE_FORMATS}")
+
+    ARCHIVE_FORMAT = body["format"]
+    archiver.set_archive_format(ARCHIVE_FORMAT)
+    cfg = load_config()
+    cfg['archive_format'] = ARCHIVE_FORMAT
+    save_config(cfg)
+    return {"status": "success", "format": ARCHIVE_FORMAT}
+
 @app.get("/api/git-context")
 async def api_git_context(request: Request):
     """Return git repo info for the active folder, if any."""
-    folder_path = request.app.state.folder_path
-    return get_git_context(folder_path)
+    folder_path = _folder_path(request)
+    return await executors.run_io(get_git_context, folder_path)
 
 @app.get("/api/commits")
 async def api_commits(request: Request, limit: int = 30):
@@ -1493,7 +1496,7 @@ async def api_commits(request: Request, limit: int = 30):
     might encounter. If the folder isn't a git repo, returns an empty
     list rather than an error so the UI can render a friendly message.
     """
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
     if not (folder_path / ".git").exists():
         return {"is_repo": False, "commits": []}
     try:
@@ -1501,7 +1504,8 @@ async def api_commits(request: Request, limit: int = 30):
         limit = max(1, min(int(limit), 200))
         # %x1f = unit separator, %x1e = record separator — avoids any
         # quoting headaches that would come from a JSON or pipe format.
-        result = subprocess.run(
+        result = await executors.run_io(
+            subprocess.run,
             ["git", "log", f"-{limit}",
              "--pretty=format:%h%x1f%an%x1f%ad%x1f%s%x1e",
              "--date=short"],
@@ -1533,58 +1537,120 @@ async def api_commits(request: Request, limit: int = 30):
 
 @app.get("/api/search")
 async def search_notes(request: Request, q: str = ""):
-    """Search notes in the current folder for a substring (case-insensitive).
-
-    Returns matching note indexes and short snippets. The frontend renders
-    the results inline; this endpoint stays cheap by scanning in-memory
-    notes rather than re-reading notes.md.
+    """Search notes in the current folder.
+
+    Returns matching note indexes and short snippets, best match first.
+    Queries the registry's FTS5 index (ranked, prefix-matched) when the
+    notes on disk match what's in memory; while there are unsaved edits,
+    or without FTS5, falls back to a case-insensitive substring scan of
+    the in-memory notes. Holds the read lock, so searches run alongside
+    page loads but never against a half-applied edit.
     """
-    note_manager.reload_if_changed()
-    query = (q or "").strip()
-    if not query:
-        return {"query": "", "matches": []}
-    needle = query.lower()
-    matches = []
-    for idx, note in enumerate(note_manager.notes):
-        haystack = f"{note.title}\n{note.content}".lower()
-        pos = haystack.find(needle)
-        if pos < 0:
-            continue
-        # Build a snippet around the first match.
-        body = f"{note.title}\n{note.content}"
-        snippet_start = max(0, pos - 40)
-        snippet_end = min(len(body), pos + len(needle) + 40)
-        snippet = body[snippet_start:snippet_end].replace('\n', ' ')
-        matches.append({
-            "index": idx,
-            "title": note.title or "(untitled)",
-            "timestamp": note.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-            "snippet": snippet,
-            "count": haystack.count(needle),
-        })
-    return {"query": query, "matches": matches}
+    note_manager = active_manager()
+    await _reload_notes()
+    async with note_manager.lock.read():
+        query = (q or "").strip()
+        if not query:
+            return {"query": "", "matches": []}
+
+        # folder_id is only set once main() has created folder_registry.
+        folder_id = _folder_id(request)
+        if (folder_id is not None and folder_registry.fts_enabled
+                and not note_manager.needs_save):
+            matches = []
+            notes = note_manager.notes
+            for hit in await executors.run_db(folder_registry.search_folder, folder_id, query):
+                idx = hit["note_index"]
+                if idx >= len(notes):
+                    continue
+                note = notes[idx]
+                matches.append({
+                    "index": idx,
+                    "title": note.title or "(untitled)",
+                    "timestamp": note.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                    "snippet": hit["snippet"],
+                    "count": hit["count"],
+                })
+            return {"query": query, "matches": matches}
+
+        needle = query.lower()
+        matches = []
+        for idx, note in enumerate(note_manager.notes):
+            haystack = f"{note.title}\n{note.content}".lower()
+            pos = haystack.find(needle)
+            if pos < 0:
+                continue
+            # Build a snippet around the first match.
+            body = f"{note.title}\n{note.content}"
+            snippet_start = max(0, pos - 40)
+            snippet_end = min(len(body), pos + len(needle) + 40)
+            snippet = body[snippet_start:snippet_end].replace('\n', ' ')
+            matches.append({
+                "index": idx,
+                "title": note.title or "(untitled)",
+                "timestamp": note.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "snippet": snippet,
+                "count": haystack.count(needle),
+            })
+        return {"query": query, "matches": matches}
 
 ###############################################################################
 # Cross-folder routes (global tasks page, registry, global search)
 ###############################################################################
+_GLOBAL_TASKS_PAGE: Optional[responses.EncodedBody] = None
+
 @app.get("/global-tasks", response_class=HTMLResponse)
-async def global_tasks_page():
-    return HTMLResponse(folders_module.GLOBAL_TASKS_HTML)
+async def global_tasks_page(request: Request):
+    global _GLOBAL_TASKS_PAGE
+    if _GLOBAL_TASKS_PAGE is None:
+        _GLOBAL_TASKS_PAGE = responses.EncodedBody(
+            folders_module.GLOBAL_TASKS_HTML.encode("utf-8"), "text/html; charset=utf-8"
+        )
+    return _GLOBAL_TASKS_PAGE.response(request.headers, headers={"Cache-Control": "no-cache"})
 
 @app.get("/api/global-tasks")
-async def api_global_tasks(include_done: int = 0):
-    return folder_registry.get_all_tasks(include_done=bool(include_done))
+async def api_global_tasks(request: Request, response: Response, include_done: int = 0):
+    generation = await executors.run_db(lambda: folder_registry.generation)
+    etag = responses.generation_etag("global-tasks", generation)
+    unchanged = _not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    tasks = await executors.run_db(folder_registry.get_all_tasks, include_done=bool(include_done))
+    return _tagged(tasks, response, etag)
+
+def _resident_manager(folder_id: int) -> Optional[NoteManager]:
+    """The loaded NoteManager for a registry folder, if this process has one."""
+    if folder_id == getattr(app.state, "folder_id", None):
+        return note_manager
+    pool = getattr(app.state, "workspaces", None)
+    ws = pool.peek(folder_id) if pool is not None else None
+    return ws.manager if ws is not None else None
 
 @app.post("/api/global-tasks/{task_id}/toggle")
 async def api_toggle_global_task(task_id: int):
-    result = folder_registry.toggle_task(task_id)
+    task = await executors.run_db(folder_registry.get_task, task_id)
+    manager = _resident_manager(task['folder_id']) if task else None
+    if manager is None:
+        result = await executors.run_db(folder_registry.toggle_task, task_id)
+    else:
+        # toggle_task rewrites notes.md directly. Write the folder's deferred
+        # edits first and hold off new ones until the toggle is reloaded, so
+        # neither write clobbers the other.
+        async with manager.lock.write():
+            if manager.needs_save:
+                await executors.run_io(manager.save)
+            result = await executors.run_db(folder_registry.toggle_task, task_id)
+            if result:
+                await executors.run_io(manager.reload_if_changed, True)
+        if result:
+            event_bus.publish("notes_changed", scope=task['folder_id'])
     if not result:
         raise HTTPException(status_code=404, detail="Task not found")
     return result
 
 @app.get("/api/global-folders")
 async def api_global_folders():
-    return folder_registry.list_active()
+    return await executors.run_db(folder_registry.list_active)
 
 @app.post("/api/global-folders/add")
 async def api_add_folder(request: Request):
@@ -1598,27 +1664,44 @@ async def api_add_folder(request: Request):
     p = Path(path).expanduser()
     if not p.exists() or not p.is_dir():
         raise HTTPException(status_code=400, detail=f"Folder does not exist: {path}")
-    return folder_registry.add_folder(p)
+    return await executors.run_db(folder_registry.add_folder, p)
 
 @app.post("/api/global-folders/{folder_id}/forget")
 async def api_forget_folder(folder_id: int):
-    if not folder_registry.forget_folder(folder_id):
+    if not await executors.run_db(folder_registry.forget_folder, folder_id):
         raise HTTPException(status_code=404, detail="Folder not found")
     return {"status": "success"}
 
 @app.post("/api/global-folders/{folder_id}/sync")
 async def api_sync_folder(folder_id: int):
-    n = folder_registry.sync_folder(folder_id)
+    n = await executors.run_db(folder_registry.sync_folder, folder_id, force=True)
     return {"status": "success", "task_count": n}
 
+@app.get("/f/", response_class=HTMLResponse)
+async def workspace_index(request: Request):
+    """Workspace mode: list the folders reachable under /f/{folder_id}/."""
+    if getattr(request.app.state, "workspaces", None) is None:
+        raise HTTPException(status_code=404, detail="Workspace mode is off (start with --workspace)")
+    folders = await executors.run_db(folder_registry.list_active)
+    items = "".join(
+        f'<li><a href="/f/{f["id"]}/">{html.escape(Path(f["path"]).name or f["path"])}</a>'
+        f' <small>{html.escape(f["path"])}</small></li>'
+        for f in folders
+    )
+    return HTMLResponse(
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>NoteFlow folders</title></head>'
+        f'<body><h1>NoteFlow folders</h1><ul>{items}</ul></body></html>'
+    )
+
 @app.post("/api/global-sync")
 async def api_sync_all():
-    n = folder_registry.sync_all()
-    return {"status": "success", "task_count": n}
+    n = await executors.run_db(folder_registry.sync_all)
+    return {"status": "success", "task_count": n,
+            "stats": folder_registry.last_sync_stats}
 
 @app.get("/api/search/global")
 async def api_search_global(q: str = ""):
-    return {"query": q, "results": folder_registry.search_all(q)}
+    return {"query": q, "results": await executors.run_db(folder_registry.search_all, q)}
 
 ###############################################################################
 # AI assist routes
@@ -1642,7 +1725,7 @@ async def api_ai_config_set(request: Request):
 
 @app.post("/api/ai/ask")
 async def api_ai_ask(request: Request):
-    from fastapi.responses import StreamingResponse
+    note_manager = active_manager()
     try:
         body = await request.json()
     except Exception:
@@ -1654,8 +1737,9 @@ async def api_ai_ask(request: Request):
     selection = (body or {}).get("selection")
     # Prefer the in-memory notes (already loaded / possibly unsaved) over a
     # disk re-read so chat reflects the editor session.
-    note_manager.reload_if_changed()
-    notes_text = note_manager.render_notes()
+    await _reload_notes()
+    async with note_manager.lock.read():
+        notes_text = await executors.run_cpu(note_manager.render_notes)
     messages = ai_module.build_messages(
         user_messages, context, notes_text=notes_text, selection=selection,
     )
@@ -1672,12 +1756,12 @@ async def api_ai_render(request: Request):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON body")
     md = (body or {}).get("markdown", "")
-    return {"html": parse_markdown(md)}
+    return {"html": await executors.run_cpu(parse_markdown, md)}
 
 @app.get("/api/ai/history")
 async def api_ai_history_list(request: Request):
-    history = ai_module.AIHistory(request.app.state.folder_path)
-    return history.list_entries()
+    history = ai_module.AIHistory(_folder_path(request))
+    return await executors.run_io(history.list_entries)
 
 @app.post("/api/ai/history")
 async def api_ai_history_add(request: Request):
@@ -1687,8 +1771,9 @@ async def api_ai_history_add(request: Request):
         raise HTTPException(status_code=400, detail="Invalid JSON body")
     if not isinstance(body, dict) or not body.get("question") or not body.get("response"):
         raise HTTPException(status_code=400, detail="Expected {'question': '...', 'response': '...'}")
-    history = ai_module.AIHistory(request.app.state.folder_path)
-    return history.append_entry(
+    history = ai_module.AIHistory(_folder_path(request))
+    return await executors.run_io(
+        history.append_entry,
         question=body["question"],
         response=body["response"],
         model=body.get("model", AI_CONFIG.get("model", "")),
@@ -1697,8 +1782,8 @@ async def api_ai_history_add(request: Request):
 
 @app.delete("/api/ai/history/{entry_id}")
 async def api_ai_history_delete(entry_id: str, request: Request):
-    history = ai_module.AIHistory(request.app.state.folder_path)
-    if not history.delete_entry(entry_id):
+    history = ai_module.AIHistory(_folder_path(request))
+    if not await executors.run_io(history.delete_entry, entry_id):
         raise HTTPException(status_code=404, detail="Entry not found")
     return {"status": "success"}
 
@@ -1741,7 +1826,7 @@ async def upload_file(request: Request, file: UploadFile = File(...)):
     safe_name = _safe_upload_filename(file.filename)
     content_type = file.content_type or mimetypes.guess_type(safe_name)[0]
 
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
     is_image = bool(content_type and content_type.startswith('image/'))
 
     if is_image:
@@ -1771,7 +1856,8 @@ async def upload_file(request: Request, file: UploadFile = File(...)):
                 except OSError:
                     pass
                 raise HTTPException(status_code=413, detail="File exceeds 50 MiB limit")
-            buffer.write(chunk)
+            await executors.run_io(buffer.write, chunk)
+    _bump_assets(folder_path)
 
     return {
         "filePath": f"/assets/{relative_path}/{file_path.name}",
@@ -1782,29 +1868,46 @@ async def upload_file(request: Request, file: UploadFile = File(...)):
 
 @app.delete("/api/delete-image")
 async def delete_image(request: Request):
+    note_manager = active_manager()
     data = await request.json()
     image_path = data.get("imagePath", "")
     if image_path.startswith("/"):
         image_path = image_path[1:]
 
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
     full_path = (folder_path / image_path).resolve()
     assets_images = (folder_path / "assets" / "images").resolve()
 
     if not str(full_path).startswith(str(assets_images) + os.sep):
         raise HTTPException(status_code=400, detail="Invalid image path")
 
-    if full_path.exists():
-        full_path.unlink()
+    await executors.run_io(full_path.unlink, missing_ok=True)
+    _bump_assets(folder_path)
 
-    note_manager.remove_asset_references(full_path.name)
+    async with note_manager.lock.write():
+        if note_manager.remove_asset_references(full_path.name):
+            save_scheduler.request(note_manager)
+            _publish("notes_changed")
     return {"status": "success"}
 
 @app.get("/api/uploaded-files")
-async def list_uploaded_files(request: Request):
-    folder_path = request.app.state.folder_path
-    notes_path = folder_path / "notes.md"
-    notes_content = notes_path.read_text(encoding="utf-8") if notes_path.exists() else ""
+async def list_uploaded_files(request: Request, response: Response):
+    note_manager = active_manager()
+    folder_path = _folder_path(request)
+    await _reload_notes()
+    async with note_manager.lock.read():
+        # "referenced" flags come from the notes, so both generations count.
+        etag = responses.generation_etag("files", note_manager.generation,
+                                         _assets_generation(folder_path))
+        unchanged = _not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        notes_content = note_manager.render_notes()
+    return _tagged(await executors.run_io(_list_uploaded_files, folder_path, notes_content),
+                   response, etag)
+
+
+def _list_uploaded_files(folder_path: Path, notes_content: str) -> Dict:
 
     files = []
     for subdir in ("images", "files"):
@@ -1830,22 +1933,26 @@ async def list_uploaded_files(request: Request):
 
 @app.delete("/api/delete-asset")
 async def delete_asset(request: Request):
+    note_manager = active_manager()
     data = await request.json()
     asset_path = data.get("assetPath", "")
     if asset_path.startswith("/"):
         asset_path = asset_path[1:]
 
-    folder_path = request.app.state.folder_path
+    folder_path = _folder_path(request)
     full_path = (folder_path / asset_path).resolve()
     assets_root = (folder_path / "assets").resolve()
 
     if not str(full_path).startswith(str(assets_root) + os.sep):
         raise HTTPException(status_code=400, detail="Invalid path")
 
-    if full_path.exists():
-        full_path.unlink()
+    await executors.run_io(full_path.unlink, missing_ok=True)
+    _bump_assets(folder_path)
 
-    note_manager.remove_asset_references(full_path.name)
+    async with note_manager.lock.write():
+        if note_manager.remove_asset_references(full_path.name):
+            save_scheduler.request(note_manager)
+            _publish("notes_changed")
     return {"status": "success"}
 
 ###############################################################################
@@ -2006,6 +2113,16 @@ THEMED_STYLES = """
             display: block;
             padding: 2px 0;
         }}
+        .links-filter {{
+            width: 100%;
+            box-sizing: border-box;
+            font-size: inherit;
+            margin-bottom: 4px;
+        }}
+        .links-box a.links-more {{
+            color: {colors[accent]};
+            font-style: italic;
+        }}
         .links-label {{
             position: absolute;
             top: 0;
@@ -2309,6 +2426,11 @@ THEMED_STYLES = """
             padding-left: 0;
             padding-right: 0;
         }}
+
+        /* Scroll trigger for loading the next page of notes. */
+        .notes-sentinel {{
+            min-height: 1px;
+        }}
         #noteForm {{
             width: 100%;
         }}
@@ -2941,6 +3063,26 @@ THEMED_STYLES = """
         }}
 """
 
+# Injected into the page in workspace mode (see root()).
+WORKSPACE_SHIM = """<script>
+    (function () {
+        var prefix = "{prefix}";
+        function fix(url) {
+            if (typeof url === "string" && (url.indexOf("/api/") === 0 || url.indexOf("/assets/") === 0)) {
+                return prefix + url;
+            }
+            return url;
+        }
+        var nativeFetch = window.fetch.bind(window);
+        window.fetch = function (url, options) { return nativeFetch(fix(url), options); };
+        var NativeEventSource = window.EventSource;
+        if (NativeEventSource) {
+            window.EventSource = function (url, config) { return new NativeEventSource(fix(url), config); };
+            window.EventSource.prototype = NativeEventSource.prototype;
+        }
+    })();
+    </script>"""
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -3298,9 +3440,11 @@ HTML_TEMPLATE = """
                 const resp = await fetch('/api/notes/' + editIndex, { method: 'PUT', body: formData });
                 if (!resp.ok) throw new Error('HTTP ' + resp.status);
                 _autosaveIndicator(true);
-                await updateNotes();
-                const notesContainer = document.getElementById('notesContainer');
-                await typeset(notesContainer);
+                if (!_eventsLive) {
+                    await updateNotes();
+                    const notesContainer = document.getElementById('notesContainer');
+                    await typeset(notesContainer);
+                }
             } catch (e) {
                 console.error('Autosave failed:', e);
             }
@@ -3316,9 +3460,11 @@ HTML_TEMPLATE = """
                 const data = await resp.json();
                 document.getElementById('noteContent').setAttribute('data-edit-index', data.note_index);
                 _autosaveIndicator(true);
-                await updateNotes();
-                const notesContainer = document.getElementById('notesContainer');
-                await typeset(notesContainer);
+                if (!_eventsLive) {
+                    await updateNotes();
+                    const notesContainer = document.getElementById('notesContainer');
+                    await typeset(notesContainer);
+                }
             } catch (e) {
                 console.error('Autosave failed:', e);
             }
@@ -3386,12 +3532,10 @@ HTML_TEMPLATE = """
                 document.getElementById('noteContent').value = '';
                 document.getElementById('noteContent').removeAttribute('data-edit-index');
 
-                await updateNotes();
-                await updateActiveTasks();
-                const notesContainer = document.getElementById('notesContainer');
-                await typeset(notesContainer);
-                if (hasArchiveLink) {
-                    await updateLinks();
+                // With the event stream up, note_added / note_updated (and
+                // archive_added) patch the page; otherwise refetch.
+                if (!_eventsLive || _notesStale) {
+                    await refreshNotesSections(hasArchiveLink);
                 }
             } catch (error) {
                 console.error('Error saving note:', error);
@@ -3429,21 +3573,95 @@ HTML_TEMPLATE = """
             }
         }
 
+        // ---- Notes pagination ----------------------------------------------
+        // /api/notes is fetched a page at a time. A sentinel under the list
+        // pulls the next page as it nears the viewport, so first paint costs
+        // the same no matter how large notes.md grows.
+        const NOTES_PAGE_SIZE = 25;
+        let _notesNextOffset = 0;   // null once every note is on the page
+        let _notesLoading = null;
+        let _notesObserver = null;
+
+        function bindNoteCheckboxes(root) {
+            root.querySelectorAll('input[type="checkbox"][data-checkbox-index]').forEach(checkbox => {
+                checkbox.addEventListener('change', handleCheckboxChange);
+            });
+        }
+
+        async function fetchNotesPage(offset, limit) {
+            const resp = await fetch('/api/notes?offset=' + offset + '&limit=' + limit);
+            if (!resp.ok) throw new Error('HTTP ' + resp.status);
+            return resp.json();
+        }
+
         async function updateNotes() {
+            // Refresh from the top, but keep at least as many notes as are
+            // already showing so a refresh doesn't yank the scroll position.
+            const container = document.getElementById('notesContainer');
+            const shown = container.querySelectorAll('.notes-item').length;
             try {
-                const response = await fetch('/api/notes');
-                const notesHtml = await response.text();
-                document.getElementById('notesContainer').innerHTML = notesHtml;
-                
-                // Add event listeners to checkboxes
-                document.querySelectorAll('input[type="checkbox"][data-checkbox-index]').forEach(checkbox => {
-                    checkbox.addEventListener('change', handleCheckboxChange);
-                });
+                const page = await fetchNotesPage(0, Math.max(NOTES_PAGE_SIZE, shown));
+                container.innerHTML = page.html;
+                bindNoteCheckboxes(container);
+                _notesNextOffset = page.next_offset;
+                observeNotesSentinel();
             } catch (error) {
                 console.error('Error updating notes:', error);
             }
         }
 
+        function loadMoreNotes() {
+            if (_notesNextOffset === null) return Promise.resolve();
+            if (_notesLoading) return _notesLoading;
+            _notesLoading = (async () => {
+                try {
+                    const page = await fetchNotesPage(_notesNextOffset, NOTES_PAGE_SIZE);
+                    const holder = document.createElement('div');
+                    holder.innerHTML = page.html;
+                    const added = Array.from(holder.children);
+                    const container = document.getElementById('notesContainer');
+                    added.forEach(el => container.appendChild(el));
+                    added.forEach(el => bindNoteCheckboxes(el));
+                    _notesNextOffset = page.next_offset;
+                    for (const el of added) await typeset(el);
+                } catch (error) {
+                    console.error('Error loading more notes:', error);
+                } finally {
+                    _notesLoading = null;
+                }
+                observeNotesSentinel();
+            })();
+            return _notesLoading;
+        }
+
+        // Load pages until note-<noteIndex> exists (search hits, deep links).
+        async function ensureNoteLoaded(noteIndex) {
+            let note = document.getElementById('note-' + noteIndex);
+            while (!note && _notesNextOffset !== null) {
+                await loadMoreNotes();
+                note = document.getElementById('note-' + noteIndex);
+            }
+            return note;
+        }
+
+        function observeNotesSentinel() {
+            const sentinel = document.getElementById('notesSentinel');
+            if (!sentinel || _notesNextOffset === null) return;
+            if (!('IntersectionObserver' in window)) {
+                loadMoreNotes();
+                return;
+            }
+            if (!_notesObserver) {
+                _notesObserver = new IntersectionObserver((entries) => {
+                    if (entries.some(e => e.isIntersecting)) loadMoreNotes();
+                }, {rootMargin: '800px 0px'});
+            }
+            // Re-observing delivers a fresh entry, so a sentinel that is
+            // still on screen after a short page keeps pulling more.
+            _notesObserver.unobserve(sentinel);
+            _notesObserver.observe(sentinel);
+        }
+
         async function deleteNote(noteIndex) {
             if (!confirm('Are you sure you want to delete this note?')) {
                 return;
@@ -3458,11 +3676,7 @@ HTML_TEMPLATE = """
                 if (!response.ok) {
                     throw new Error('Failed to delete note');
                 }
-                await updateNotes();
-                await updateLinks();
-                await updateActiveTasks();
-                const notesContainer = document.getElementById('notesContainer');
-                await typeset(notesContainer);
+                if (!_eventsLive) await refreshNotesSections(true);
             } catch (error) {
                 console.error('Error deleting note:', error);
                 alert('Failed to delete note');
@@ -3478,9 +3692,7 @@ HTML_TEMPLATE = """
                     body: JSON.stringify({ imagePath })
                 });
                 if (!response.ok) throw new Error('Failed to delete image');
-                await updateNotes();
-                const notesContainer = document.getElementById('notesContainer');
-                await typeset(notesContainer);
+                if (!_eventsLive) await refreshNotesSections(false);
             } catch (error) {
                 console.error('Error deleting image:', error);
                 alert('Failed to delete image');
@@ -3668,8 +3880,11 @@ HTML_TEMPLATE = """
 
         let _archiveSslVerify = """ + ("true" if ARCHIVE_SSL_VERIFY else "false") + """;
 
+        let _archiveFormat = '""" + ARCHIVE_FORMAT + """';
+
         async function saveArchiveSslVerify() {
             const enabled = document.getElementById('archiveSslVerifyToggle').checked;
+            const format = document.getElementById('archiveBlobsToggle').checked ? 'blobs' : 'single';
             try {
                 const resp = await fetch('/api/archive-ssl-verify', {
                     method: 'POST',
@@ -3678,6 +3893,13 @@ HTML_TEMPLATE = """
                 });
                 if (!resp.ok) throw new Error('HTTP ' + resp.status);
                 _archiveSslVerify = enabled;
+                const formatResp = await fetch('/api/archive-format', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({format})
+                });
+                if (!formatResp.ok) throw new Error('HTTP ' + formatResp.status);
+                _archiveFormat = format;
             } catch (e) {
                 console.error('Error saving archive SSL setting:', e);
                 alert('Failed to save archiving settings');
@@ -3687,6 +3909,8 @@ HTML_TEMPLATE = """
         function _initArchiveSslAdmin() {
             const toggle = document.getElementById('archiveSslVerifyToggle');
             if (toggle) toggle.checked = _archiveSslVerify;
+            const blobs = document.getElementById('archiveBlobsToggle');
+            if (blobs) blobs.checked = _archiveFormat === 'blobs';
         }
 
         async function shutdownServer() {
@@ -3759,8 +3983,10 @@ HTML_TEMPLATE = """
                 });
                 const result = await response.json();
                 if (result.status === 'success') {
-                    await updateLinks();
-                    await updateNotes();
+                    if (!_eventsLive) {
+                        await updateLinks();
+                        await updateNotes();
+                    }
                 } else {
                     alert('Failed to delete archive: ' + result.message);
                 }
@@ -3770,17 +3996,59 @@ HTML_TEMPLATE = """
             }
         }
 
-        // Add updateLinks function
+        // The links pane pages through /api/links; the filter box narrows
+        // it by domain, title, URL, description or keywords.
+        const LINKS_PAGE_SIZE = 100;
+        let _linksNextOffset = null;
+        let _linksFilterTimer = null;
+
+        function _linksUrl(offset) {
+            const params = new URLSearchParams({ offset: String(offset), limit: String(LINKS_PAGE_SIZE) });
+            const filter = document.getElementById('linksFilter');
+            const q = filter ? filter.value.trim() : '';
+            if (q) params.set('q', q);
+            return '/api/links?' + params.toString();
+        }
+
+        function _showLinksMore(result) {
+            _linksNextOffset = result.next_offset;
+            const more = document.getElementById('linksMore');
+            if (_linksNextOffset === null || _linksNextOffset === undefined) {
+                more.style.display = 'none';
+            } else {
+                more.textContent = 'more (' + (result.total - _linksNextOffset) + ')';
+                more.style.display = 'block';
+            }
+        }
+
         async function updateLinks() {
             try {
-                const response = await fetch('/api/links');
+                const response = await fetch(_linksUrl(0));
                 const result = await response.json();
                 document.getElementById('linksSection').innerHTML = result.html;
+                _showLinksMore(result);
             } catch (error) {
                 console.error('Error updating links:', error);
             }
         }
 
+        async function loadMoreLinks() {
+            if (_linksNextOffset === null || _linksNextOffset === undefined) return;
+            try {
+                const response = await fetch(_linksUrl(_linksNextOffset));
+                const result = await response.json();
+                document.getElementById('linksSection').insertAdjacentHTML('beforeend', result.html);
+                _showLinksMore(result);
+            } catch (error) {
+                console.error('Error loading more links:', error);
+            }
+        }
+
+        function filterLinks() {
+            clearTimeout(_linksFilterTimer);
+            _linksFilterTimer = setTimeout(updateLinks, 200);
+        }
+
         // Collapse / expand a single note. Click anywhere on a collapsed
         // note to re-expand it without using the menu.
         function toggleNote(noteIndex) {
@@ -3882,9 +4150,9 @@ HTML_TEMPLATE = """
                             '</div>'
                         )).join('');
                         resultsBox.querySelectorAll('.hit').forEach((row) => {
-                            row.addEventListener('click', () => {
+                            row.addEventListener('click', async () => {
                                 const idx = row.getAttribute('data-index');
-                                const note = document.getElementById('note-' + idx);
+                                const note = await ensureNoteLoaded(idx);
                                 if (note) {
                                     note.classList.remove('collapsed');
                                     note.scrollIntoView({behavior: 'smooth', block: 'start'});
@@ -3909,10 +4177,19 @@ HTML_TEMPLATE = """
             return (ta.value || '').trim().length > 0;
         }
 
+        async function refreshIfStale() {
+            // An external edit was held back while the editor was dirty;
+            // apply it as soon as the editor is clean again (saved, or its
+            // text cleared), rather than waiting for the next save.
+            if (_notesStale && !editorIsDirty()) await refreshNotesSections(false);
+        }
+
         async function pollNotesChanged() {
             // Pick up external edits to notes.md without a full page reload.
             // Skip while the user is mid-edit so we don't blow away drafts.
-            if (editorIsDirty() || document.hidden) return;
+            // Only polls while the /api/events stream is down.
+            if (_notesStale) return refreshIfStale();
+            if (_eventsLive || editorIsDirty() || document.hidden) return;
             try {
                 const resp = await fetch('/api/notes/status');
                 if (!resp.ok) return;
@@ -3930,6 +4207,133 @@ HTML_TEMPLATE = """
             }
         }
 
+        // ---- Live updates ---------------------------------------------------
+        // /api/events streams one small event per change, so every open tab
+        // patches its DOM in place instead of refetching whole sections.
+        // Note events carry just that note's rendered HTML. While the stream
+        // is down, pollNotesChanged() takes over.
+        let _eventsLive = false;
+        let _notesStale = false;   // external edit arrived while the editor was dirty
+        let _eventChain = Promise.resolve();
+
+        async function refreshNotesSections(includeLinks) {
+            _notesStale = false;
+            await updateNotes();
+            await updateActiveTasks();
+            if (includeLinks) await updateLinks();
+            const notesContainer = document.getElementById('notesContainer');
+            await typeset(notesContainer);
+        }
+
+        function renumberTaskCheckboxes(from, delta) {
+            if (!delta) return;
+            document.querySelectorAll(
+                '#notesContainer input[type="checkbox"][data-checkbox-index]'
+            ).forEach((el) => {
+                const idx = parseInt(el.getAttribute('data-checkbox-index'), 10);
+                if (idx < from) return;
+                const next = idx + delta;
+                el.setAttribute('data-checkbox-index', next);
+                el.id = 'task_' + next;
+                el.name = 'task_' + next;
+            });
+        }
+
+        function renumberNotes() {
+            // Loaded notes are always the prefix [0, n), so DOM position is
+            // the note index. Rewrite what _render_note_html() bakes in.
+            document.querySelectorAll('#notesContainer > .section-container').forEach((section, i) => {
+                const item = section.querySelector('.notes-item');
+                if (item) item.id = 'note-' + i;
+                section.querySelectorAll('.post-header [onclick], .section-label-menu [onclick]').forEach((el) => {
+                    el.setAttribute('onclick', el.getAttribute('onclick').replace(/\\(\\d+\\)/, '(' + i + ')'));
+                });
+            });
+        }
+
+        function noteSectionFromHtml(html) {
+            const holder = document.createElement('div');
+            holder.innerHTML = html;
+            const section = holder.querySelector('.section-container');
+            bindNoteCheckboxes(section);
+            return section;
+        }
+
+        async function applyNoteEvent(type, data) {
+            if (data.resync) {
+                await refreshNotesSections(false);
+                return;
+            }
+            if (_notesLoading) await _notesLoading;
+            const container = document.getElementById('notesContainer');
+            const sections = container.querySelectorAll(':scope > .section-container');
+            const loaded = sections.length;
+            let patched = null;
+            renumberTaskCheckboxes(data.task_from, data.task_delta);
+            if (type === 'note_added') {
+                patched = noteSectionFromHtml(data.html);
+                container.insertBefore(patched, container.firstChild);
+                if (_notesNextOffset !== null) _notesNextOffset += 1;
+            } else if (type === 'note_deleted') {
+                if (data.note_index < loaded) {
+                    sections[data.note_index].remove();
+                    if (_notesNextOffset !== null) _notesNextOffset -= 1;
+                }
+            } else if (data.note_index < loaded) {
+                const old = sections[data.note_index];
+                patched = noteSectionFromHtml(data.html);
+                if (old.querySelector('.notes-item.collapsed')) {
+                    patched.querySelector('.notes-item').classList.add('collapsed');
+                }
+                old.replaceWith(patched);
+            }
+            renumberNotes();
+            if (Array.isArray(data.active_tasks)) renderActiveTasksList(data.active_tasks);
+            if (patched) await typeset(patched);
+        }
+
+        async function applyNotesChanged() {
+            // notes.md changed underneath us (external editor, CLI append).
+            if (editorIsDirty()) {
+                _notesStale = true;
+                return;
+            }
+            await refreshNotesSections(false);
+        }
+
+        function connectEvents() {
+            if (!('EventSource' in window)) return;
+            const source = new EventSource('/api/events');
+            // EventSource reconnects on its own and resends Last-Event-ID,
+            // so the server replays anything missed while we were offline.
+            source.onopen = () => { _eventsLive = true; };
+            source.onerror = () => { _eventsLive = false; };
+            const on = (type, handler) => source.addEventListener(type, (e) => {
+                const data = JSON.parse(e.data || '{}');
+                // Apply strictly in arrival order; handlers await typesetting.
+                _eventChain = _eventChain
+                    .then(() => handler(data))
+                    .catch((err) => console.error('Live update failed:', type, err));
+            });
+            ['note_added', 'note_updated', 'note_deleted'].forEach((type) => {
+                on(type, (data) => applyNoteEvent(type, data));
+            });
+            on('task_toggled', (data) => {
+                syncCheckboxDom(data.task_index, data.checked);
+                renderActiveTasksList(data.active_tasks || []);
+            });
+            on('archive_added', () => updateLinks());
+            on('archive_deleted', () => updateLinks());
+            on('notes_changed', () => applyNotesChanged());
+            on('conflict', (data) => {
+                // notes.md was changed elsewhere before an edit here was
+                // written; the edit went to a copy rather than being lost.
+                alert('notes.md was changed outside this tab before your edit was saved. ' +
+                      'Your version was kept in ' + data.file + ' next to notes.md.');
+            });
+            on('resync', () => refreshNotesSections(true));
+        }
+
         // ---- Font scaling ---------------------------------------------------
         async function loadFontScales() {
             try {
@@ -4141,9 +4545,7 @@ HTML_TEMPLATE = """
                 });
                 if (!resp.ok) throw new Error('Failed to delete file');
                 loadUploadedFiles();
-                await updateNotes();
-                const notesContainer = document.getElementById('notesContainer');
-                await typeset(notesContainer);
+                if (!_eventsLive) await refreshNotesSections(false);
             } catch (e) {
                 alert('Failed to delete file: ' + e.message);
             }
@@ -4493,6 +4895,7 @@ HTML_TEMPLATE = """
             _initAutosaveAdmin();
             _initArchiveSslAdmin();
             document.getElementById('noteContent').addEventListener('input', _autosaveMaybeStart);
+            document.getElementById('noteContent').addEventListener('input', refreshIfStale);
             document.getElementById('noteTitle').addEventListener('input', _autosaveMaybeStart);
 
             const notesContainer = document.getElementById('notesContainer');
@@ -4615,7 +5018,9 @@ HTML_TEMPLATE = """
                 });
             }
 
-            // Poll for external notes.md changes (other editors / CLI append).
+            // Live updates from the server; polling for external notes.md
+            // changes only kicks in while the event stream is down.
+            connectEvents();
             if (_notesPollTimer) clearInterval(_notesPollTimer);
             _notesPollTimer = setInterval(pollNotesChanged, 4000);
 
@@ -4802,6 +5207,7 @@ Markdown basics:
                 </div>
             </div>
             <div id="notesContainer" class="notes-container"></div>
+            <div id="notesSentinel" class="notes-sentinel"></div>
         </div>
         <div class="right-column">
             <!-- Directory Bar -->
@@ -4829,8 +5235,12 @@ Markdown basics:
                     <span>k</span>
                     <span>s</span>
                 </div>
-                <div id="linksSection" class="links-box">
-                    <!-- Links will be dynamically inserted here -->
+                <div class="links-box">
+                    <input id="linksFilter" class="links-filter" type="search" placeholder="filter archives" oninput="filterLinks()">
+                    <div id="linksSection">
+                        <!-- Links will be dynamically inserted here -->
+                    </div>
+                    <a id="linksMore" class="links-more" href="#" style="display:none;" onclick="loadMoreLinks(); return false;">more</a>
                 </div>
             </div>
         </div>
@@ -4995,6 +5405,17 @@ Markdown basics:
                     <input type="checkbox" id="archiveSslVerifyToggle"> Verify SSL certificates
                 </label>
             </div>
+            <p class="pane-help" style="margin-top:0;">
+                Deduplicated archives store each image, font, stylesheet and
+                script once under assets/sites/blobs/ and share them between
+                archives of the same site. Use "export" in the links pane to
+                get a standalone single-file copy.
+            </p>
+            <div style="display:flex;align-items:center;gap:10px;margin-bottom:8px;">
+                <label style="display:flex;align-items:center;gap:6px;font-size:0.8rem;cursor:pointer;">
+                    <input type="checkbox" id="archiveBlobsToggle"> Deduplicate archive resources
+                </label>
+            </div>
             <button class="pane-button" onclick="saveArchiveSslVerify()">Save archiving</button>
 
             <div style="flex:1;"></div>
@@ -5119,6 +5540,14 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Do not auto-open the browser when the server starts.",
     )
+    parser.add_argument(
+        "--workspace",
+        action="store_true",
+        help=(
+            "Also serve every registered folder at /f/<folder_id>/ from this "
+            "process (folder list at /f/)."
+        ),
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -5127,6 +5556,42 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _build_workspace_pool(working_dir: Path, folder_id: int,
+                          file_watcher: "watcher_module.FileWatcher") -> "workspaces.WorkspacePool":
+    """WorkspacePool for --workspace, with the active folder pinned."""
+    def load(fid: int, path: Path) -> NoteManager:
+        create_directories(path)
+        manager = NoteManager(path)
+        manager.attach_watcher(
+            file_watcher,
+            on_change=lambda: event_bus.publish("notes_changed", scope=fid),
+        )
+        manager.on_conflict = lambda name: event_bus.publish(
+            "conflict", {"file": name}, scope=fid)
+        return manager
+
+    def unload(manager: NoteManager) -> None:
+        manager.detach_watcher(file_watcher)
+        if manager.needs_save:
+            manager.save()
+
+    def busy(manager: NoteManager) -> bool:
+        # Dropping a manager a handler still holds, or one with a deferred
+        # save queued, would leave an orphan whose later save races the
+        # reloaded instance.
+        return (manager.needs_save or manager.lock_in_use
+                or save_scheduler.is_pending(manager))
+
+    return workspaces.WorkspacePool(
+        folder_registry,
+        load_manager=load,
+        unload_manager=unload,
+        max_resident=config.get('workspace_max_resident', workspaces.MAX_RESIDENT),
+        pinned=workspaces.Workspace(folder_id, working_dir, note_manager),
+        busy=busy,
+    )
+
+
 def _open_browser_when_ready(url: str, delay: float = 1.0):
     """Open `url` in the default browser shortly after server startup."""
     def _go():
@@ -5157,15 +5622,46 @@ def main():
         create_directories(working_dir)
         mount_assets_directory(app, working_dir)
 
+        try:
+            set_render_cache(render_cache.RenderCache(
+                version=f"{__version__}/{RENDERER_VERSION}"
+            ))
+        except Exception as e:
+            print(f"Render cache disabled: {e}")
+
+        # One watcher thread covers the active notes.md and every
+        # registered folder (inotify on Linux, stat polling elsewhere).
+        file_watcher = watcher_module.FileWatcher()
+        file_watcher.start()
+        print(f"Watching notes.md changes via {file_watcher.backend}")
+
         note_manager = NoteManager(working_dir)
+        note_manager.attach_watcher(
+            file_watcher, on_change=lambda: _publish("notes_changed")
+        )
+        note_manager.on_conflict = lambda name: _publish("conflict", {"file": name})
         app.state.folder_path = working_dir
 
         # Cross-folder registry: auto-register the active folder and start
-        # the background sync ticker. Folders persist across runs in
-        # ~/.config/noteflow/tasks.db.
-        folder_registry = folders_module.FolderRegistry()
-        folder_registry.add_folder(working_dir)
-        folder_registry.start_background_sync()
+        # background sync, re-syncing each folder when its notes.md
+        # changes. Folders persist across runs in ~/.config/noteflow/tasks.db.
+        folder_registry = folders_module.FolderRegistry(
+            sync_workers=config.get('sync_workers', folders_module.SYNC_WORKERS)
+        )
+        app.state.folder_id = folder_registry.add_folder(working_dir)["id"]
+        folder_registry.add_sync_listener(
+            lambda folder_id, task_count: event_bus.publish(
+                "folder_synced", {"folder_id": folder_id, "task_count": task_count}
+            )
+        )
+        folder_registry.start_background_sync(watcher=file_watcher)
+
+        if args.workspace:
+            app.state.workspaces = _build_workspace_pool(
+                working_dir, app.state.folder_id, file_watcher
+            )
+            print(f"Workspace mode: registered folders served under /f/<id>/ "
+                  f"(up to {app.state.workspaces.max_resident} loaded at once)")
 
         port = find_free_port(args.port) if args.port else find_free_port()
         set_app_port(port)
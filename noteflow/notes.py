@@ -0,0 +1,935 @@
+"""Core note model: notes.md on disk, NoteManager, Note and Task.
+
+Deliberately free of the web stack (FastAPI, pydantic, psutil) and of
+markdown-it, so the CLI and other tools can load, edit and save notes.md
+without paying for the server's imports. Markdown rendering is in
+render.py; asyncio and the readers-writer lock are imported only when a
+handler first asks for NoteManager.lock.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from . import folders as folders_module
+from . import render
+from .render import normalize_list_markers
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from . import locks
+    from . import watcher as watcher_module
+
+
+NOTE_SEPARATOR = "\n<!-- note -->\n"
+# Source of NoteManager.generation values. Shared by every manager, so a
+# value never repeats within a process — even across workspace folders.
+_GENERATIONS = itertools.count(1)
+
+
+###############################################################################
+# Core Classes
+###############################################################################
+def _block_fingerprint(raw_note: str) -> str:
+    """Content hash identifying one note block of notes.md across reloads."""
+    return hashlib.blake2b(raw_note.encode('utf-8'), digest_size=16).hexdigest()
+
+def _stat_key(path: Path) -> Optional[tuple]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+def _journal_path(notes_path: Path) -> Path:
+    return notes_path.with_suffix(notes_path.suffix + ".journal")
+
+def _fsync_dir(directory: Path) -> None:
+    """Make a new directory entry durable (best-effort; no-op on Windows)."""
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _write_patches(path: Path, patches: List[tuple]) -> None:
+    """Overwrite (byte_offset, data, ...) ranges of `path` in place and fsync."""
+    with open(path, 'r+b') as f:
+        for offset, data, *_ in patches:
+            f.seek(offset)
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _write_journal(notes_path: Path, expected_size: int, patches: List[tuple]) -> Path:
+    """Durably record (byte_offset, new_data, old_data) patches before they
+    touch notes.md (redo log). The file's size and inode let replay tell
+    whether notes.md was rewritten or replaced since."""
+    record = json.dumps(
+        {"size": expected_size,
+         "inode": notes_path.stat().st_ino,
+         "patches": [[offset, data.hex(), old.hex()] for offset, data, old in patches]},
+        separators=(',', ':'),
+    )
+    digest = hashlib.sha256(record.encode('utf-8')).hexdigest()
+    journal = _journal_path(notes_path)
+    with open(journal, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(f"{record}\n{digest}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    _fsync_dir(journal.parent)
+    return journal
+
+def _unexpected_ranges(path: Path, patches: List[tuple]) -> int:
+    """Count patched ranges of `path` holding bytes that are neither the
+    old nor the new ones at that position. A write torn mid-range mixes
+    the two byte by byte, which is expected."""
+    count = 0
+    with open(path, 'rb') as f:
+        for offset, data, old in patches:
+            f.seek(offset)
+            current = f.read(len(data))
+            if len(current) != len(data) or any(
+                    c != n and c != o for c, n, o in zip(current, data, old)):
+                count += 1
+    return count
+
+def _replay_journal(notes_path: Path) -> bool:
+    """Finish an in-place patch interrupted by a crash. Returns True if replayed.
+
+    A journal whose checksum doesn't match was torn while being written —
+    notes.md was not touched yet, so it is simply discarded. Patches are
+    absolute byte ranges, so replaying an already-applied journal is
+    harmless, and replaying a range the crash left half written is the
+    point. Only if notes.md changed size or was replaced (another inode)
+    since the journal was written is it discarded, rather than patched
+    into someone else's text.
+    """
+    journal = _journal_path(notes_path)
+    if not journal.exists():
+        return False
+    replayed = False
+    try:
+        lines = journal.read_text(encoding='utf-8').split("\n")
+        record, digest = (lines + ["", ""])[:2]
+        if hashlib.sha256(record.encode('utf-8')).hexdigest() == digest:
+            entry = json.loads(record)
+            patches = [(offset, bytes.fromhex(data), bytes.fromhex(old))
+                       for offset, data, old in entry["patches"]]
+            st = notes_path.stat() if notes_path.exists() else None
+            if (st is not None and st.st_size == entry["size"]
+                    and entry.get("inode", st.st_ino) == st.st_ino):
+                unexpected = _unexpected_ranges(notes_path, patches)
+                if unexpected:
+                    print(f"notes.md journal: {unexpected} range(s) held unexpected bytes")
+                _write_patches(notes_path, patches)
+                replayed = True
+                print("Replayed interrupted notes.md patch from journal")
+            else:
+                print("Discarding notes.md journal: notes.md changed since it was written")
+        journal.unlink()
+    except OSError as e:
+        print(f"Could not replay notes.md journal: {e}")
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Discarding malformed notes.md journal: {e}")
+        journal.unlink(missing_ok=True)
+    return replayed
+
+class NoteManager:
+    """Central manager for notes collection.
+    
+    Attributes:
+        notes (List[Note]): All notes
+        checkbox_index (int): Counter for task IDs
+        file_path (Path): Notes storage location
+        needs_save (bool): Unsaved changes flag
+        base_path (Path): Base directory for all file operations
+        generation (int): Changes whenever the notes do (edit or reload);
+            read APIs use it as their ETag
+        on_conflict (Callable[[str], None]): Called with the conflict
+            copy's file name when save() finds notes.md changed on disk
+    """
+    def __init__(self, base_path: Path):
+        self.notes: List[Note] = []
+        self.checkbox_index: int = 0
+        self.file_path: Optional[Path] = None
+        self.needs_save: bool = False
+        self.generation: int = next(_GENERATIONS)
+        self.base_path = base_path
+        self.on_conflict: Optional[Callable[[str], None]] = None
+        self._file_mtime: Optional[float] = None
+        # Set by attach_watcher(). While watched, disk_changed() only stats
+        # notes.md after the watcher has reported an event for it.
+        self._watched: bool = False
+        self._disk_event: bool = True
+        self._on_change = None
+        # task index → (Note, Task), filled in as tasks are numbered, so a
+        # checkbox toggle goes straight to its note and offset.
+        self._task_map: Dict[int, tuple] = {}
+        # Byte layout of notes.md as last written/read — one
+        # [note, title, timestamp, content, content_offset] entry per note —
+        # valid only while the file is byte-identical to render_notes().
+        # save() diffs against it to patch same-length edits in place.
+        self._disk_layout: Optional[List[list]] = None
+        self._disk_stat: Optional[tuple] = None
+        self._rw_lock: Optional[locks.AsyncRWLock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        # save() runs in the io pool under the *read* lock; this keeps two
+        # saves (scheduler timer vs. /api/flush) from racing on the temp file.
+        self._save_lock = threading.Lock()
+        self._load_notes()
+
+    @property
+    def lock(self) -> locks.AsyncRWLock:
+        """Readers-writer lock over this manager's notes (see locks.py).
+
+        Handlers that only read notes hold lock.read() — concurrently with
+        each other, including while rendering in the cpu pool. Mutations,
+        reloads from disk and anything that reindexes hold lock.write().
+        Saves only read, so they run under the read side. One lock per
+        event loop — tests run several loops.
+        """
+        import asyncio
+        from . import locks
+
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._rw_lock = locks.AsyncRWLock()
+            self._lock_loop = loop
+        return self._rw_lock
+
+    @property
+    def lock_in_use(self) -> bool:
+        """True while a handler holds or waits on `lock` (safe from any thread)."""
+        return self._rw_lock is not None and self._rw_lock.in_use
+
+    def _load_notes(self):
+        """Initialize and load notes from file"""
+        self.file_path = self.base_path / "notes.md"
+        if not self.file_path.exists():
+            self.file_path.write_text("")
+            self._file_mtime = self.file_path.stat().st_mtime
+            self.notes = []
+            self.checkbox_index = 0
+            self._task_map = {}
+            self.generation = next(_GENERATIONS)
+            self._snapshot_layout()
+            self.needs_save = False
+            return
+
+        _replay_journal(self.file_path)
+        utf8 = True
+        try:
+            # First try UTF-8
+            content = self.file_path.read_text(encoding='utf-8')
+        except UnicodeDecodeError:
+            utf8 = False
+            try:
+                # If UTF-8 fails, try Windows-1252 (cp1252)
+                content = self.file_path.read_text(encoding='cp1252')
+            except UnicodeDecodeError:
+                # If both fail, use UTF-8 with error handling
+                content = self.file_path.read_text(encoding='utf-8', errors='replace')
+
+        # Normalize CRLF to LF — external editors on Windows save with \r\n
+        # and stray \r chars corrupt header regex matches downstream.
+        had_cr = '\r' in content
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        self._parse_notes(content)
+        try:
+            self._file_mtime = self.file_path.stat().st_mtime
+        except OSError:
+            self._file_mtime = None
+        # In-place patching needs each note's content to sit verbatim in the
+        # file; CRLF or cp1252 files (offsets don't survive decoding) get one
+        # full rewrite first.
+        if utf8 and not had_cr:
+            self._layout_from_text(content)
+        else:
+            self._disk_layout = None
+        self.needs_save = False
+
+    def _parse_notes(self, content: str):
+        """Parse raw content into Note objects.
+
+        Incremental: each block is fingerprinted by content hash, and a block
+        whose fingerprint matches a note from the previous parse reuses that
+        Note (and its HTML cache) — only its task indexes are renumbered. A
+        one-line external edit therefore re-parses and re-renders one note,
+        not the whole file.
+        """
+        reusable = self._reusable_notes()
+        self.notes = []
+        self.checkbox_index = 0
+        self._task_map = {}
+        self.generation = next(_GENERATIONS)
+
+        # Split content by note separator and parse each note
+        raw_notes = [n.strip() for n in content.split(NOTE_SEPARATOR) if n.strip()]
+        for raw_note in raw_notes:
+            # Remove excessive newlines
+            raw_note = re.sub(r'\n{3,}', '\n', raw_note)
+            if not raw_note.startswith("## "):
+                continue
+            fingerprint = _block_fingerprint(raw_note)
+            candidates = reusable.get(fingerprint)
+            if candidates:
+                note = candidates.pop()
+                note._renumber_tasks()
+            else:
+                note = Note.from_text(raw_note, self)
+                note._source = (fingerprint, note.title, note.content, note.timestamp)
+            self.notes.append(note)
+
+    def _reusable_notes(self) -> Dict[str, List["Note"]]:
+        """Fingerprint → notes from the last parse that are still unmodified.
+
+        A note only qualifies while its title/content/timestamp are the
+        exact values it was parsed with; anything edited in memory since
+        (update, task toggle, asset cleanup) is re-parsed instead. Lists are
+        reversed so duplicate blocks are reused in their original order.
+        """
+        reusable: Dict[str, List[Note]] = {}
+        for note in self.notes:
+            source = note._source
+            if source is None:
+                continue
+            fingerprint, title, content, timestamp = source
+            if (note.content == content and note.title == title
+                    and note.timestamp == timestamp):
+                reusable.setdefault(fingerprint, []).append(note)
+        for candidates in reusable.values():
+            candidates.reverse()
+        return reusable
+
+    def mark_changed(self) -> None:
+        """Record an in-memory edit: schedule a save and bump the generation."""
+        self.needs_save = True
+        self.generation = next(_GENERATIONS)
+
+    def reindex_tasks(self):
+        """Rebuild contiguous task indexes after structural edits.
+
+        Task IDs are session-local counters used by checkboxes. Without a
+        full reindex, Note.update() would keep allocating new IDs forever.
+        """
+        self.checkbox_index = 0
+        self._task_map = {}
+        for note in self.notes:
+            note.tasks = []
+            note._parse_tasks()
+
+    def attach_watcher(self, watcher: "watcher_module.FileWatcher",
+                       on_change=None) -> None:
+        """Drive disk_changed() from file-watch events instead of stat().
+
+        `on_change()` is called (on the watcher thread) when an event turns
+        out to be an external edit rather than one of our own saves.
+        """
+        self._on_change = on_change
+        watcher.watch(self.base_path / "notes.md", self._on_disk_event)
+        self._watched = True
+
+    def detach_watcher(self, watcher: "watcher_module.FileWatcher") -> None:
+        """Undo attach_watcher(); disk_changed() goes back to stat()ing."""
+        watcher.unwatch(self.base_path / "notes.md", self._on_disk_event)
+        self._watched = False
+        self._disk_event = True
+        self._on_change = None
+
+    def _on_disk_event(self, path: Path) -> None:
+        self._disk_event = True
+        if self._on_change is not None and self.disk_changed():
+            self._on_change()
+
+    def _disk_newer(self) -> bool:
+        """stat() notes.md: True if it is newer than our last load/save."""
+        try:
+            mtime = self.file_path.stat().st_mtime
+        except (AttributeError, OSError):
+            return False
+        if self._file_mtime is None:
+            return True
+        # Float mtimes can jitter slightly; 1ms slack avoids false positives.
+        return mtime > (self._file_mtime + 0.001)
+
+    def disk_changed(self) -> bool:
+        """True if notes.md on disk is newer than our last load/save."""
+        if self._watched:
+            if not self._disk_event:
+                return False
+            # Cleared before the stat, so an event arriving during it re-arms
+            # the flag instead of being lost. If the event was our own save
+            # (or a no-op touch) we stop stat()ing until the next one.
+            self._disk_event = False
+        if not self.file_path or not self.file_path.exists():
+            return False
+        changed = self._disk_newer()
+        if changed and self._watched:
+            self._disk_event = True  # keep reporting it until reloaded
+        return changed
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """Reload notes.md when an external editor changed it.
+
+        Skips reload while we have unsaved in-memory edits (unless force)
+        so autosave/typing aren't clobbered by a concurrent write race.
+        Returns True if notes were reloaded.
+        """
+        if self.needs_save and not force:
+            return False
+        if not force and not self.disk_changed():
+            return False
+        self._load_notes()
+        return True
+
+    def save(self):
+        """Atomically save notes to disk if modified.
+
+        Edits that keep every note's byte length (task toggles, same-length
+        corrections) are patched into notes.md in place behind a journal —
+        see _patch_in_place(). Everything else writes a sibling temp file
+        then os.replace() so a crash mid-write cannot leave a truncated
+        notes.md. Safe to call from a worker thread; concurrent saves are
+        serialized.
+
+        If notes.md was written by someone else since our last load/save
+        (another tab's global-task toggle, `noteflow append`, an editor),
+        it is not overwritten: the in-memory notes go to a
+        notes.md.conflict-<time> copy instead, on_conflict is told its
+        name, and the next reload_if_changed() picks up the file on disk.
+        """
+        with self._save_lock:
+            if not self.needs_save:
+                return
+            if self._disk_newer():
+                conflict = self._save_conflict_copy()
+                self.needs_save = False
+                if self.on_conflict is not None:
+                    self.on_conflict(conflict)
+                return
+            if self._patch_in_place():
+                self.needs_save = False
+                return
+            content = self.render_notes()
+            path = self.file_path
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            try:
+                with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+                try:
+                    self._file_mtime = path.stat().st_mtime
+                except OSError:
+                    self._file_mtime = time.time()
+                try:
+                    _journal_path(path).unlink()  # superseded by the full rewrite
+                except OSError:
+                    pass
+                self._snapshot_layout()
+                self.needs_save = False
+            except Exception:
+                try:
+                    if tmp_path.exists():
+                        tmp_path.unlink()
+                except OSError:
+                    pass
+                raise
+
+    def _save_conflict_copy(self) -> str:
+        path = self.file_path.with_name(
+            f"{self.file_path.name}.conflict-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        path.write_text(self.render_notes(), encoding='utf-8', newline='\n')
+        print(f"notes.md changed on disk since it was loaded; unsaved edits written to {path.name}")
+        return path.name
+
+    def _snapshot_layout(self) -> None:
+        """Record each note's content offset (in bytes) in the file just written."""
+        sep_len = len(NOTE_SEPARATOR.encode('utf-8'))
+        layout = []
+        pos = 0
+        for note in self.notes:
+            start = pos + len(note.render_header().encode('utf-8'))
+            layout.append([note, note.title, note.timestamp, note.content, start])
+            pos = start + len(note.content.encode('utf-8')) + 1 + sep_len
+        self._disk_layout = layout
+        self._disk_stat = _stat_key(self.file_path)
+
+    def _layout_from_text(self, content: str) -> None:
+        """Locate each parsed note's content in the notes.md text it came from.
+
+        Mirrors _parse_notes()' block walk. A note whose content isn't found
+        verbatim (e.g. its blank-line runs were collapsed) leaves the layout
+        unset, so the next save is a full rewrite.
+        """
+        self._disk_layout = None
+        sep_len = len(NOTE_SEPARATOR.encode('utf-8'))
+        notes = iter(self.notes)
+        layout = []
+        pos = 0
+        for block in content.split(NOTE_SEPARATOR):
+            if block.strip().startswith("## "):
+                note = next(notes, None)
+                if note is None:
+                    return
+                header_end = block.find("\n")
+                at = block.find(note.content, header_end) if header_end >= 0 else -1
+                if at < 0:
+                    return
+                start = pos + len(block[:at].encode('utf-8'))
+                layout.append([note, note.title, note.timestamp, note.content, start])
+            pos += len(block.encode('utf-8')) + sep_len
+        if next(notes, None) is not None:
+            return
+        self._disk_layout = layout
+        self._disk_stat = _stat_key(self.file_path)
+
+    def _patch_in_place(self) -> bool:
+        """Write same-length edits straight into notes.md.
+
+        Returns False — caller falls back to the full atomic rewrite — when
+        notes were added, removed, reordered or retitled, a note's content
+        changed byte length, or notes.md changed on disk since we last wrote
+        it. Otherwise only the changed byte ranges are written: first to
+        notes.md.journal (fsynced), then into notes.md (fsynced), then the
+        journal is removed. A crash at any point leaves either the old file
+        plus a journal that _load_notes() replays, or the new file.
+        """
+        layout = self._disk_layout
+        if layout is None or len(layout) != len(self.notes):
+            return False
+        if self._disk_stat is None or _stat_key(self.file_path) != self._disk_stat:
+            return False
+        patches = []
+        changed = []
+        for entry, note in zip(layout, self.notes):
+            old_note, title, timestamp, old_content, start = entry
+            if note is not old_note or note.title != title or note.timestamp != timestamp:
+                return False
+            if note.content is old_content or note.content == old_content:
+                continue
+            old_bytes = old_content.encode('utf-8')
+            new_bytes = note.content.encode('utf-8')
+            if len(old_bytes) != len(new_bytes):
+                return False
+            lo = 0
+            while old_bytes[lo] == new_bytes[lo]:
+                lo += 1
+            hi = len(new_bytes)
+            while old_bytes[hi - 1] == new_bytes[hi - 1]:
+                hi -= 1
+            patches.append((start + lo, new_bytes[lo:hi], old_bytes[lo:hi]))
+            changed.append((entry, note.content))
+        if patches:
+            journal = _write_journal(self.file_path, self._disk_stat[0], patches)
+            _write_patches(self.file_path, patches)
+            journal.unlink()
+        for entry, content in changed:
+            entry[3] = content
+        self._disk_stat = _stat_key(self.file_path)
+        try:
+            self._file_mtime = self.file_path.stat().st_mtime
+        except OSError:
+            self._file_mtime = time.time()
+        return True
+
+    def render_notes(self) -> str:
+        """Render all notes with proper indexing"""
+        rendered = []
+        for note in self.notes:
+            rendered.append(note.render())
+        return NOTE_SEPARATOR.join(rendered)
+
+    def build_task_lookup(self) -> Dict[str, int]:
+        """Map normalized task line text → task index (first match wins)."""
+        lookup: Dict[str, int] = {}
+        for note in self.notes:
+            for task in note.tasks:
+                key = normalize_list_markers(task.text.strip())
+                if key not in lookup:
+                    lookup[key] = task.index
+        return lookup
+
+    def task_base(self, note_index: int) -> int:
+        """Index of the first task belonging to notes[note_index]."""
+        return sum(len(note.tasks) for note in self.notes[:note_index])
+
+    def get_active_tasks(self) -> List[Dict]:
+        """Return all unchecked tasks, priority-flagged first.
+
+        Tasks carrying a !p1/!p2/!p3 marker sort ahead of unflagged tasks,
+        in ascending priority order (p1 highest). The sort is stable, so
+        within a tier tasks keep their original note order. Reads the
+        in-memory notes; callers reload from disk first if they need to.
+        """
+        tasks = []
+        for note in self.notes:
+            tasks.extend(note.get_unchecked_tasks())
+
+        def priority_rank(task: Dict) -> int:
+            match = re.search(r'(?:^|\s)!p([1-3])\b', task['text'], re.IGNORECASE)
+            return int(match.group(1)) if match else 4
+
+        return sorted(tasks, key=priority_rank)
+
+    def remove_asset_references(self, filename: str) -> bool:
+        """Remove all markdown image/link references to a given asset filename.
+
+        Returns True if any note changed; the caller persists the change.
+        """
+        pattern = re.compile(
+            r'!\[[^\]]*\]\(<[^>]*/' + re.escape(filename) + r'>\)\n?'
+            r'|!\[[^\]]*\]\([^)]*/' + re.escape(filename) + r'\)\n?'
+        )
+        changed = False
+        for note in self.notes:
+            new_content = pattern.sub('', note.content)
+            if new_content != note.content:
+                note.content = new_content
+                note._html_cache = None
+                changed = True
+        if changed:
+            self.reindex_tasks()
+            self.mark_changed()
+        return changed
+
+    def replace_text(self, old: str, new: str) -> List[int]:
+        """Replace every occurrence of `old` in note bodies with `new`.
+
+        Used to swap archive-job placeholders for their result. Returns the
+        indexes of the notes that changed; the caller persists the change.
+        """
+        changed_indexes = []
+        for note_index, note in enumerate(self.notes):
+            if old in note.content:
+                note.content = note.content.replace(old, new)
+                note._html_cache = None
+                changed_indexes.append(note_index)
+        if changed_indexes:
+            self.reindex_tasks()
+            self.mark_changed()
+        return changed_indexes
+
+    def strike_references(self, filename: str) -> List[int]:
+        """Strike through every note line mentioning `filename`.
+
+        Used when an archived page is deleted. Returns the indexes of the
+        notes that changed; the caller persists the change.
+        """
+        changed_indexes = []
+        for note_index, note in enumerate(self.notes):
+            lines = note.content.split('\n')
+            new_lines = []
+            note_changed = False  # Track if this note changed
+
+            for line in lines:
+                if filename in line:
+                    print(f"Found matching line: {line}")  # Debug log
+                    # Replace the line
+                    replaced_line = f"~~{line}~~ _(archived link deleted)_"
+                    # Only set changed if the replaced line differs
+                    if replaced_line != line:
+                        note_changed = True
+                    new_lines.append(replaced_line)
+                else:
+                    new_lines.append(line)
+
+            if note_changed:
+                print("Updating note content")  # Debug log
+                note.content = '\n'.join(new_lines)
+                note._html_cache = None
+                changed_indexes.append(note_index)
+        if changed_indexes:
+            self.reindex_tasks()
+            self.mark_changed()
+        return changed_indexes
+
+    def delete_note(self, note_index: int) -> Optional[tuple]:
+        """Remove notes[note_index] and renumber tasks.
+
+        Returns (task_end, removed): the task index just past the deleted
+        note's tasks before removal and how many tasks it held — what
+        clients need to shift later checkboxes. None if out of range.
+        """
+        if not 0 <= note_index < len(self.notes):
+            return None
+        removed = len(self.notes[note_index].tasks)
+        task_end = self.task_base(note_index) + removed
+        self.notes.pop(note_index)
+        self.reindex_tasks()
+        self.mark_changed()
+        return task_end, removed
+
+    def add_note(self, title: str, content: str):
+        """Add a new note"""
+        note = Note(
+            title=title,
+            content=content,
+            timestamp=datetime.now(),
+            manager=self
+        )
+        self.notes.insert(0, note)  # Add to start of list
+        self.reindex_tasks()
+        self.mark_changed()
+
+    def update_task(self, task_index: int, checked: bool):
+        """Update task completion status.
+
+        Finds the task through the index map and flips the checkbox
+        character at its recorded offset — no scan over notes or tasks,
+        and only the owning note's render cache is dropped.
+        """
+        entry = self._task_map.get(task_index)
+        if entry is not None and not entry[0].set_task_checked(entry[1], checked):
+            # Content was edited without a reparse; offsets are stale.
+            self.reindex_tasks()
+            entry = self._task_map.get(task_index)
+            if entry is not None and not entry[0].set_task_checked(entry[1], checked):
+                entry = None
+        if entry is None:
+            return False
+        self.mark_changed()
+        return True
+
+class Note:
+    """Single note with content and tasks.
+    
+    Attributes:
+        title (str): Note title
+        content (str): Main content
+        timestamp (datetime): Creation time
+        manager (NoteManager): Parent manager
+        tasks (List[Task]): Tasks in note
+    """
+    def __init__(self, title: str, content: str, timestamp: datetime, manager: NoteManager):
+        self.title = title
+        self.content = content
+        self.timestamp = timestamp
+        self.manager = manager
+        self.tasks: List[Task] = []
+        self._html_cache: Optional[tuple] = None  # (content, html, task_key)
+        # (fingerprint, title, content, timestamp) as parsed from notes.md;
+        # lets NoteManager._parse_notes reuse this note across reloads.
+        self._source: Optional[tuple] = None
+        self._parse_tasks()
+
+    @classmethod
+    def from_text(cls, text: str, manager: NoteManager):
+        """Create Note object from markdown text"""
+        lines = text.split('\n', 1)
+        header = lines[0].replace('## ', '')
+        
+        # Parse timestamp and title
+        timestamp_match = re.match(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?: - )?(.*)?', header)
+        if timestamp_match:
+            timestamp = datetime.strptime(timestamp_match.group(1), "%Y-%m-%d %H:%M:%S")
+            title = timestamp_match.group(2) or ""
+        else:
+            timestamp = datetime.now()
+            title = header
+
+        content = lines[1].strip() if len(lines) > 1 else ''
+        return cls(title, content, timestamp, manager)
+
+    def _parse_tasks(self):
+        """Extract tasks from note content, skipping checkboxes inside code regions."""
+        self.tasks = []
+        for tok in folders_module.scan_markdown(self.content):
+            if tok.kind != "checkbox":
+                continue
+            task = Task(
+                index=self.manager.checkbox_index,
+                checked=self.content[tok.start + 1] in 'xX',
+                text=self._extract_task_text(tok.start),
+                offset=tok.start
+            )
+            self.tasks.append(task)
+            self.manager._task_map[task.index] = (self, task)
+            self.manager.checkbox_index += 1
+
+    def _renumber_tasks(self):
+        """Reassign task indexes from the manager's counter without re-scanning."""
+        for task in self.tasks:
+            task.index = self.manager.checkbox_index
+            self.manager._task_map[task.index] = (self, task)
+            self.manager.checkbox_index += 1
+
+    @staticmethod
+    def _code_regions(text: str) -> List[tuple]:
+        """Return (start, end) offsets covering markdown code regions.
+
+        Thin wrapper over folders.scan_markdown(), which the task scanners
+        use directly.
+        """
+        return folders_module._code_regions(text)
+
+    def _task_key(self) -> tuple:
+        """Checkbox indexes this note's HTML would embed under the current lookup.
+
+        The rendered HTML bakes in data-checkbox-index values, so the cache
+        is only valid while these resolve the same way — a note reused
+        across a reload whose tasks were renumbered must re-render.
+        """
+        return tuple(
+            render._TASK_LOOKUP.get().get(normalize_list_markers(task.text.strip()), task.index)
+            for task in self.tasks
+        )
+
+    def rendered_html(self) -> str:
+        """Markdown→HTML for this note, cached until content or task indexes change.
+
+        Checks the in-memory cache first, then the persistent render cache
+        (when one is installed), and only then runs the markdown pipeline.
+        """
+        task_key = self._task_key()
+        cache = self._html_cache
+        if cache is not None and cache[0] == self.content and cache[2] == task_key:
+            return cache[1]
+        cache_store = render._RENDER_CACHE
+        html_out = cache_store.get(self.content, task_key) if cache_store else None
+        if html_out is None:
+            html_out = render.parse_markdown(self.content)
+            if cache_store:
+                cache_store.put(self.content, task_key, html_out)
+        self._html_cache = (self.content, html_out, task_key)
+        return html_out
+
+    def _extract_task_text(self, checkbox_pos: int) -> str:
+        """Extract the full text of a task item"""
+        # Find the end of the line (without copying the rest of the note)
+        line_end = self.content.find('\n', checkbox_pos)
+        if line_end == -1:
+            line_end = len(self.content)
+
+        # Include the checkbox markers in the task text for exact matching
+        return self.content[checkbox_pos:line_end].strip()
+
+    def render_header(self) -> str:
+        """The '## timestamp - title' line and blank line preceding content."""
+        timestamp_str = self.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        title_str = f" - {self.title}" if self.title else ""
+        return f"## {timestamp_str}{title_str}\n\n"
+
+    def render(self) -> str:
+        """Render note with proper task indexing"""
+        # Add an extra newline before the note separator
+        return f"{self.render_header()}{self.content}\n"
+
+    def get_unchecked_tasks(self) -> List[Dict]:
+        """Return unchecked tasks"""
+        return [
+            {
+                'index': task.index,
+                'text': task.text.replace('[x]', '').replace('[ ]', '').strip(),  # Remove checkbox markers
+                'note_title': self.title,
+                'timestamp': self.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            for task in self.tasks
+            if not task.checked
+        ]
+
+    def update_task(self, task_index: int, checked: bool) -> bool:
+        """Set a task's checkbox by index; False if the task isn't in this note."""
+        if not self.tasks:
+            return False
+        pos = task_index - self.tasks[0].index  # indexes are contiguous per note
+        if not 0 <= pos < len(self.tasks):
+            return False
+        return self.set_task_checked(self.tasks[pos], checked)
+
+    def set_task_checked(self, task: "Task", checked: bool) -> bool:
+        """Rewrite the single checkbox character at task.offset.
+
+        Returns False if the offset no longer points at this task's
+        checkbox (content changed without a reparse) so the caller can
+        re-index. Besides the brackets, the line text must still match —
+        a shift can land the offset on another task's checkbox.
+        """
+        at = task.offset
+        if self.content[at:at + 1] != '[' or self.content[at + 2:at + 3] != ']':
+            return False
+        line = self._extract_task_text(at)
+        if line[:1] + line[2:] != task.text[:1] + task.text[2:]:
+            return False
+        self.content = ''.join((self.content[:at + 1], 'x' if checked else ' ',
+                                self.content[at + 2:]))
+        task.checked = checked
+        # A task's text runs to the end of its line, so earlier boxes on the
+        # same line embed this one — refresh them along with the task.
+        pos = task.index - self.tasks[0].index
+        for earlier in reversed(self.tasks[:pos + 1]):
+            if earlier is not task and self.content.find('\n', earlier.offset, at) != -1:
+                break
+            earlier.text = self._extract_task_text(earlier.offset)
+        self._html_cache = None
+        return True
+
+    def update(self, title: str, content: str):
+        """Update note content and title, then reindex all task IDs."""
+        self.title = title
+        self.content = content
+        self._html_cache = None
+        self.manager.reindex_tasks()
+        self.manager.mark_changed()
+
+class Task:
+    """Checkbox task within a note.
+    
+    Attributes:
+        index (int): Unique ID
+        checked (bool): Completion state
+        text (str): Task description
+        offset (int): Position of the checkbox's "[" in the note content
+    """
+    def __init__(self, index: int, checked: bool, text: str, offset: int = 0):
+        self.index = index
+        self.checked = checked
+        self.text = text
+        self.offset = offset
+
+
+###############################################################################
+# Helper Functions
+###############################################################################
+def create_directories(base_path: Path):
+    """Create necessary directories relative to the given base path"""
+    directories = [
+        base_path / "assets",
+        base_path / "assets/images",
+        base_path / "assets/files",
+        base_path / "assets/sites"
+    ]
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+
+def validate_folder_path(folder_path_input: Optional[str] = None) -> Path:
+    """
+    Validate and return the folder path to use for notes.md
+    If no path provided, uses current working directory
+    """
+    if folder_path_input:
+        path = Path(folder_path_input).resolve()
+        # Create folder if it doesn't exist
+        path.mkdir(parents=True, exist_ok=True)
+    else:
+        # Use current working directory
+        path = Path.cwd()
+    
+    return path
@@ -0,0 +1,238 @@
+"""Markdown → HTML rendering for notes.
+
+One shared MarkdownIt instance (built on first render) with NoteFlow's
+extensions: task checkboxes resolved to stable indexes through a lookup
+installed by set_task_lookup(), image/file links, blockquotes and
+$math$. markdown-it itself is imported on first render, so tools that only
+read and write notes.md (the CLI, notes.py) never load it.
+"""
+from __future__ import annotations
+
+import contextvars
+import html
+import os
+import re
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from markdown_it import MarkdownIt
+
+    from . import render_cache
+
+
+# Leading glyphs that look like a bullet but aren't a markdown list marker.
+# These commonly arrive when notes are pasted from Word/Outlook/Teams, whose
+# autocorrect turns "- " into an en-dash, etc. markdown-it only treats ASCII
+# '-', '*' and '+' as bullets, so without normalization these lines render as
+# plain paragraphs (no bullet) instead of a list.
+_BULLET_LOOKALIKES = (
+    '‐‑‒–—―'  # hyphen/dash variants, en/em dash
+    '−'                                # minus sign
+    '•‣⁃∙·●◦․'  # bullet/dot glyphs
+)
+_BULLET_LOOKALIKE_RE = re.compile(r'^(\s*)[' + _BULLET_LOOKALIKES + r'](\s+)')
+
+
+def normalize_list_markers(text: str) -> str:
+    """Convert leading bullet look-alike glyphs into real markdown hyphens.
+
+    Only a line-leading glyph followed by whitespace is rewritten, so dashes
+    used inside prose are untouched. Fenced code blocks are skipped so code
+    samples render verbatim.
+    """
+    out = []
+    in_fence = False
+    for line in text.split('\n'):
+        stripped = line.lstrip()
+        if stripped.startswith('```') or stripped.startswith('~~~'):
+            in_fence = not in_fence
+            out.append(line)
+            continue
+        if not in_fence:
+            line = _BULLET_LOOKALIKE_RE.sub(lambda m: m.group(1) + '-' + m.group(2), line)
+        out.append(line)
+    return '\n'.join(out)
+
+
+# Module-level task lookup used during markdown render. Populated by
+# get_notes / callers before parse_markdown so checkbox matching is O(1)
+# instead of scanning every task for every checkbox.
+# Context-local so concurrent renders for different folders (workspace
+# mode, cpu pool threads) can't see each other's lookup.
+_TASK_LOOKUP: contextvars.ContextVar = contextvars.ContextVar("noteflow_task_lookup", default={})
+_MD_PARSER: Optional[MarkdownIt] = None
+# Notes searched when a checkbox isn't in the installed lookup (AI render,
+# etc.); the web app points this at the active folder's notes.
+_FALLBACK_NOTES: Optional[Callable[[], List]] = None
+# Persistent HTML cache shared by every Note; installed by main() so
+# library / test use never touches the user's config dir.
+_RENDER_CACHE: Optional[render_cache.RenderCache] = None
+# Bump whenever the markdown → HTML output changes (new plugin, renderer
+# rule, markup tweak) so persisted HTML from older builds isn't served.
+RENDERER_VERSION = 1
+
+
+def set_task_lookup(lookup: Optional[Dict[str, int]] = None):
+    """Install the task-line → index map used by the checkbox renderer."""
+    _TASK_LOOKUP.set(lookup or {})
+
+
+def set_render_cache(cache: Optional[render_cache.RenderCache]):
+    """Install (or with None, remove) the persistent note-HTML cache."""
+    global _RENDER_CACHE
+    _RENDER_CACHE = cache
+
+
+def set_fallback_notes(provider: Optional[Callable[[], List]]):
+    """Install the callable returning notes to scan for unmapped checkboxes."""
+    global _FALLBACK_NOTES
+    _FALLBACK_NOTES = provider
+
+
+def _render_math(tokens, idx, options, env):
+    token = tokens[idx]
+    body = token.content
+    if token.type == 'math_block':
+        return f'<div class="math-display">\\[{body}\\]</div>'
+    return f'<span class="math-inline">\\({body}\\)</span>'
+
+
+def _render_image(tokens, idx, options, env):
+    token = tokens[idx]
+    src = (token.attrGet('src') or '').strip('<>')
+    alt = token.content
+    title = token.attrGet('title')
+
+    if src.startswith(('http://', 'https://')) or '/assets/images/' in src:
+        img_url = src if src.startswith(('http://', 'https://', '/')) else f'/{src}'
+        title_attr = f' title="{title}"' if title else ''
+        escaped_url = html.escape(img_url, quote=True)
+
+        delete_btn = ''
+        if '/assets/images/' in img_url:
+            delete_btn = (
+                f'<button class="image-delete-btn" '
+                f'data-image-path="{escaped_url}" '
+                f'title="Delete image">&times;</button>'
+            )
+
+        return (
+            f'<div class="image-container">'
+            f'<img src="{img_url}" alt="{html.escape(alt)}"{title_attr} '
+            f'class="clickable-image" data-full-src="{escaped_url}">'
+            f'{delete_btn}'
+            f'</div>'
+        )
+
+    filename = os.path.basename(src)
+    return (
+        f'<a href="{html.escape(src, quote=True)}" target="_blank" '
+        f'rel="noopener noreferrer" class="file-link">📎 {html.escape(filename)}</a>'
+    )
+
+
+def _render_blockquote_open(tokens, idx, options, env):
+    return '<blockquote class="markdown-blockquote">'
+
+
+def _render_blockquote_close(tokens, idx, options, env):
+    return '</blockquote>'
+
+
+def _checkbox_replace(state, silent):
+    pos = state.pos
+    max_pos = state.posMax
+
+    if (pos + 3 > max_pos or
+            state.src[pos] != '[' or
+            state.src[pos + 2] != ']' or
+            state.src[pos + 1] not in [' ', 'x', 'X']):
+        return False
+
+    if silent:
+        return False
+
+    checked = state.src[pos + 1].lower() == 'x'
+
+    line_start = pos
+    while line_start > 0 and state.src[line_start - 1] != '\n':
+        line_start -= 1
+
+    line_end = pos
+    while line_end < max_pos and state.src[line_end] != '\n':
+        line_end += 1
+
+    # Source is already normalized by parse_markdown; lookup keys are too.
+    task_text = state.src[line_start:line_end].strip()
+    task_index = _TASK_LOOKUP.get().get(task_text)
+    if task_index is None:
+        # Fallback for callers that didn't install a lookup (AI render, etc.)
+        for note in (_FALLBACK_NOTES() if _FALLBACK_NOTES else ()):
+            for task in note.tasks:
+                if task_text == normalize_list_markers(task.text.strip()):
+                    task_index = task.index
+                    break
+            if task_index is not None:
+                break
+
+    token = state.push('checkbox_inline', 'input', 0)
+    token.markup = state.src[pos:pos + 3]
+    token.attrs = token.attrs or []
+    token.attrs.append(['checked', 'true' if checked else 'false'])
+    token.attrs.append(['task_index', str(task_index) if task_index is not None else None])
+
+    state.pos = pos + 3
+    return True
+
+
+def _render_checkbox(tokens, idx, options, env):
+    token = tokens[idx]
+    attrs = dict(token.attrs or {})
+    checked = attrs.get('checked') == 'true'
+    task_index = attrs.get('task_index')
+
+    if task_index == 'None' or task_index is None:
+        return f'<input type="checkbox" {"checked" if checked else ""} disabled>'
+
+    return (f'<input type="checkbox" {"checked" if checked else ""} '
+            f'data-checkbox-index="{task_index}" '
+            f'id="task_{task_index}" name="task_{task_index}">')
+
+
+def _get_md_parser() -> MarkdownIt:
+    """Build (once) the shared MarkdownIt instance used for all note renders."""
+    global _MD_PARSER
+    if _MD_PARSER is not None:
+        return _MD_PARSER
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.dollarmath import dollarmath_plugin
+
+    md = MarkdownIt('zero')
+    for rule in (
+        'table', 'emphasis', 'link', 'paragraph', 'heading', 'list',
+        'image', 'code', 'fence', 'blockquote', 'strikethrough', 'escape',
+        'backticks', 'html_block', 'inline',
+    ):
+        md.enable(rule)
+    md.use(dollarmath_plugin, allow_digits=False)
+
+    md.inline.ruler.before('text', 'checkbox', _checkbox_replace)
+    md.renderer.rules['checkbox_inline'] = _render_checkbox
+    md.renderer.rules['image'] = _render_image
+    md.renderer.rules['blockquote_open'] = _render_blockquote_open
+    md.renderer.rules['blockquote_close'] = _render_blockquote_close
+    md.renderer.rules['math_inline'] = _render_math
+    md.renderer.rules['math_block'] = _render_math
+
+    _MD_PARSER = md
+    return md
+
+
+def parse_markdown(content: str) -> str:
+    """Convert markdown to HTML with proper task handling and extended features.
+
+    Reuses a single MarkdownIt instance across calls. Call set_task_lookup()
+    before rendering notes so checkboxes resolve to stable task indexes in O(1).
+    """
+    content = normalize_list_markers(content)
+    return _get_md_parser().render(content)
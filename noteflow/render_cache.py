@@ -0,0 +1,164 @@
+"""Persistent cache of rendered note HTML.
+
+Note.rendered_html() keeps an in-memory cache, but a server restart used
+to re-run the markdown pipeline over the whole notes.md before the first
+page could be served. This module keeps the rendered HTML in a small
+SQLite DB under the user config dir so a cold start serves cached HTML
+immediately.
+
+Entries are keyed by a hash of:
+  - the note's markdown content
+  - the renderer version (bumped whenever markdown → HTML output changes)
+  - the checkbox indexes the HTML embeds (task-index assignment)
+
+so a stale entry can never be served — it simply stops being looked up
+and ages out. The DB is size-bounded: once it grows past `max_bytes`,
+the least-recently-used entries are evicted down to ~80% of the cap.
+
+Like tasks.db this is purely a cache; deleting the file is always safe.
+"""
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import platformdirs
+
+
+###############################################################################
+# Constants
+###############################################################################
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rendered (
+    key         TEXT PRIMARY KEY,
+    html        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_used   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rendered_last_used ON rendered(last_used);
+"""
+
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+# Evict down to this fraction of the cap so we don't evict on every insert.
+EVICT_TO_FRACTION = 0.8
+# Only rewrite last_used on a hit when it's older than this — keeps reads
+# from turning into a write per note on every page load.
+TOUCH_INTERVAL_SECONDS = 3600
+
+
+def get_cache_path() -> Path:
+    """Return the render cache DB path, creating its parent if needed."""
+    config_dir = Path(platformdirs.user_config_dir("noteflow-py"))
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir / "render_cache.db"
+
+
+###############################################################################
+# RenderCache
+###############################################################################
+class RenderCache:
+    """SQLite-backed LRU of rendered note HTML.
+
+    Same threading model as FolderRegistry: one connection opened with
+    check_same_thread=False, all access serialized by a Python lock.
+    Every failure is swallowed and reported as a miss — a broken cache
+    must never stop notes from rendering.
+    """
+
+    def __init__(self, version: str, db_path: Optional[Path] = None,
+                 max_bytes: int = MAX_CACHE_BYTES):
+        self.version = version
+        self.db_path = db_path or get_cache_path()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            isolation_level=None,  # autocommit
+        )
+        # It's a cache: trade durability for cheap inserts.
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.executescript(SCHEMA)
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM rendered").fetchone()
+        self._total_bytes = int(row[0])
+
+    def make_key(self, content: str, task_key: tuple) -> str:
+        h = hashlib.sha256()
+        h.update(self.version.encode('utf-8'))
+        h.update(b'\0')
+        h.update(repr(task_key).encode('utf-8'))
+        h.update(b'\0')
+        h.update(content.encode('utf-8'))
+        return h.hexdigest()
+
+    def get(self, content: str, task_key: tuple) -> Optional[str]:
+        key = self.make_key(content, task_key)
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT html, last_used FROM rendered WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[1] > TOUCH_INTERVAL_SECONDS:
+                    self._conn.execute(
+                        "UPDATE rendered SET last_used = ? WHERE key = ?", (now, key)
+                    )
+                return row[0]
+        except sqlite3.Error as e:
+            print(f"render cache read failed: {e}")
+            return None
+
+    def put(self, content: str, task_key: tuple, html: str) -> None:
+        key = self.make_key(content, task_key)
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                old = self._conn.execute(
+                    "SELECT size FROM rendered WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rendered (key, html, size, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, html, size, time.time()),
+                )
+                self._total_bytes += size - (old[0] if old else 0)
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except sqlite3.Error as e:
+            print(f"render cache write failed: {e}")
+
+    def _evict(self) -> None:
+        """Drop least-recently-used rows until under the low-water mark.
+
+        Caller holds self._lock.
+        """
+        target = int(self.max_bytes * EVICT_TO_FRACTION)
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM rendered ORDER BY last_used"
+        ):
+            if self._total_bytes - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM rendered WHERE key = ?", doomed)
+        self._total_bytes -= freed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rendered")
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
@@ -0,0 +1,200 @@
+"""Cacheable, compressed HTTP responses.
+
+Three pieces:
+
+  - EncodedBody: a response body computed once (the main page, the
+    global-tasks page) together with its gzip/brotli variants and a strong
+    ETag per variant. response() negotiates Accept-Encoding and answers a
+    matching If-None-Match with 304, so a reload costs neither the render
+    nor the bytes.
+  - generation_etag() / not_modified(): ETags for read APIs derived from
+    generation counters (NoteManager.generation, FolderRegistry.generation,
+    asset writes), so an idle poll is answered with a 304 before any
+    payload is built.
+  - CompressionMiddleware: compresses other one-shot text responses
+    (/api/notes HTML, JSON) on the fly. Streaming responses — SSE, file
+    downloads, AI chat — and anything already encoded pass through.
+
+Brotli is used when the optional `brotli` package is installed
+(`pip install brotli`); otherwise gzip only.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+from typing import Dict, List, Mapping, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+from . import executors
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+###############################################################################
+# Tunables
+###############################################################################
+MIN_COMPRESS_SIZE = 1024        # smaller bodies aren't worth the CPU
+OFFLOAD_COMPRESS_SIZE = 64 * 1024  # compress bigger bodies in the cpu pool
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/plain", "text/css", "application/json",
+    "application/javascript", "image/svg+xml",
+)
+
+# Part of every generation ETag, so tags handed out before a restart (or
+# by another NoteFlow process on the same port) never match.
+BOOT_ID = os.urandom(6).hex()
+
+
+def available_encodings() -> List[str]:
+    """Content codings we can produce, most preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """`body` in `encoding` ("br" or "gzip"). `best` trades CPU for size —
+    worth it for bodies compressed once and served many times."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 5)
+    return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best coding we can produce that the client accepts, or None."""
+    accepted: Dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding.lower()] = q
+    for coding in available_encodings():
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 specifies for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def generation_etag(resource: str, *generations) -> str:
+    """Strong ETag for `resource` at the given generation counter values."""
+    return '"' + "-".join([resource, BOOT_ID, *(str(g) for g in generations)]) + '"'
+
+
+def not_modified(request_headers: Mapping[str, str], etag: str) -> Optional[Response]:
+    """A 304 for `etag` if the client already has it, else None."""
+    if not etag_matches(request_headers.get("if-none-match"), etag):
+        return None
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+class EncodedBody:
+    """A body precompressed in every coding we can produce."""
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.variants: Dict[str, bytes] = {"identity": body}
+        self.etags: Dict[str, str] = {"identity": f'"{digest}"'}
+        for coding in available_encodings():
+            self.variants[coding] = compress(body, coding, best=True)
+            self.etags[coding] = f'"{digest}-{coding}"'
+
+    def response(self, request_headers: Mapping[str, str],
+                 headers: Optional[Dict[str, str]] = None) -> Response:
+        """200 with the negotiated variant, or 304 if the client has it."""
+        coding = choose_encoding(request_headers.get("accept-encoding")) or "identity"
+        out = dict(headers or {})
+        out["ETag"] = self.etags[coding]
+        out["Vary"] = "Accept-Encoding"
+        if etag_matches(request_headers.get("if-none-match"), self.etags[coding]):
+            return Response(status_code=304, headers=out)
+        if coding != "identity":
+            out["Content-Encoding"] = coding
+        return Response(self.variants[coding], media_type=self.media_type, headers=out)
+
+
+class CompressionMiddleware:
+    """Compress one-shot text responses according to Accept-Encoding.
+
+    A response is compressed only when it is a 200 whose whole body
+    arrives in a single message; anything streamed is passed through
+    untouched, as are bodies under MIN_COMPRESS_SIZE, responses that
+    already set Content-Encoding, partial (Content-Range) responses and
+    files — FileResponse sends a small file or Range slice as one message,
+    and marks itself with Accept-Ranges. A strong ETag on a compressed
+    response is weakened, since it named the identity bytes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None  # held back until we know whether to compress
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            held, start = start, None
+            headers = MutableHeaders(raw=held["headers"])
+            body = message.get("body", b"")
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if (message.get("more_body") or held["status"] != 200
+                    or "content-encoding" in headers or "content-range" in headers
+                    or "accept-ranges" in headers
+                    or len(body) < MIN_COMPRESS_SIZE
+                    or media_type not in COMPRESSIBLE_TYPES):
+                await send(held)
+                await send(message)
+                return
+            if len(body) >= OFFLOAD_COMPRESS_SIZE:
+                compressed = await executors.run_cpu(compress, body, coding)
+            else:
+                compressed = compress(body, coding)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,283 @@
+"""File-change watcher for notes.md files.
+
+Replaces "stat() on every poll" change detection. A single background
+thread watches any number of files and calls back when one changes:
+
+  - Linux: inotify via ctypes (no extra dependency). The thread blocks
+    in select() until the kernel reports an event, so an idle server
+    makes no wakeups at all. Parent directories are watched rather than
+    the files themselves so atomic saves (write temp + rename, which is
+    what NoteManager.save() and most editors do) are still seen.
+  - Everywhere else, or if inotify can't be initialised: a polling
+    fallback that stat()s each watched file every POLL_INTERVAL_SECONDS.
+
+Bursts of events for one file (editors often write, chmod and rename in
+quick succession) are coalesced: a callback fires once the file has been
+quiet for DEBOUNCE_SECONDS.
+
+Callbacks run on the watcher thread and must not block for long.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+###############################################################################
+# Tunables
+###############################################################################
+DEBOUNCE_SECONDS = 0.05
+POLL_INTERVAL_SECONDS = 2.0
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+Callback = Callable[[Path], None]
+
+
+def _load_inotify():
+    """Return libc with inotify symbols, or None when unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 — raises AttributeError when missing
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+###############################################################################
+# FileWatcher
+###############################################################################
+class FileWatcher:
+    """Watch files and invoke callbacks when they change.
+
+    Usage:
+        watcher = FileWatcher()
+        watcher.watch(folder / "notes.md", on_change)
+        watcher.start()
+
+    `backend` reports which mechanism is in use ("inotify" or "polling").
+    """
+
+    def __init__(self, debounce: float = DEBOUNCE_SECONDS,
+                 poll_interval: float = POLL_INTERVAL_SECONDS,
+                 force_polling: bool = False):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._callbacks: Dict[Path, List[Callback]] = {}
+        self._stats: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._pending: Dict[Path, float] = {}  # path -> fire-after deadline
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self._libc = None if force_polling else _load_inotify()
+        self._inotify_fd: Optional[int] = None
+        self._dir_wds: Dict[Path, int] = {}
+        self._wd_dirs: Dict[int, Path] = {}
+        if self._libc is not None:
+            fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                self._libc = None
+            else:
+                self._inotify_fd = fd
+        # Self-pipe so stop() and new watches can interrupt select().
+        self._wake_r, self._wake_w = os.pipe()
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify_fd is not None else "polling"
+
+    # -- registration ----------------------------------------------------
+    def watch(self, path, callback: Callback) -> None:
+        """Call `callback(path)` whenever `path` is written, replaced or removed."""
+        path = Path(path).expanduser().resolve()
+        with self._lock:
+            callbacks = self._callbacks.setdefault(path, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+            self._stats.setdefault(path, _stat_key(path))
+            if self._inotify_fd is not None:
+                self._add_dir_watch(path.parent)
+        self._wake()
+
+    def unwatch(self, path, callback: Optional[Callback] = None) -> None:
+        """Stop watching `path` (only `callback`'s registration, if given)."""
+        path = Path(path).expanduser().resolve()
+        with self._lock:
+            callbacks = self._callbacks.get(path)
+            if callbacks is None:
+                return
+            if callback is not None and callback in callbacks:
+                callbacks.remove(callback)
+            if callback is None or not callbacks:
+                del self._callbacks[path]
+                self._stats.pop(path, None)
+                self._pending.pop(path, None)
+                if self._inotify_fd is not None:
+                    self._drop_dir_watch_if_unused(path.parent)
+
+    def watched(self) -> List[Path]:
+        with self._lock:
+            return list(self._callbacks)
+
+    def _add_dir_watch(self, directory: Path) -> None:
+        """Caller holds self._lock."""
+        if directory in self._dir_wds:
+            return
+        wd = self._libc.inotify_add_watch(
+            self._inotify_fd, os.fsencode(str(directory)), _WATCH_MASK
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            print(f"inotify_add_watch({directory}) failed: {os.strerror(err)}")
+            return
+        self._dir_wds[directory] = wd
+        self._wd_dirs[wd] = directory
+
+    def _drop_dir_watch_if_unused(self, directory: Path) -> None:
+        """Caller holds self._lock."""
+        if any(p.parent == directory for p in self._callbacks):
+            return
+        wd = self._dir_wds.pop(directory, None)
+        if wd is not None:
+            self._wd_dirs.pop(wd, None)
+            self._libc.inotify_rm_watch(self._inotify_fd, wd)
+
+    # -- lifecycle -------------------------------------------------------
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="noteflow-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except OSError:
+            pass
+
+    # -- event loop ------------------------------------------------------
+    def _run(self) -> None:
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            with self._lock:
+                deadlines = list(self._pending.values())
+            timeout = None
+            if deadlines:
+                timeout = max(0.0, min(deadlines) - now)
+            if self._inotify_fd is None:
+                poll_in = max(0.0, next_poll - now)
+                timeout = poll_in if timeout is None else min(timeout, poll_in)
+
+            fds = [self._wake_r]
+            if self._inotify_fd is not None:
+                fds.append(self._inotify_fd)
+            try:
+                readable, _, _ = select.select(fds, [], [], timeout)
+            except (OSError, ValueError):
+                break
+
+            if self._wake_r in readable:
+                try:
+                    os.read(self._wake_r, 4096)
+                except OSError:
+                    pass
+            if self._inotify_fd is not None and self._inotify_fd in readable:
+                self._drain_inotify()
+            if self._inotify_fd is None and time.monotonic() >= next_poll:
+                self._poll_stats()
+                next_poll = time.monotonic() + self.poll_interval
+            self._fire_due()
+
+    def _drain_inotify(self) -> None:
+        try:
+            data = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            print(f"inotify read failed: {e}")
+            return
+        deadline = time.monotonic() + self.debounce
+        offset = 0
+        with self._lock:
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                raw_name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if mask & _IN_Q_OVERFLOW:
+                    # Kernel dropped events — treat every watched file as touched.
+                    for path in self._callbacks:
+                        self._pending[path] = deadline
+                    continue
+                directory = self._wd_dirs.get(wd)
+                if directory is None or not raw_name:
+                    continue
+                path = directory / os.fsdecode(raw_name)
+                if path in self._callbacks:
+                    self._pending[path] = deadline
+
+    def _poll_stats(self) -> None:
+        deadline = time.monotonic()  # polling is already coarse; no extra debounce
+        with self._lock:
+            paths = list(self._callbacks)
+        for path in paths:
+            key = _stat_key(path)
+            with self._lock:
+                if path in self._stats and self._stats[path] != key:
+                    self._pending[path] = deadline
+                    self._stats[path] = key
+
+    def _fire_due(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = [p for p, t in self._pending.items() if t <= now]
+            for p in due:
+                del self._pending[p]
+            batches = [(p, list(self._callbacks.get(p, ()))) for p in due]
+            for p in due:
+                self._stats[p] = _stat_key(p)
+        for path, callbacks in batches:
+            for cb in callbacks:
+                try:
+                    cb(path)
+                except Exception as e:
+                    print(f"watch callback for {path} failed: {e}")
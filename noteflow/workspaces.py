@@ -0,0 +1,162 @@
+"""Workspace mode: serve many folders from one NoteFlow process.
+
+Normally one process serves one folder, so a team with a dozen project
+folders runs a dozen servers (each with its own interpreter, config load
+and markdown parser). With `noteflow --workspace`, any folder in the
+cross-folder registry (tasks.db) is also reachable at /f/{folder_id}/ on
+the same server; the folder IDs are FolderRegistry's.
+
+Each request under /f/{id}/ is routed to the normal handlers with
+`current` set to that folder's Workspace, and the handlers pick up its
+NoteManager and folder path from there. NoteManagers are loaded on first
+use and kept in an LRU: past `max_resident`, the least recently used
+folder that isn't busy is saved and dropped, and reloaded from notes.md
+on its next request. The process's own folder is pinned and never
+evicted.
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, List, NamedTuple, Optional
+
+
+###############################################################################
+# Tunables
+###############################################################################
+MAX_RESIDENT = 8  # NoteManagers kept loaded besides the pinned folder
+
+
+class Workspace(NamedTuple):
+    folder_id: int
+    path: Path
+    manager: Any  # NoteManager — typed loosely to avoid importing the web app
+
+    @property
+    def prefix(self) -> str:
+        """URL prefix the folder is served under."""
+        return f"/f/{self.folder_id}"
+
+
+# The workspace the current request was routed to; None for the
+# process's own folder served at "/".
+current: ContextVar[Optional[Workspace]] = ContextVar("noteflow_workspace", default=None)
+
+
+class WorkspacePool:
+    """LRU of loaded NoteManagers keyed by FolderRegistry folder id.
+
+    `load_manager(folder_id, path)` builds a manager for a folder;
+    `unload_manager(manager)` is called on eviction and must persist any
+    unsaved edits. `busy(manager)`, if given, is True while a manager is
+    still in use (a handler holds its lock, a save is pending); busy
+    folders are passed over for eviction, so the pool can briefly hold
+    more than max_resident. get() may block on notes.md parsing — call it
+    from a worker thread. Only the resident map is guarded by the pool's
+    lock; a cold load runs outside it, so requests for loaded folders
+    never wait on one.
+    """
+
+    def __init__(self, registry, load_manager: Callable[[int, Path], Any],
+                 unload_manager: Optional[Callable[[Any], None]] = None,
+                 max_resident: int = MAX_RESIDENT,
+                 pinned: Optional[Workspace] = None,
+                 busy: Optional[Callable[[Any], bool]] = None):
+        self.registry = registry
+        self.load_manager = load_manager
+        self.unload_manager = unload_manager
+        self.max_resident = max(1, max_resident)
+        self.pinned = pinned
+        self.busy = busy
+        self._lock = threading.Lock()
+        self._resident: "OrderedDict[int, Workspace]" = OrderedDict()
+        # Loads in progress; concurrent get()s of the folder wait on these.
+        self._loading: dict = {}
+
+    def get(self, folder_id: int) -> Optional[Workspace]:
+        """The workspace for `folder_id`, loading it if needed; None if unknown."""
+        if self.pinned is not None and folder_id == self.pinned.folder_id:
+            return self.pinned
+        with self._lock:
+            ws = self._resident.get(folder_id)
+            if ws is not None:
+                self._resident.move_to_end(folder_id)
+                return ws
+            loading = self._loading.get(folder_id)
+            if loading is not None:
+                owner = False
+            else:
+                owner = True
+                loading = self._loading[folder_id] = concurrent.futures.Future()
+        if not owner:
+            return loading.result()
+        try:
+            ws = self._load(folder_id)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[folder_id]
+            loading.set_exception(e)
+            raise
+        evicted = []
+        with self._lock:
+            del self._loading[folder_id]
+            if ws is not None:
+                self._resident[folder_id] = ws
+                evicted = self._take_evictions(keep=folder_id)
+        loading.set_result(ws)
+        for old in evicted:
+            self._unload(old)
+        return ws
+
+    def _load(self, folder_id: int) -> Optional[Workspace]:
+        row = self.registry.get_folder(folder_id)
+        if not row or not row.get("active"):
+            return None
+        path = Path(row["path"])
+        if not path.is_dir():
+            return None
+        return Workspace(folder_id, path, self.load_manager(folder_id, path))
+
+    def _take_evictions(self, keep: int) -> List[Workspace]:
+        """Remove least recently used idle workspaces past max_resident. Caller holds _lock."""
+        evicted = []
+        excess = len(self._resident) - self.max_resident
+        for folder_id, ws in list(self._resident.items()):
+            if excess <= 0:
+                break
+            if folder_id == keep or (self.busy is not None and self.busy(ws.manager)):
+                continue
+            evicted.append(self._resident.pop(folder_id))
+            excess -= 1
+        return evicted
+
+    def peek(self, folder_id: int) -> Optional[Workspace]:
+        """The workspace for `folder_id` if it is loaded; never loads it."""
+        if self.pinned is not None and folder_id == self.pinned.folder_id:
+            return self.pinned
+        with self._lock:
+            return self._resident.get(folder_id)
+
+    def resident(self) -> List[int]:
+        """Loaded folder ids, least recently used first (pinned excluded)."""
+        with self._lock:
+            return list(self._resident)
+
+    def close(self) -> None:
+        """Unload every resident workspace (saving unsaved edits)."""
+        with self._lock:
+            evicted = list(self._resident.values())
+            self._resident.clear()
+        for old in evicted:
+            self._unload(old)
+
+    def _unload(self, ws: Workspace) -> None:
+        if self.unload_manager is None:
+            return
+        try:
+            self.unload_manager(ws.manager)
+        except Exception as e:
+            print(f"Failed to unload workspace {ws.folder_id} ({ws.path}): {e}")
@@ -1,14 +1,34 @@
 """Unit tests for NoteFlow performance / safety / capability improvements."""
 from __future__ import annotations
 
+import asyncio
+import gzip
 import os
+import sqlite3
+import subprocess
+import sys
 import tempfile
+import threading
 import time
 import unittest
 from pathlib import Path
 
+from fastapi import HTTPException
+
 from noteflow import ai as ai_module
+from noteflow import archive_index
+from noteflow import archive_jobs
+from noteflow import archiver
+from noteflow import events as events_module
+from noteflow import executors
 from noteflow import folders as folders_module
+from noteflow import http_cache
+from noteflow import noteflow as app_module
+from noteflow import notes as notes_module
+from noteflow import render_cache as render_cache_module
+from noteflow import responses
+from noteflow import watcher as watcher_module
+from noteflow import workspaces
 from noteflow.noteflow import (
     NoteManager,
     _safe_upload_filename,
@@ -113,6 +133,30 @@ class NoteManagerTests(unittest.TestCase):
         self.assertFalse(self.nm.reload_if_changed())
         self.assertNotIn("TAMPER", self.nm.notes[0].content)
 
+    def test_incremental_reload_reuses_unchanged_notes(self):
+        self.nm.add_note("old", "- [ ] first\n")
+        self.nm.add_note("new", "- [ ] second\nbody\n")
+        self.nm.save()
+        # Reload once so both notes carry a parse fingerprint.
+        self.assertTrue(self.nm.reload_if_changed(force=True))
+        set_task_lookup(self.nm.build_task_lookup())
+        older = self.nm.notes[1]
+        older_html = older.rendered_html()
+
+        path = self.base / "notes.md"
+        text = path.read_text(encoding="utf-8").replace("body", "edited body")
+        path.write_text(text, encoding="utf-8")
+        os.utime(path, None)
+        self.nm._file_mtime = 0  # force disk_changed() on coarse clocks
+        self.assertTrue(self.nm.reload_if_changed())
+
+        self.assertIn("edited body", self.nm.notes[0].content)
+        self.assertIs(self.nm.notes[1], older)
+        set_task_lookup(self.nm.build_task_lookup())
+        self.assertIs(older.rendered_html(), older_html)
+        indexes = [t.index for n in self.nm.notes for t in n.tasks]
+        self.assertEqual(indexes, [0, 1])
+
     def test_html_cache_reused(self):
         self.nm.add_note("", "plain **bold** text\n")
         set_task_lookup(self.nm.build_task_lookup())
@@ -126,6 +170,792 @@ class NoteManagerTests(unittest.TestCase):
         self.assertNotEqual(h1, h3)
 
 
+    def test_toggle_hits_exact_duplicate_and_keeps_other_caches(self):
+        self.nm.add_note("older", "- [ ] same\n")
+        self.nm.add_note("newer", "- [ ] same\n- [ ] a [ ] b\n")
+        set_task_lookup(self.nm.build_task_lookup())
+        self.nm.notes[0].rendered_html()
+        # Index 3 is the older note's "- [ ] same", not the newer duplicate.
+        self.assertTrue(self.nm.update_task(3, True))
+        self.assertEqual(self.nm.notes[0].content, "- [ ] same\n- [ ] a [ ] b\n")
+        self.assertEqual(self.nm.notes[1].content, "- [x] same\n")
+        self.assertIsNotNone(self.nm.notes[0]._html_cache)
+        # Second box on a line: the first task's text embeds it and follows.
+        self.assertTrue(self.nm.update_task(2, True))
+        self.assertIsNone(self.nm.notes[0]._html_cache)
+        first, second = self.nm.notes[0].tasks[1:]
+        self.assertEqual((first.text, second.text), ("[ ] a [x] b", "[x] b"))
+        self.assertFalse(self.nm.update_task(99, True))
+
+    def test_toggle_recovers_from_stale_offsets(self):
+        self.nm.add_note("t", "- [ ] one\n- [ ] two\n")
+        self.nm.notes[0].content = "intro\n" + self.nm.notes[0].content
+        self.assertTrue(self.nm.update_task(1, True))
+        self.assertEqual(self.nm.notes[0].content, "intro\n- [ ] one\n- [x] two\n")
+
+    def test_toggle_rejects_offset_shifted_onto_other_task(self):
+        self.nm.add_note("t", "- [ ] one\n- [ ] two\n")
+        note = self.nm.notes[0]
+        # First line removed without a reparse: task 0's offset now sits on "two"'s box.
+        note.content = "- [ ] two\n"
+        self.assertFalse(note.set_task_checked(note.tasks[0], True))
+        self.assertEqual(note.content, "- [ ] two\n")
+
+    def test_toggle_patches_file_in_place(self):
+        self.nm.add_note("a", "- [ ] ünï\n- [ ] two\n")
+        self.nm.add_note("b", "- [ ] three\n")
+        self.nm.save()
+        path = self.base / "notes.md"
+        before = path.read_text(encoding="utf-8")
+        nm = NoteManager(self.base)
+        inode = path.stat().st_ino
+        nm.update_task(2, True)
+        nm.update_task(0, True)
+        nm.save()
+        self.assertEqual(path.stat().st_ino, inode)
+        self.assertFalse(path.with_suffix(".md.journal").exists())
+        expected = before.replace("[ ] three", "[x] three").replace("[ ] two", "[x] two")
+        self.assertEqual(path.read_text(encoding="utf-8"), expected)
+        # A length-changing edit falls back to the atomic rewrite.
+        nm.notes[0].update("b", "- [x] three, longer\n")
+        nm.save()
+        self.assertNotEqual(path.stat().st_ino, inode)
+        reloaded = NoteManager(self.base)
+        self.assertEqual([t.checked for n in reloaded.notes for t in n.tasks], [True, False, True])
+
+    def test_patch_skipped_after_external_edit(self):
+        self.nm.add_note("a", "- [ ] one\n")
+        self.nm.save()
+        path = self.base / "notes.md"
+        external = path.read_text(encoding="utf-8") + "\n<!-- note -->\n## 2024-01-01 00:00:00\n\nhand\n"
+        time.sleep(0.01)
+        path.write_text(external, encoding="utf-8")
+        reported = []
+        self.nm.on_conflict = reported.append
+        self.nm.update_task(0, True)
+        self.nm.save()
+        # The newer file on disk wins; the in-memory edit goes to a conflict copy.
+        self.assertEqual(path.read_text(encoding="utf-8"), external)
+        conflicts = list(self.base.glob("notes.md.conflict-*"))
+        self.assertEqual(len(conflicts), 1)
+        self.assertIn("- [x] one", conflicts[0].read_text(encoding="utf-8"))
+        self.assertEqual(reported, [conflicts[0].name])
+        self.assertFalse(self.nm.needs_save)
+        self.assertTrue(self.nm.reload_if_changed())
+        self.assertEqual(len(self.nm.notes), 2)
+
+    def test_journal_replayed_on_load(self):
+        self.nm.add_note("a", "- [ ] one\n")
+        self.nm.save()
+        path = self.base / "notes.md"
+        offset = path.read_bytes().index(b"[ ]") + 1
+        # Journal written, crash before notes.md was patched.
+        notes_module._write_journal(path, path.stat().st_size, [(offset, b"x", b" ")])
+        nm = NoteManager(self.base)
+        self.assertTrue(nm.notes[0].tasks[0].checked)
+        self.assertFalse(path.with_suffix(".md.journal").exists())
+        # A crash halfway through a range leaves old and new bytes mixed;
+        # replay completes it.
+        text = path.read_bytes()
+        at = text.index(b"one")
+        notes_module._write_journal(path, len(text), [(at, b"two", b"one")])
+        with open(path, "r+b") as f:
+            f.seek(at)
+            f.write(b"t")
+        self.assertIn(b"[x] tne", path.read_bytes())
+        nm = NoteManager(self.base)
+        self.assertEqual(nm.notes[0].tasks[0].text, "[x] two")
+        self.assertFalse(path.with_suffix(".md.journal").exists())
+        # A notes.md replaced after the crash (an editor's atomic save) is
+        # left alone, even at the same size.
+        text = path.read_bytes()
+        edited = text.replace(b"[x] two", b"[x] TWO")
+        notes_module._write_journal(path, len(text), [(at, b"six", b"two")])
+        replacement = path.with_name("notes.md.tmp")
+        replacement.write_bytes(edited)
+        os.replace(replacement, path)
+        NoteManager(self.base)
+        self.assertEqual(path.read_bytes(), edited)
+        self.assertFalse(path.with_suffix(".md.journal").exists())
+        # A torn journal (checksum mismatch) is discarded untouched.
+        path.with_suffix(".md.journal").write_text('{"size":1,"patches":[]}\nbad\n')
+        nm = NoteManager(self.base)
+        self.assertTrue(nm.notes[0].tasks[0].checked)
+        self.assertFalse(path.with_suffix(".md.journal").exists())
+
+class SaveSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.nm = NoteManager(self.base)
+        self.nm.add_note("t", "- [ ] a\n- [ ] b\n- [ ] c\n")
+        self.nm.save()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_burst_of_toggles_is_one_save(self):
+        scheduler = app_module.SaveScheduler(delay=0.05, max_delay=1.0)
+
+        async def burst():
+            for i in range(3):
+                self.nm.update_task(i, True)
+                scheduler.request(self.nm)
+            self.assertEqual(scheduler.saves, 0)
+            self.assertTrue(scheduler.pending)
+            await asyncio.sleep(0.15)
+
+        asyncio.run(burst())
+        self.assertEqual(scheduler.saves, 1)
+        self.assertFalse(self.nm.needs_save)
+        self.assertEqual((self.base / "notes.md").read_text(encoding="utf-8").count("[x]"), 3)
+
+    def test_flush_and_no_loop_save_immediately(self):
+        scheduler = app_module.SaveScheduler(delay=60, max_delay=60)
+
+        async def edit_then_flush():
+            self.nm.update_task(0, True)
+            scheduler.request(self.nm)
+            return scheduler.flush()
+
+        self.assertEqual(asyncio.run(edit_then_flush()), 1)
+        self.assertIn("[x] a", (self.base / "notes.md").read_text(encoding="utf-8"))
+        self.nm.update_task(1, True)
+        scheduler.request(self.nm)  # CLI / no event loop: written at once
+        self.assertFalse(self.nm.needs_save)
+        self.assertEqual(scheduler.flush(), 0)
+
+
+class ExecutorTests(unittest.TestCase):
+    def test_pools_run_off_loop_with_context(self):
+        import contextvars
+        var = contextvars.ContextVar("var", default=None)
+
+        def probe():
+            return threading.current_thread().name, var.get()
+
+        async def run():
+            var.set("request-1")
+            return await executors.run_io(probe), await executors.run_db(probe)
+
+        (io_thread, io_val), (db_thread, db_val) = asyncio.run(run())
+        self.assertTrue(io_thread.startswith("noteflow-io"))
+        self.assertTrue(db_thread.startswith("noteflow-db"))
+        self.assertEqual((io_val, db_val), ("request-1", "request-1"))
+
+    def test_manager_lock_serializes_and_follows_loop(self):
+        with tempfile.TemporaryDirectory() as td:
+            nm = NoteManager(Path(td))
+            order = []
+
+            async def hold(tag):
+                async with nm.lock.write():
+                    order.append(f"{tag}+")
+                    await asyncio.sleep(0.01)
+                    order.append(f"{tag}-")
+
+            async def run():
+                await asyncio.gather(hold("a"), hold("b"))
+
+            asyncio.run(run())
+            asyncio.run(run())  # a fresh loop gets a fresh lock
+            self.assertEqual(order, ["a+", "a-", "b+", "b-"] * 2)
+
+
+class RWLockTests(unittest.TestCase):
+    def test_readers_share_and_writer_is_exclusive(self):
+        from noteflow.locks import AsyncRWLock
+        log = []
+
+        async def reader(lock, tag, delay):
+            async with lock.read():
+                log.append(f"{tag}+")
+                await asyncio.sleep(delay)
+                log.append(f"{tag}-")
+
+        async def writer(lock):
+            async with lock.write():
+                self.assertEqual(lock.readers, 0)
+                log.append("w")
+
+        async def run():
+            lock = AsyncRWLock()
+            r1 = asyncio.ensure_future(reader(lock, "r1", 0.03))
+            r2 = asyncio.ensure_future(reader(lock, "r2", 0.03))
+            await asyncio.sleep(0.005)
+            w = asyncio.ensure_future(writer(lock))
+            await asyncio.sleep(0.005)
+            # Arrives after the writer queued: must wait behind it.
+            r3 = asyncio.ensure_future(reader(lock, "r3", 0))
+            await asyncio.gather(r1, r2, w, r3)
+
+        asyncio.run(run())
+        self.assertEqual(log[:2], ["r1+", "r2+"])  # both readers in at once
+        self.assertEqual(log[4:], ["w", "r3+", "r3-"])
+
+    def test_search_waits_for_delete_to_finish(self):
+        with tempfile.TemporaryDirectory() as td:
+            nm = NoteManager(Path(td))
+            for i in range(3):
+                nm.add_note(f"n{i}", f"- [ ] needle {i}\n")
+            saved = getattr(app_module, "note_manager", None)
+            app_module.note_manager = nm
+
+            async def run():
+                delete = asyncio.ensure_future(app_module.delete_note(note_index=0))
+                search = asyncio.ensure_future(app_module.search_notes(_FakeRequest(), q="needle"))
+                return await asyncio.gather(delete, search)
+
+            try:
+                _, result = asyncio.run(run())
+                app_module.save_scheduler.flush()
+            finally:
+                app_module.note_manager = saved
+            self.assertEqual([m["index"] for m in result["matches"]], [0, 1])
+            self.assertEqual([t.index for n in nm.notes for t in n.tasks], [0, 1])
+
+
+class _FakeRequest:
+    class app:
+        class state:
+            folder_id = None
+
+
+class NotesApiTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.nm = NoteManager(Path(self.tmp.name))
+        for i in range(5):
+            self.nm.add_note(f"n{i}", f"- [ ] task {i}\n")
+        self.nm.save()
+        self._saved = getattr(app_module, "note_manager", None)
+        app_module.note_manager = self.nm
+
+    def tearDown(self):
+        app_module.save_scheduler.flush()
+        app_module.note_manager = self._saved
+        self.tmp.cleanup()
+
+    def test_paged_notes_window(self):
+        page = asyncio.run(app_module.get_notes(offset=3, limit=10))
+        self.assertEqual(page["total"], 5)
+        self.assertEqual(page["count"], 2)
+        self.assertIsNone(page["next_offset"])
+        self.assertIn('id="note-3"', page["html"])
+        self.assertIn('id="note-4"', page["html"])
+        self.assertNotIn('id="note-2"', page["html"])
+
+        first = asyncio.run(app_module.get_notes(offset=0, limit=2))
+        self.assertEqual(first["next_offset"], 2)
+
+    def test_unpaged_notes_is_html(self):
+        resp = asyncio.run(app_module.get_notes())
+        body = resp.body.decode("utf-8")
+        self.assertEqual(body.count('class="notes-item'), 5)
+
+    def test_delete_publishes_task_shift(self):
+        async def run():
+            sub = app_module.event_bus.subscribe()
+            try:
+                await app_module.delete_note(note_index=1)
+                return await sub.next_event(1)
+            finally:
+                app_module.event_bus.unsubscribe(sub)
+
+        event = asyncio.run(run())
+        self.assertEqual(event["type"], "note_deleted")
+        data = event["data"]
+        self.assertEqual((data["note_index"], data["total"]), (1, 4))
+        # Note 1 held task 1; everything from index 2 shifts down by one.
+        self.assertEqual((data["task_from"], data["task_delta"]), (2, -1))
+        self.assertNotIn("html", data)
+        self.assertFalse(data["resync"])
+
+    def test_global_toggle_saves_deferred_edits_first(self):
+        registry = folders_module.FolderRegistry(db_path=Path(self.tmp.name) / "tasks.db")
+        saved_registry = getattr(app_module, "folder_registry", None)
+        saved_folder_id = getattr(app_module.app.state, "folder_id", None)
+        try:
+            folder_id = registry.add_folder(Path(self.tmp.name))["id"]
+            app_module.folder_registry, app_module.app.state.folder_id = registry, folder_id
+            task_id = next(t["id"] for t in registry.get_all_tasks() if t["text"] == "task 0")
+
+            async def run():
+                await app_module.delete_note(note_index=1)  # deferred: drops "task 3"
+                return await app_module.api_toggle_global_task(task_id)
+
+            self.assertTrue(asyncio.run(run())["completed"])
+            text = (Path(self.tmp.name) / "notes.md").read_text(encoding="utf-8")
+            self.assertNotIn("task 3", text)
+            self.assertIn("- [x] task 0", text)
+            self.assertTrue(self.nm.notes[-1].tasks[0].checked)
+            self.assertFalse(list(Path(self.tmp.name).glob("notes.md.conflict-*")))
+        finally:
+            app_module.folder_registry = saved_registry
+            app_module.app.state.folder_id = saved_folder_id
+            registry._conn.close()
+
+    def test_flush_route_writes_deferred_delete(self):
+        async def run():
+            await app_module.delete_note(note_index=0)
+            on_disk = (Path(self.tmp.name) / "notes.md").read_text(encoding="utf-8")
+            return on_disk, await app_module.flush_notes()
+
+        before, result = asyncio.run(run())
+        self.assertIn("task 4", before)  # delete only scheduled the write
+        self.assertEqual(result, {"status": "success", "saved": 1})
+        text = (Path(self.tmp.name) / "notes.md").read_text(encoding="utf-8")
+        self.assertEqual(text.count("<!-- note -->"), 3)
+        self.assertNotIn("task 4", text)
+
+
+def _asgi_get(path, headers=()):
+    """Drive the app with a bare ASGI GET; returns (status, headers, body)."""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": list(headers),
+        "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app_module.app(scope, receive, send))
+    start = sent[0]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return start["status"], dict(start["headers"]), body
+
+
+class WorkspaceTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.registry = folders_module.FolderRegistry(db_path=base / "tasks.db")
+        self.ids = []
+        for name in ("a", "b", "c"):
+            folder = base / name
+            folder.mkdir()
+            (folder / "notes.md").write_text(f"## 2024-01-01 00:00:00 - {name}\n\n- [ ] {name} task\n")
+            self.ids.append(self.registry.add_folder(folder)["id"])
+        self.unloaded = []
+        self.pool = workspaces.WorkspacePool(
+            self.registry,
+            load_manager=lambda fid, path: NoteManager(path),
+            unload_manager=self.unloaded.append,
+            max_resident=2,
+        )
+
+    def tearDown(self):
+        self.registry._conn.close()
+        self.tmp.cleanup()
+
+    def test_lru_evicts_least_recently_used(self):
+        a, b, c = self.ids
+        ws_a = self.pool.get(a)
+        self.pool.get(b)
+        self.assertIs(self.pool.get(a), ws_a)  # a is now most recent
+        self.pool.get(c)
+        self.assertEqual(self.pool.resident(), [a, c])
+        self.assertEqual([m.base_path.name for m in self.unloaded], ["b"])
+        self.assertIsNone(self.pool.get(9999))
+        self.pool.close()
+        self.assertEqual(self.pool.resident(), [])
+        self.assertEqual(len(self.unloaded), 3)
+
+    def test_cold_load_does_not_block_resident_folders(self):
+        a, b, _ = self.ids
+        ws_a = self.pool.get(a)
+        started, release = threading.Event(), threading.Event()
+        loads = []
+
+        def slow_load(fid, path):
+            loads.append(fid)
+            started.set()
+            release.wait(5)
+            return NoteManager(path)
+
+        self.pool.load_manager = slow_load
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.pool.get(b))) for _ in range(2)]
+        for t in threads:
+            t.start()
+        self.assertTrue(started.wait(5))
+        self.assertIs(self.pool.get(a), ws_a)  # answered while b is loading
+        release.set()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(loads, [b])  # concurrent gets share one load
+        self.assertIs(results[0], results[1])
+
+    def test_busy_folders_are_not_evicted(self):
+        a, b, c = self.ids
+        self.pool.busy = lambda manager: manager.base_path.name == "a"
+        self.pool.get(a)
+        self.pool.get(b)
+        self.pool.get(c)
+        self.assertEqual(self.pool.resident(), [a, c])
+        self.assertEqual([m.base_path.name for m in self.unloaded], ["b"])
+
+    def test_pinned_folder_is_never_loaded_or_evicted(self):
+        pinned = workspaces.Workspace(self.ids[0], Path(self.tmp.name) / "a", object())
+        pool = workspaces.WorkspacePool(self.registry, load_manager=self.fail_load,
+                                        max_resident=1, pinned=pinned)
+        self.assertIs(pool.get(self.ids[0]), pinned)
+        self.assertEqual(pool.resident(), [])
+
+    @staticmethod
+    def fail_load(fid, path):
+        raise AssertionError("pinned folder was loaded")
+
+    def test_routes_requests_by_folder_prefix(self):
+        app_module.app.state.workspaces = self.pool
+        try:
+            a, b, _ = self.ids
+            status, _, body = _asgi_get(f"/f/{b}/api/notes")
+            self.assertEqual(status, 200)
+            self.assertIn("b task", body.decode())
+            self.assertNotIn("a task", body.decode())
+            status, headers, _ = _asgi_get(f"/f/{a}")
+            self.assertEqual((status, headers[b"location"]), (307, f"/f/{a}/".encode()))
+            self.assertEqual(_asgi_get("/f/9999/api/notes")[0], 404)
+            self.assertIsNone(workspaces.current.get())
+        finally:
+            del app_module.app.state.workspaces
+
+    def test_events_are_scoped_to_folder(self):
+        bus = events_module.EventBus()
+
+        async def run():
+            sub = bus.subscribe(scope=2)
+            bus.publish("notes_changed", scope=1)
+            bus.publish("notes_changed", {"n": 2}, scope=2)
+            return await sub.next_event(1)
+
+        event = asyncio.run(run())
+        self.assertEqual((event["data"], event["scope"]), ({"n": 2}, 2))
+
+
+class ResponseTests(unittest.TestCase):
+    def test_encoding_negotiation_and_etags(self):
+        self.assertEqual(responses.choose_encoding("gzip, deflate"), "gzip")
+        self.assertIsNone(responses.choose_encoding("gzip;q=0, identity"))
+        self.assertIsNone(responses.choose_encoding(None))
+        self.assertTrue(responses.etag_matches('W/"a", "b"', '"a"'))
+        self.assertFalse(responses.etag_matches('"a"', '"b"'))
+
+    def test_encoded_body_revalidates(self):
+        page = responses.EncodedBody(b"<p>hi</p>" * 500, "text/html")
+        first = page.response({"accept-encoding": "gzip"})
+        self.assertEqual(first.headers["content-encoding"], "gzip")
+        self.assertEqual(gzip.decompress(first.body), b"<p>hi</p>" * 500)
+        again = page.response({"accept-encoding": "gzip", "if-none-match": first.headers["etag"]})
+        self.assertEqual(again.status_code, 304)
+        # The identity variant has its own ETag.
+        plain = page.response({"if-none-match": first.headers["etag"]})
+        self.assertEqual(plain.status_code, 200)
+
+    def test_main_page_cached_compressed_and_invalidated(self):
+        app_module.app.state.folder_path = Path("/tmp/nf-page-test")
+        try:
+            gz = [(b"accept-encoding", b"gzip")]
+            status, headers, body = _asgi_get("/", gz)
+            self.assertEqual((status, headers[b"content-encoding"]), (200, b"gzip"))
+            self.assertIn(b"/tmp/nf-page-test", gzip.decompress(body))
+            etag = headers[b"etag"]
+            self.assertEqual(_asgi_get("/", gz + [(b"if-none-match", etag)])[0], 304)
+            saved = app_module.FONT_SCALES
+            app_module.FONT_SCALES = dict(saved, notes=1.5)
+            try:
+                status, headers, _ = _asgi_get("/", gz + [(b"if-none-match", etag)])
+            finally:
+                app_module.FONT_SCALES = saved
+            self.assertEqual(status, 200)
+            self.assertNotEqual(headers[b"etag"], etag)
+        finally:
+            del app_module.app.state.folder_path
+            app_module._invalidate_page_cache()
+
+    def test_middleware_compresses_json_but_not_small_bodies(self):
+        gz = [(b"accept-encoding", b"gzip")]
+        status, headers, body = _asgi_get("/api/themes", gz)
+        self.assertEqual(status, 200)
+        self.assertNotIn(b"content-encoding", headers)  # under MIN_COMPRESS_SIZE
+        saved = responses.MIN_COMPRESS_SIZE
+        responses.MIN_COMPRESS_SIZE = 1
+        try:
+            status, headers, body = _asgi_get("/api/themes", gz)
+        finally:
+            responses.MIN_COMPRESS_SIZE = saved
+        self.assertEqual(headers[b"content-encoding"], b"gzip")
+        self.assertIn(b"dark-orange", gzip.decompress(body))
+
+    def test_middleware_leaves_files_and_ranges_alone(self):
+        from starlette.responses import FileResponse
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "a.txt"
+            path.write_text("abcdefgh" * 1000)
+            middleware = responses.CompressionMiddleware(FileResponse(path))
+            for extra in ([], [(b"range", b"bytes=0-4095")]):
+                scope = {"type": "http", "method": "GET", "path": "/a.txt",
+                         "headers": [(b"accept-encoding", b"gzip")] + extra}
+                sent = []
+
+                async def receive():  # no disconnect; FileResponse listens for one
+                    await asyncio.Event().wait()
+
+                async def send(message):
+                    sent.append(message)
+
+                asyncio.run(middleware(scope, receive, send))
+                start = sent[0]
+                self.assertIn(start["status"], (200, 206))
+                self.assertNotIn(b"content-encoding", dict(start["headers"]))
+                self.assertTrue(b"".join(m.get("body", b"") for m in sent[1:]).startswith(b"abcdefgh"))
+
+
+class GenerationETagTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.nm = NoteManager(self.base)
+        self.nm.add_note("a", "- [ ] one\n")
+        self._saved = getattr(app_module, "note_manager", None)
+        app_module.note_manager = self.nm
+
+    def tearDown(self):
+        app_module.save_scheduler.flush()
+        app_module.note_manager = self._saved
+        self.tmp.cleanup()
+
+    def test_generation_moves_on_edit_and_reload_not_save(self):
+        before = self.nm.generation
+        self.nm.update_task(0, True)
+        edited = self.nm.generation
+        self.assertNotEqual(edited, before)
+        self.nm.save()
+        self.assertEqual(self.nm.generation, edited)
+        self.nm.reload_if_changed(force=True)
+        self.assertNotEqual(self.nm.generation, edited)
+        # Values are process-unique, so two folders never share a tag.
+        self.assertNotEqual(NoteManager(self.base).generation, self.nm.generation)
+
+    def test_notes_and_tasks_answer_304_until_changed(self):
+        for path in ("/api/notes", "/api/tasks"):
+            status, headers, _ = _asgi_get(path)
+            etag = headers[b"etag"]
+            self.assertEqual(_asgi_get(path, [(b"if-none-match", etag)])[0], 304)
+        asyncio.run(app_module.update_note(note_index=0, title="a", content="- [x] one\n"))
+        self.assertEqual(_asgi_get("/api/tasks", [(b"if-none-match", etag)])[0], 200)
+
+    def test_registry_generation_sees_other_connections(self):
+        registry = folders_module.FolderRegistry(db_path=self.base / "tasks.db")
+        try:
+            before = registry.generation
+            other = sqlite3.connect(str(self.base / "tasks.db"))
+            other.execute("INSERT INTO folders (path, active) VALUES ('/elsewhere', 1)")
+            other.commit()
+            other.close()
+            self.assertNotEqual(registry.generation, before)
+            after_other = registry.generation
+            registry.add_folder(self.base)
+            self.assertNotEqual(registry.generation, after_other)
+        finally:
+            registry._conn.close()
+
+
+def _write_archive(sites, stamp, title, domain, url="", keywords=None, description=None):
+    name = f"{stamp}_{title}-{domain}.html"
+    (sites / name).write_text("<html>" + title + "</html>", encoding="utf-8")
+    (sites / name).with_suffix(".tags").write_text(
+        f"URL: {url}\nTitle: {title.replace('_', ' ')}\nTimestamp: x\n"
+        f"Keywords: {keywords or 'No keywords found'}\n"
+        f"Description: {description or 'No description found'}\n",
+        encoding="utf-8",
+    )
+    return name
+
+
+class ArchiveIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.sites = self.base / "assets" / "sites"
+        self.sites.mkdir(parents=True)
+        self.first = _write_archive(self.sites, "2024_01_02_030405", "Python_Docs", "docs.python.org",
+                                    url="https://docs.python.org/", keywords="python, docs")
+        self.second = _write_archive(self.sites, "2024_02_03_040506", "Rust_Book", "doc.rust-lang.org",
+                                     description="The Rust book")
+        (self.sites / "notes.txt").write_text("not an archive")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scans_once_then_loads_manifest(self):
+        index = archive_index.ArchiveIndex(self.base)
+        entries, total = index.query()
+        self.assertEqual(total, 2)
+        by_name = {e["filename"]: e for e in entries}
+        first = by_name[self.first]
+        self.assertEqual(first["domain"], "docs.python.org")
+        self.assertEqual(first["timestamp"], "2024-01-02 03:04:05")
+        self.assertEqual(first["title"], "Python Docs")
+        self.assertEqual(first["keywords"], ["python", "docs"])
+        self.assertEqual(by_name[self.second]["description"], "The Rust book")
+        self.assertEqual(by_name[self.second]["keywords"], [])
+        self.assertGreater(first["size"], 0)
+        self.assertTrue((self.base / "assets" / archive_index.MANIFEST_NAME).exists())
+
+        # A fresh index (next process) trusts the manifest: no file is re-parsed.
+        original = archive_index._entry_for
+        archive_index._entry_for = lambda *a: self.fail("re-parsed an indexed archive")
+        try:
+            self.assertEqual(archive_index.ArchiveIndex(self.base).query()[1], 2)
+        finally:
+            archive_index._entry_for = original
+
+    def test_add_remove_and_outside_changes(self):
+        index = archive_index.ArchiveIndex(self.base)
+        self.assertEqual(index.query()[1], 2)
+        third = _write_archive(self.sites, "2024_03_04_050607", "News", "example.com")
+        self.assertEqual(index.add(third)["domain"], "example.com")
+        (self.sites / self.first).unlink()
+        index.remove(self.first)
+        self.assertEqual(sorted(e["filename"] for e in index.query()[0]), sorted([self.second, third]))
+        # A file removed behind our back is noticed via the directory mtime.
+        (self.sites / third).unlink()
+        os.utime(self.sites, ns=(time.time_ns(), time.time_ns() + 10**9))
+        self.assertEqual([e["filename"] for e in index.query()[0]], [self.second])
+
+    def test_tags_written_after_indexing_are_picked_up(self):
+        index = archive_index.ArchiveIndex(self.base)
+        self.assertEqual(index.query()[1], 2)
+        # Another process's archive, caught between its .html and .tags.
+        third = _write_archive(self.sites, "2024_03_04_050607", "News", "example.com",
+                               description="Headlines")
+        tags = (self.sites / third).with_suffix(".tags")
+        content = tags.read_text(encoding="utf-8")
+        tags.unlink()
+        os.utime(self.sites, ns=(time.time_ns(), time.time_ns() + 10**9))
+        entry = next(e for e in index.query()[0] if e["filename"] == third)
+        self.assertEqual(entry["description"], "")
+        tags.write_text(content, encoding="utf-8")
+        os.utime(self.sites, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+        entry = next(e for e in index.query()[0] if e["filename"] == third)
+        self.assertEqual((entry["title"], entry["description"]), ("News", "Headlines"))
+
+    def test_links_api_filters_and_pages(self):
+        _write_archive(self.sites, "2024_01_05_000000", "More_Docs", "docs.python.org")
+        page = app_module._archived_links(self.base, limit=2)
+        self.assertEqual((page["total"], page["count"], page["next_offset"]), (3, 2, 2))
+        # Sorted by domain, then time.
+        self.assertIn("doc.rust-lang.org", page["html"])
+        rest = app_module._archived_links(self.base, offset=2, limit=2)
+        self.assertEqual((rest["count"], rest["next_offset"]), (1, None))
+        self.assertIn("More_Docs", rest["html"])
+
+        by_keyword = app_module._archived_links(self.base, q="PYTHON")
+        self.assertEqual(by_keyword["total"], 2)
+        by_description = app_module._archived_links(self.base, q="rust book")
+        self.assertEqual(by_description["total"], 1)
+        by_domain = app_module._archived_links(self.base, domain="docs.python.org")
+        self.assertEqual(by_domain["total"], 2)
+        self.assertEqual(by_domain["markdown"].count("/assets/sites/"), 2)
+
+
+class EventBusTests(unittest.TestCase):
+    def test_publish_from_thread_and_resume(self):
+        bus = events_module.EventBus(history_size=4)
+
+        async def run():
+            sub = bus.subscribe()
+            t = threading.Thread(target=bus.publish, args=("note_added", {"note_index": 0}))
+            t.start()
+            t.join()
+            first = await sub.next_event(1)
+            bus.unsubscribe(sub)
+            bus.publish("task_toggled", {"task_index": 3})
+            # A client reconnecting with Last-Event-ID gets what it missed.
+            resumed = bus.subscribe(str(first["id"]))
+            missed = await resumed.next_event(1)
+            for _ in range(6):
+                bus.publish("note_updated")
+            # Too far behind the history window → single resync.
+            stale = bus.subscribe(str(first["id"]))
+            return first, missed, await stale.next_event(1)
+
+        first, missed, stale = asyncio.run(run())
+        self.assertEqual(first["type"], "note_added")
+        self.assertEqual(missed["data"], {"task_index": 3})
+        self.assertEqual(stale["type"], "resync")
+        self.assertIn("event: note_added", events_module.format_sse(first))
+
+    def test_ids_from_an_earlier_run_force_a_resync(self):
+        old_run = events_module.EventBus()
+        for _ in range(5):
+            stale_id = old_run.publish("note_updated")["id"]
+        bus = events_module.EventBus()
+
+        async def run():
+            first = []
+            # Empty history: the tab's id can't be ours.
+            first.append(await bus.subscribe(stale_id).next_event(0.1))
+            bus.publish("note_added")
+            for last in (stale_id, "5", f"{bus.boot_id}-9"):
+                first.append(await bus.subscribe(last).next_event(0.1))
+            current = await bus.subscribe(f"{bus.boot_id}-1").next_event(0.1)
+            return first, current
+
+        first, current = asyncio.run(run())
+        self.assertEqual([e["type"] for e in first], ["resync"] * 4)
+        self.assertIsNone(current)  # up to date: nothing to replay
+
+
+class RenderCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Path(self.tmp.name) / "render.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_keyed_on_version_and_tasks(self):
+        cache = render_cache_module.RenderCache("v1", db_path=self.db)
+        cache.put("**hi**", (0,), "<p>hi</p>")
+        self.assertEqual(cache.get("**hi**", (0,)), "<p>hi</p>")
+        self.assertIsNone(cache.get("**hi**", (3,)))
+        # Survives a reopen (cold start), but not a renderer version bump.
+        reopened = render_cache_module.RenderCache("v1", db_path=self.db)
+        self.assertEqual(reopened.get("**hi**", (0,)), "<p>hi</p>")
+        bumped = render_cache_module.RenderCache("v2", db_path=self.db)
+        self.assertIsNone(bumped.get("**hi**", (0,)))
+
+    def test_eviction_bounds_size(self):
+        cache = render_cache_module.RenderCache("v1", db_path=self.db, max_bytes=1000)
+        for i in range(20):
+            cache.put(f"note {i}", (), "x" * 100)
+        self.assertLessEqual(cache.total_bytes, 1000)
+        self.assertEqual(cache.get("note 19", ()), "x" * 100)
+        self.assertIsNone(cache.get("note 0", ()))
+
+    def test_note_render_uses_persistent_cache(self):
+        cache = render_cache_module.RenderCache("v1", db_path=self.db)
+        nm = NoteManager(Path(self.tmp.name))
+        nm.add_note("", "plain text\n")
+        set_task_lookup(nm.build_task_lookup())
+        cache.put(nm.notes[0].content, nm.notes[0]._task_key(), "<p>cached</p>")
+        app_module.set_render_cache(cache)
+        try:
+            self.assertEqual(nm.notes[0].rendered_html(), "<p>cached</p>")
+        finally:
+            app_module.set_render_cache(None)
+
+
 class MarkdownTests(unittest.TestCase):
     def test_bullet_lookalike_normalized(self):
         src = "• item one\n– item two\n"
@@ -159,6 +989,895 @@ class FoldersExtractTests(unittest.TestCase):
         self.assertTrue(any("done task" in t for t in texts))
         self.assertFalse(any("fake in code" in t for t in texts))
 
+    def test_task_ending_in_inline_code_is_kept(self):
+        tasks = folders_module.FolderRegistry._extract_tasks(
+            "- [ ] run `make test`\n- [ ] `[ ]` literal brackets\n"
+        )
+        self.assertEqual([t["line_number"] for t in tasks], [1, 2])
+
+    def test_fence_rules(self):
+        content = (
+            "````md\n"
+            "```\n"
+            "- [ ] nested fence is still code\n"
+            "````\n"
+            "- [ ] after fence\n"
+            "  ~~~\n"
+            "  - [ ] indented fence in a list item\n"
+            "  ~~~\n"
+            "```\n"
+            "- [ ] unclosed fence runs to the end\n"
+        )
+        tasks = folders_module.FolderRegistry._extract_tasks(content)
+        self.assertEqual([t["content"] for t in tasks], ["- [ ] after fence"])
+        kinds = [t.kind for t in folders_module.scan_markdown(content)]
+        self.assertEqual(kinds, ["code", "checkbox", "code", "code"])
+
+    def test_deeply_indented_fence_is_not_a_fence(self):
+        # Four spaces or a tab make an indented code line, not a fence.
+        content = "    ```\n- [ ] one\n\t~~~\n- [ ] two\n"
+        tasks = folders_module.FolderRegistry._extract_tasks(content)
+        self.assertEqual([t["content"] for t in tasks], ["- [ ] one", "- [ ] two"])
+
+    def test_note_and_registry_agree(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            nm = NoteManager(Path(tmp))
+            body = ("- [ ] a `code [x]` tail\n```\n- [ ] no\n```\n"
+                    "- [x] b [ ] inline second box\n")
+            nm.add_note("t", body)
+            note = nm.notes[0]
+            self.assertEqual([t.text for t in note.tasks], [
+                "[ ] a `code [x]` tail", "[x] b [ ] inline second box", "[ ] inline second box",
+            ])
+            registry_tasks = folders_module.FolderRegistry._extract_tasks(body)
+            self.assertEqual(len(registry_tasks), 2)
+
+
+class FoldersSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.folder = base / "proj"
+        self.folder.mkdir()
+        self.notes = self.folder / "notes.md"
+        self.notes.write_text("## 2024-01-01 00:00:00 - a\n\n- [ ] one\n- [ ] two\n")
+        self._age(self.notes)
+        self.registry = folders_module.FolderRegistry(db_path=base / "tasks.db")
+        self.folder_id = self.registry.add_folder(self.folder)["id"]
+
+    def tearDown(self):
+        self.registry._conn.close()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _age(path, seconds=60):
+        past = time.time_ns() - seconds * 1_000_000_000
+        os.utime(path, ns=(past, past))
+
+    def _forbid_extract(self):
+        def boom(content):
+            raise AssertionError("unchanged notes.md was re-parsed")
+        self.registry._extract_tasks = boom
+
+    def test_unchanged_and_touched_files_skip_parse(self):
+        self._forbid_extract()
+        self.assertEqual(self.registry.sync_folder(self.folder_id), 2)
+        # Same content, new mtime: one read + hash, still no parse.
+        self._age(self.notes, seconds=30)
+        self.assertEqual(self.registry.sync_folder(self.folder_id), 2)
+
+    def test_changed_file_resyncs_in_one_pass(self):
+        self.notes.write_text("## 2024-01-01 00:00:00 - a\n\n- [x] one\n- [ ] three\n")
+        self.assertEqual(self.registry.sync_folder(self.folder_id), 2)
+        rows = self.registry._conn.execute(
+            "SELECT content, completed FROM tasks WHERE folder_id = ? ORDER BY line_number",
+            (self.folder_id,),
+        ).fetchall()
+        self.assertEqual([(r[0], r[1]) for r in rows], [("- [x] one", 1), ("- [ ] three", 0)])
+
+    def test_migrates_old_folders_table(self):
+        db = Path(self.tmp.name) / "old.db"
+        conn = sqlite3.connect(db)
+        conn.execute("CREATE TABLE folders (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                     "path TEXT NOT NULL UNIQUE, last_scan TIMESTAMP, "
+                     "active INTEGER NOT NULL DEFAULT 1)")
+        conn.commit()
+        conn.close()
+        registry = folders_module.FolderRegistry(db_path=db)
+        self.addCleanup(registry._conn.close)
+        folder_id = registry.add_folder(self.folder)["id"]
+        row = registry._conn.execute(
+            "SELECT task_count, content_hash FROM folders WHERE id = ?", (folder_id,)
+        ).fetchone()
+        self.assertEqual(row["task_count"], 2)
+        self.assertTrue(row["content_hash"])
+
+    def test_parallel_sync_all_matches_serial_and_reports_stats(self):
+        base = Path(self.tmp.name)
+        for i in range(6):
+            folder = base / f"p{i}"
+            folder.mkdir()
+            (folder / "notes.md").write_text(
+                "## 2024-01-01 00:00:00 - x\n\n" + "".join(f"- [ ] t{j}\n" for j in range(i))
+            )
+            self.registry.add_folder(folder)
+        self.registry._conn.execute("UPDATE folders SET task_count = NULL")
+        self.assertEqual(self.registry.sync_all(workers=4), 2 + sum(range(6)))
+        stats = self.registry.last_sync_stats
+        self.assertEqual(len(stats), 7)
+        self.assertTrue(all(s["status"] == "changed" for s in stats))
+        self.assertTrue(all(s["scan_ms"] is not None and s["write_ms"] is not None
+                            for s in stats))
+        self.assertEqual(self.registry.sync_all(workers=1), 2 + sum(range(6)))
+        self.assertNotIn("changed", {s["status"] for s in self.registry.last_sync_stats})
+
+
+class FoldersSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.folder = base / "proj"
+        self.folder.mkdir()
+        sep = folders_module.NOTE_SEPARATOR
+        (self.folder / "notes.md").write_text(sep.join([
+            "## 2024-01-02 00:00:00 - Physics\n\nSchrödinger's cat is both\n",
+            "## 2024-01-01 00:00:00 - Groceries\n\nbuy catnip and milk\n",
+        ]), encoding="utf-8")
+        self.registry = folders_module.FolderRegistry(db_path=base / "tasks.db")
+        self.folder_id = self.registry.add_folder(self.folder)["id"]
+
+    def tearDown(self):
+        self.registry._conn.close()
+        self.tmp.cleanup()
+
+    def test_prefix_search_ranks_and_indexes(self):
+        if not self.registry.fts_enabled:
+            self.skipTest("SQLite built without FTS5")
+        hits = self.registry.search_folder(self.folder_id, "cat")
+        self.assertEqual(sorted(h["note_index"] for h in hits), [0, 1])
+        hits = self.registry.search_folder(self.folder_id, "schrodinger")
+        self.assertEqual([h["note_index"] for h in hits], [0])
+        self.assertIn("cat", hits[0]["snippet"])
+
+    def test_search_all_groups_and_sees_edits(self):
+        results = self.registry.search_all("milk")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["matches"][0]["note_title"], "Groceries")
+        # Index refreshes on the next query after notes.md changes.
+        path = self.folder / "notes.md"
+        path.write_text(path.read_text(encoding="utf-8").replace("milk", "bread"),
+                        encoding="utf-8")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10_000_000))
+        self.assertEqual(self.registry.search_all("milk"), [])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.registry.search_all('"unbalanced -quote*'), [])
+
+    def test_readers_never_see_a_sync_in_progress(self):
+        if not self.registry.fts_enabled:
+            self.skipTest("SQLite built without FTS5")
+        mid_scan, release = threading.Event(), threading.Event()
+
+        class PausingConnection:
+            """Holds _apply_scan between deleting and re-inserting notes."""
+            def __init__(self, conn):
+                self._conn = conn
+
+            def executemany(self, sql, rows):
+                if sql.startswith("INSERT INTO notes"):
+                    mid_scan.set()
+                    release.wait(5)
+                return self._conn.executemany(sql, rows)
+
+            def __getattr__(self, name):
+                return getattr(self._conn, name)
+
+        conn = self.registry._conn
+        self.registry._conn = PausingConnection(conn)
+        path = self.folder / "notes.md"
+        path.write_text(path.read_text(encoding="utf-8") + "\n- [ ] feed the cat\n",
+                        encoding="utf-8")
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10_000_000))
+        syncer = threading.Thread(target=self.registry.sync_folder, args=(self.folder_id,))
+        seen = {}
+
+        def read():
+            seen["hits"] = self.registry._fts_search("cat", folder_id=self.folder_id)
+            seen["tasks"] = self.registry.get_all_tasks()
+
+        reader = threading.Thread(target=read)
+        try:
+            syncer.start()
+            self.assertTrue(mid_scan.wait(5))
+            reader.start()
+            reader.join(0.3)
+            self.assertTrue(reader.is_alive())  # waiting for the sync to commit
+        finally:
+            release.set()
+            syncer.join(5)
+            if reader.is_alive():
+                reader.join(5)
+            self.registry._conn = conn
+        self.assertEqual(sorted(h["note_index"] for h in seen["hits"]), [0, 1])
+        self.assertEqual([t["text"] for t in seen["tasks"]], ["feed the cat"])
+
+
+class WatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.watchers = []
+
+    def tearDown(self):
+        for w in self.watchers:
+            w.stop()
+        self.tmp.cleanup()
+
+    def _watcher(self, **kwargs):
+        w = watcher_module.FileWatcher(poll_interval=0.05, **kwargs)
+        self.watchers.append(w)
+        w.start()
+        return w
+
+    def _assert_sees_atomic_replace(self, w):
+        path = self.base / "notes.md"
+        path.write_text("one")
+        fired = threading.Event()
+        w.watch(path, lambda _p: fired.set())
+        time.sleep(0.1)
+        tmp = path.with_suffix(".md.tmp")
+        tmp.write_text("two, longer")
+        os.replace(tmp, path)
+        self.assertTrue(fired.wait(3), f"{w.backend} watcher missed the change")
+
+    def test_polling_backend(self):
+        w = self._watcher(force_polling=True)
+        self.assertEqual(w.backend, "polling")
+        self._assert_sees_atomic_replace(w)
+
+    def test_native_backend(self):
+        w = self._watcher()
+        if w.backend != "inotify":
+            self.skipTest("inotify unavailable")
+        self._assert_sees_atomic_replace(w)
+
+    def test_note_manager_skips_stat_until_event(self):
+        w = self._watcher(force_polling=True)
+        nm = NoteManager(self.base)
+        nm.attach_watcher(w)
+        self.assertFalse(nm.disk_changed())  # clears the initial flag
+        self.assertFalse(nm._disk_event)
+        (self.base / "notes.md").write_text("## 2024-01-01 00:00:00 - x\n\nbody\n")
+        os.utime(self.base / "notes.md", ns=(time.time_ns(), time.time_ns() + 10_000_000))
+        deadline = time.time() + 3
+        while not nm._disk_event and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertTrue(nm.disk_changed())
+        self.assertTrue(nm.reload_if_changed())
+        self.assertEqual(len(nm.notes), 1)
+
+    def test_event_during_stat_is_not_lost(self):
+        nm = NoteManager(self.base)
+        nm._watched = True
+        self.assertFalse(nm.disk_changed())  # clears the initial flag
+
+        def stat_racing_an_event():
+            nm._on_disk_event(self.base / "notes.md")  # lands mid-check
+            return False
+
+        nm._disk_newer = stat_racing_an_event
+        nm._on_disk_event(self.base / "notes.md")  # e.g. our own save
+        self.assertFalse(nm.disk_changed())
+        self.assertTrue(nm._disk_event)  # still armed for the next check
+
+    def test_registry_resyncs_on_change(self):
+        folder = self.base / "proj"
+        folder.mkdir()
+        (folder / "notes.md").write_text("## 2024-01-01 00:00:00 - a\n\n- [ ] first\n")
+        registry = folders_module.FolderRegistry(db_path=self.base / "tasks.db")
+        self.addCleanup(registry._conn.close)
+        self.addCleanup(registry.stop_background_sync)
+        w = self._watcher(force_polling=True)
+        registry.start_background_sync(watcher=w)
+        folder_id = registry.add_folder(folder)["id"]
+        time.sleep(0.1)
+        (folder / "notes.md").write_text(
+            "## 2024-01-01 00:00:00 - a\n\n- [ ] first\n- [ ] second\n"
+        )
+        deadline = time.time() + 3
+        count = 0
+        while time.time() < deadline:
+            count = registry._conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE folder_id = ?", (folder_id,)
+            ).fetchone()[0]
+            if count == 2:
+                break
+            time.sleep(0.02)
+        self.assertEqual(count, 2)
+
+    def test_registry_sync_runs_off_the_watcher_thread(self):
+        folder = self.base / "proj"
+        folder.mkdir()
+        registry = folders_module.FolderRegistry(db_path=self.base / "tasks.db")
+        self.addCleanup(registry._conn.close)
+        folder_id = registry.add_folder(folder)["id"]
+        registry._watcher = watcher_module.FileWatcher(force_polling=True)
+        registry._watch_folder(folder_id, folder)
+        on_change = registry._watches[folder_id][1]
+        started, release, calls = threading.Event(), threading.Event(), []
+
+        def slow_sync(fid):
+            calls.append(threading.current_thread().name)
+            started.set()
+            release.wait(5)
+
+        registry.sync_folder = slow_sync
+        try:
+            begin = time.perf_counter()
+            on_change(folder / "notes.md")
+            self.assertTrue(started.wait(5))
+            # Two more events while it runs: one follow-up sync covers both.
+            on_change(folder / "notes.md")
+            on_change(folder / "notes.md")
+            self.assertLess(time.perf_counter() - begin, 1)
+        finally:
+            release.set()
+        deadline = time.time() + 3
+        while len(calls) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.1)
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(all(name.startswith("noteflow-db") for name in calls))
+
+
+class _FakeResponse:
+    def __init__(self, body, content_type, headers=None, status_code=None):
+        self.status_code = status_code or (200 if body is not None else 404)
+        self.ok = self.status_code < 400
+        self.body = body or b""
+        self.headers = {"content-type": content_type, "content-length": str(len(self.body))}
+        self.headers.update(headers or {})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+
+class _FakeSession:
+    def __init__(self, resources):
+        self.resources = resources
+        self.fetched = []
+
+    def get(self, url, timeout=None, stream=False, headers=None):
+        self.fetched.append(url)
+        body, content_type = self.resources.get(url, (None, ""))
+        return _FakeResponse(body, content_type)
+
+
+class StreamingArchiveTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.spool = archiver.ResourceSpool()
+
+    def tearDown(self):
+        self.spool.close()
+        self.tmp.cleanup()
+
+    def test_inlined_page_streams_resources_into_file(self):
+        import base64
+        from bs4 import BeautifulSoup
+
+        image = os.urandom(3 * archiver.CHUNK_SIZE + 7)
+        session = _FakeSession({
+            "https://x.test/a.png": (image, "image/png"),
+            "https://x.test/app.js": (b"let ok = 1 && 2;", "text/javascript"),
+            "https://x.test/s.css": (b"body { background: url('bg.gif'); }", "text/css"),
+            "https://x.test/bg.gif": (b"GIF89a", "image/gif"),
+        })
+        soup = BeautifulSoup(
+            '<html><head><link rel="stylesheet" href="/s.css"><script src="/app.js"></script></head>'
+            '<body><img src="/a.png"><img src="/a.png"><img src="/missing.png"></body></html>',
+            "html.parser",
+        )
+        archiver.inline_html_resources(session, soup, "https://x.test/", self.spool)
+        document = str(soup)
+        # The tree carries placeholders, not base64.
+        self.assertLess(len(document), 1000)
+        self.assertEqual(session.fetched.count("https://x.test/a.png"), 1)
+
+        dest = self.base / "out.html"
+        archiver.write_archive(document, self.spool, dest)
+        out = dest.read_text(encoding="utf-8")
+        self.assertEqual(out.count("data:image/png;base64," + base64.b64encode(image).decode()), 2)
+        self.assertIn("let ok = 1 && 2;", out)
+        self.assertIn("url(data:image/gif;base64," + base64.b64encode(b"GIF89a").decode() + ")", out)
+        self.assertIn('src="/missing.png"', out)
+        self.assertIsNone(self.spool.token_re.search(out))
+        self.assertFalse((self.base / "out.html.part").exists())
+
+    def test_placeholder_split_across_chunks(self):
+        path = self.spool.store_text("hello")
+        token = self.spool.text(path)
+        text = "<p>" + token + "</p>"
+        out = self.base / "out.bin"
+        for cut in range(1, len(text)):
+            with open(out, "wb") as f:
+                archiver._expand([text[:cut], text[cut:]], self.spool, f)
+            self.assertEqual(out.read_text(), "<p>hello</p>")
+
+    def test_oversized_resource_is_dropped(self):
+        session = _FakeSession({"https://x.test/big": (b"x" * 10, "text/plain")})
+        original = archiver.MAX_RESOURCE_BYTES
+        archiver.MAX_RESOURCE_BYTES = 5
+        try:
+            dest = self.spool.new_file()
+            self.assertEqual(archiver._fetch_one(session, "https://x.test/big", dest), (None, None))
+            self.assertFalse(dest.exists())
+        finally:
+            archiver.MAX_RESOURCE_BYTES = original
+
+    def test_external_output_stamped_without_reparse(self):
+        src = self.base / "in.html"
+        src.write_bytes(b"<html><head>" + b"x" * 300 + b'</head><body class="a">' + b"y" * 300 + b"</body></html>")
+        original = archiver.CHUNK_SIZE
+        archiver.CHUNK_SIZE = 16  # force the <body> tag across a chunk boundary
+        try:
+            archiver._copy_with_stamp(src, self.base / "out.html", b"<div>STAMP</div>")
+        finally:
+            archiver.CHUNK_SIZE = original
+        out = (self.base / "out.html").read_bytes()
+        self.assertEqual(out, src.read_bytes().replace(b'<body class="a">', b'<body class="a"><div>STAMP</div>'))
+
+
+class _SlowSession(_FakeSession):
+    """_FakeSession with per-request latency, tracking peak concurrency."""
+
+    def __init__(self, resources, delay):
+        super().__init__(resources)
+        self.delay = delay
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout=None, stream=False, headers=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return super().get(url, timeout=timeout, stream=stream, headers=headers)
+
+
+class PrefetchPlannerTests(unittest.TestCase):
+    def setUp(self):
+        self.spool = archiver.ResourceSpool()
+
+    def tearDown(self):
+        self.spool.close()
+
+    def test_css_subresources_prefetched_in_parallel(self):
+        fonts = {f"https://x.test/css/f{i}.woff2": (b"font%d" % i, "font/woff2") for i in range(6)}
+        faces = "".join(f"@font-face {{ src: url('f{i}.woff2'); }}" for i in range(6))
+        session = _SlowSession({
+            "https://x.test/main.css": (b'@import "css/theme.css"; body { color: red; }', "text/css"),
+            "https://x.test/css/theme.css": (faces.encode(), "text/css"),
+            **fonts,
+        }, delay=0.15)
+        start = time.perf_counter()
+        archiver.prefetch(session, ["https://x.test/main.css"], self.spool, time.time() + 10)
+        # main.css -> theme.css -> six fonts at once: three round trips, not eight.
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertGreaterEqual(session.peak, 6)
+        for url in fonts:
+            self.assertIsNotNone(self.spool[url][0])
+
+        # The inliner then finds everything in the spool.
+        before = len(session.fetched)
+        archiver.inline_css_resources(session, '@import "css/theme.css";',
+                                      "https://x.test/main.css", self.spool)
+        self.assertEqual(len(session.fetched), before)
+
+    def test_discovered_urls_capped_and_deadline_respected(self):
+        refs = "".join(f"a{i} {{ background: url(/i{i}.png); }}" for i in range(10))
+        session = _SlowSession({
+            "https://x.test/s.css": (refs.encode(), "text/css"),
+            **{f"https://x.test/i{i}.png": (b"png", "image/png") for i in range(10)},
+        }, delay=0.05)
+        original = archiver.MAX_CSS_PREFETCH
+        archiver.MAX_CSS_PREFETCH = 4
+        try:
+            archiver.prefetch(session, ["https://x.test/s.css"], self.spool, time.time() + 10)
+        finally:
+            archiver.MAX_CSS_PREFETCH = original
+        self.assertEqual(len(session.fetched), 5)
+
+        slow = _SlowSession({"https://y.test/a.png": (b"png", "image/png")}, delay=1.0)
+        start = time.perf_counter()
+        archiver.prefetch(slow, ["https://y.test/a.png"], self.spool, time.time() + 0.2)
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(self.spool["https://y.test/a.png"], (None, None))
+
+
+class BlobArchiveTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.sites = Path(self.tmp.name) / "assets" / "sites"
+        self.sites.mkdir(parents=True)
+        self.blob_dir = self.sites / archiver.BLOB_DIR_NAME
+        self.session = _FakeSession({
+            "https://x.test/font.woff2": (b"FONT" * 1000, "font/woff2"),
+            "https://x.test/s.css": (b"@font-face { src: url('font.woff2'); }", "text/css"),
+            "https://x.test/app.js": (b"console.log(1);", "application/javascript"),
+            "https://x.test/a.png": (b"PNGDATA", "image/png"),
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _archive(self, name):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(
+            '<html><head><link rel="stylesheet" href="/s.css"><script src="/app.js"></script></head>'
+            '<body><img src="/a.png"></body></html>', "html.parser")
+        spool = archiver.ResourceSpool(blob_dir=self.blob_dir)
+        try:
+            archiver.inline_html_resources(self.session, soup, "https://x.test/", spool)
+            archiver.write_archive(str(soup), spool, self.sites / name)
+        finally:
+            spool.close()
+        return self.sites / name
+
+    def test_repeat_archives_share_blobs_and_export_to_single_file(self):
+        first = self._archive("2024_01_01_000000_A-x.test.html")
+        blobs = sorted(p.name for p in self.blob_dir.iterdir())
+        self.assertEqual(len(blobs), 4)
+        self._archive("2024_01_02_000000_B-x.test.html")
+        self.assertEqual(sorted(p.name for p in self.blob_dir.iterdir()), blobs)
+
+        html_text = first.read_text()
+        css_name = next(n for n in blobs if n.endswith(".css"))
+        self.assertIn(f'href="blobs/{css_name}"', html_text)
+        self.assertIn('<script src="blobs/', html_text)
+        # The stylesheet refers to the font relative to the blob directory.
+        font_name = next(n for n in blobs if n not in html_text)
+        self.assertIn(f"url({font_name})", (self.blob_dir / css_name).read_text())
+
+        exported = self.sites.parent / "export.html"
+        archiver.export_archive(first, exported)
+        out = exported.read_text()
+        self.assertNotIn("blobs/", out)
+        self.assertIn("console.log(1);", out)
+        self.assertIn("<style>@font-face { src: url(data:font/woff2;base64,", out)
+        self.assertIn('src="data:image/png;base64,', out)
+
+    def test_collect_blobs_keeps_referenced_and_recent(self):
+        first = self._archive("2024_01_01_000000_A-x.test.html")
+        orphan = self.blob_dir / ("0" * 64 + ".bin")
+        orphan.write_bytes(b"old")
+        self.assertEqual(archiver.collect_blobs(self.sites, grace=3600), 0)
+        self.assertEqual(archiver.collect_blobs(self.sites, grace=-1), 1)
+        self.assertFalse(orphan.exists())
+        self.assertEqual(len(list(self.blob_dir.iterdir())), 4)
+        first.unlink()
+        self.assertEqual(archiver.collect_blobs(self.sites, grace=-1), 4)
+
+    def test_collect_blobs_reads_index_not_archives(self):
+        first = self._archive("2024_01_01_000000_A-x.test.html")
+        index = archive_index.get_index(self.sites.parent.parent)
+        self.assertEqual(len(index.blob_refs()), 3)  # the font is behind the stylesheet
+        (self.blob_dir / ("0" * 64 + ".bin")).write_bytes(b"old")
+        scanned = []
+        original = archive_index.scan_blob_refs
+
+        def tracking_scan(path):
+            scanned.append(path.name)
+            return original(path)
+
+        archive_index.scan_blob_refs = tracking_scan
+        try:
+            self.assertEqual(archiver.collect_blobs(self.sites, grace=-1), 1)
+        finally:
+            archive_index.scan_blob_refs = original
+        self.assertNotIn(first.name, scanned)
+        self.assertTrue(all(name.endswith(".css") for name in scanned))
+
+
+class _ValidatingSession(_FakeSession):
+    """Serves each resource with an ETag and answers matching If-None-Match with 304."""
+
+    def __init__(self, resources, cache_control):
+        super().__init__(resources)
+        self.cache_control = cache_control
+        self.http_cache = None
+
+    def get(self, url, timeout=None, stream=False, headers=None):
+        self.fetched.append(url)
+        body, content_type = self.resources[url]
+        etag = '"%s"' % len(body)
+        extra = {"etag": etag, "cache-control": self.cache_control}
+        if (headers or {}).get("If-None-Match") == etag:
+            return _FakeResponse(b"", content_type, extra, status_code=304)
+        return _FakeResponse(body, content_type, extra)
+
+
+class HttpCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.cache = http_cache.HttpCache(self.base / "cache", max_bytes=1000)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def _fetch(self, session, url):
+        path, ctype = archiver._fetch_one(session, url, self.base / "out")
+        return path.read_bytes() if path else None
+
+    def test_freshness_lifetime(self):
+        lifetime = http_cache.freshness_lifetime
+        self.assertEqual(lifetime({"cache-control": "public, max-age=600"}), 600)
+        self.assertEqual(lifetime({"cache-control": "max-age=600", "age": "100"}), 500)
+        self.assertEqual(lifetime({"cache-control": "s-maxage=60, max-age=600"}), 60)
+        self.assertIsNone(lifetime({"cache-control": "no-store"}))
+        self.assertEqual(lifetime({"cache-control": "no-cache, max-age=600"}), 0)
+        self.assertEqual(lifetime({"date": "Mon, 01 Jan 2024 00:00:00 GMT",
+                                   "expires": "Mon, 01 Jan 2024 01:00:00 GMT"}), 3600)
+        self.assertEqual(lifetime({"date": "Mon, 11 Jan 2024 00:00:00 GMT",
+                                   "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+                         http_cache.HEURISTIC_MAX)
+        self.assertEqual(lifetime({}), 0)
+
+    def test_fresh_hit_skips_network(self):
+        session = _ValidatingSession({"https://x.test/a.css": (b"body{}", "text/css")}, "max-age=600")
+        session.http_cache = self.cache
+        self.assertEqual(self._fetch(session, "https://x.test/a.css"), b"body{}")
+        self.assertEqual(self._fetch(session, "https://x.test/a.css"), b"body{}")
+        self.assertEqual(len(session.fetched), 1)
+
+    def test_stale_entry_revalidated_with_etag(self):
+        session = _ValidatingSession({"https://x.test/a.png": (b"PNG", "image/png")}, "no-cache")
+        session.http_cache = self.cache
+        self.assertEqual(self._fetch(session, "https://x.test/a.png"), b"PNG")
+        # Stale: revalidated, answered 304, body served from the cache.
+        self.assertEqual(self._fetch(session, "https://x.test/a.png"), b"PNG")
+        self.assertEqual(len(session.fetched), 2)
+        # no-store responses are never kept.
+        session.cache_control = "no-store"
+        self.cache.remove("https://x.test/a.png")
+        self._fetch(session, "https://x.test/a.png")
+        self.assertIsNone(self.cache.lookup("https://x.test/a.png"))
+
+    def test_lru_eviction(self):
+        src = self.base / "body"
+        src.write_bytes(b"x" * 400)
+        headers = {"cache-control": "max-age=60"}
+        for name in ("a", "b", "c"):
+            self.cache.store(f"https://x.test/{name}", src, headers)
+            time.sleep(0.01)
+            if name == "b":
+                self.cache.lookup("https://x.test/a")  # a is now more recent than b
+        self.assertLessEqual(self.cache.total_bytes(), 1000)
+        self.assertIsNotNone(self.cache.lookup("https://x.test/a"))
+        self.assertIsNone(self.cache.lookup("https://x.test/b"))
+        self.assertIsNotNone(self.cache.lookup("https://x.test/c"))
+        self.assertEqual(len([p for p in (self.base / "cache").iterdir() if len(p.name) == 64]), 2)
+
+
+class PlusLinksTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self._original = archiver.archive_website
+        self._deadline = archiver.PLUS_LINKS_DEADLINE
+
+        def fake_archive(url, folder_path):
+            self.calls.append(url)
+            time.sleep(0.6 if "slow" in url else 0.3)
+            if "broken" in url:
+                return None
+            return {"html": f"<a>{url}</a>", "markdown": f"[{url}]"}
+
+        archiver.archive_website = fake_archive
+
+    def tearDown(self):
+        archiver.archive_website = self._original
+        archiver.PLUS_LINKS_DEADLINE = self._deadline
+
+    def test_links_archived_concurrently_and_spliced(self):
+        content = ("a +https://one.test b +https://two.test c +https://three.test\n"
+                   "+https://one.test +https://broken.test +http://localhost:9000/x end")
+        start = time.perf_counter()
+        result = asyncio.run(archiver.process_plus_links(content, Path("."), app_port=9000))
+        self.assertLess(time.perf_counter() - start, 0.9)  # not 4 x 0.3 s
+        self.assertEqual(sorted(self.calls), ["https://broken.test", "https://one.test",
+                                              "https://three.test", "https://two.test"])
+        self.assertEqual(
+            result["markdown"],
+            "a [https://one.test] b [https://two.test] c [https://three.test]\n"
+            "[https://one.test] https://broken.test "
+            "http://localhost:9000/x *(self-referencing link removed)* end",
+        )
+
+    def test_deadline_leaves_plain_url(self):
+        archiver.PLUS_LINKS_DEADLINE = 0.45
+        result = asyncio.run(archiver.process_plus_links(
+            "+https://fast.test +https://slow.test", Path(".")))
+        self.assertEqual(result["markdown"], "[https://fast.test] https://slow.test")
+
+    def test_detached_links_do_not_hold_the_process(self):
+        archiver.PLUS_LINKS_DEADLINE = 0.45
+        result = asyncio.run(archiver.process_plus_links(
+            "+https://fast.test +https://slow.test", Path("."), detached=True))
+        self.assertEqual(result["markdown"], "[https://fast.test] https://slow.test")
+        # The slow archive is still running, on a thread exit won't join.
+        running = [t for t in threading.enumerate() if t.name == "noteflow-net-detached"]
+        self.assertTrue(running)
+        self.assertTrue(all(t.daemon for t in running))
+
+
+class ArchiveJobsTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name)
+        self.nm = NoteManager(self.folder)
+        self._saved = getattr(app_module, "note_manager", None)
+        app_module.note_manager = self.nm
+        self._original = archiver.archive_website
+        self.release = threading.Event()
+
+        self.written, self.dropped = [], []
+
+        def fake_archive(url, folder_path, before_write=None):
+            if "slow" in url:
+                self.release.wait(5)
+            if "broken" in url:
+                return None
+            if before_write is not None and not before_write():
+                self.dropped.append(url)
+                return None
+            self.written.append(url)
+            return {"html": f"<a>{url}</a>", "markdown": f"[archived {url}]"}
+
+        archiver.archive_website = fake_archive
+
+        class request:
+            class app:
+                class state:
+                    folder_id = None
+                    folder_path = self.folder
+        self.request = request
+
+    def tearDown(self):
+        self.release.set()
+        archiver.archive_website = self._original
+        app_module.save_scheduler.flush()
+        app_module.note_manager = self._saved
+        self.tmp.cleanup()
+
+    def test_store_requeues_running_jobs_on_reload(self):
+        store = archive_jobs.JobStore(self.folder)
+        first = store.create("https://a.test/x")
+        second = store.create("https://b.test/")
+        self.assertTrue(store.claim(first["id"]))
+        store.update(second["id"], status=archive_jobs.DONE)
+        self.assertFalse(store.claim(second["id"]))
+        self.assertIn('"archive-job:%s"' % first["id"], first["placeholder"])
+
+        reloaded = archive_jobs.JobStore(self.folder)
+        pending = reloaded.pending()
+        self.assertEqual([j["id"] for j in pending], [first["id"]])
+        self.assertEqual((pending[0]["status"], pending[0]["attempts"]), (archive_jobs.QUEUED, 1))
+        self.assertEqual(reloaded.get(second["id"])["status"], archive_jobs.DONE)
+
+    def test_note_saved_with_placeholders_then_rewritten(self):
+        content = "see +https://ok.test/a and +https://broken.test/ and +https://ok.test/a"
+
+        async def run():
+            result = await app_module.add_note(self.request, title="t", content=content)
+            queued = self.nm.notes[0].content
+            await asyncio.gather(*list(app_module._ARCHIVE_TASKS.values()))
+            return result, queued
+
+        result, queued = asyncio.run(run())
+        self.assertEqual(len(result["archive_jobs"]), 2)  # one job per distinct URL
+        self.assertEqual(queued.count("[archiving: ok.test]"), 2)
+        self.assertIn("[archiving: broken.test]", queued)
+
+        text = self.nm.notes[0].content
+        self.assertEqual(text.count("[archived https://ok.test/a]"), 2)
+        self.assertIn("[archive failed: broken.test](<https://broken.test/>", text)
+        jobs = {j["url"]: j for j in archive_jobs.get_store(self.folder).list()}
+        self.assertEqual(jobs["https://ok.test/a"]["status"], archive_jobs.DONE)
+        self.assertEqual(jobs["https://broken.test/"]["status"], archive_jobs.FAILED)
+
+    def test_editor_text_with_stale_placeholder(self):
+        async def run():
+            await app_module.add_note(self.request, title="t", content="a +https://slow.test/a")
+            opened = (await app_module.get_note(0))["content"]
+            self.assertIn("[archiving: slow.test]", opened)
+            # Saved back while the job still runs: the placeholder stays and
+            # the job replaces it when it finishes.
+            await app_module.update_note(0, title="t", content=opened + " b")
+            self.release.set()
+            await asyncio.gather(*list(app_module._ARCHIVE_TASKS.values()))
+            self.assertEqual(self.nm.notes[0].content, "a [archived https://slow.test/a] b")
+            # Saved back after the job finished: the result is put back.
+            await app_module.update_note(0, title="t", content=opened + " c")
+            job_id = archive_jobs.get_store(self.folder).list()[0]["id"]
+            with self.assertRaises(HTTPException) as ctx:
+                await app_module.cancel_archive_job(self.request, job_id)
+            self.assertEqual(ctx.exception.status_code, 409)
+
+        asyncio.run(run())
+        self.assertEqual(self.nm.notes[0].content, "a [archived https://slow.test/a] c")
+        self.assertEqual(archive_jobs.get_store(self.folder).list()[0]["status"], archive_jobs.DONE)
+
+    def test_retry_and_cancel(self):
+        async def run():
+            await app_module.add_note(self.request, title="t",
+                                      content="+https://broken.test/ +https://slow.test/")
+            store = archive_jobs.get_store(self.folder)
+            jobs = {j["url"]: j for j in store.list()}
+            broken, slow = jobs["https://broken.test/"], jobs["https://slow.test/"]
+            await app_module._ARCHIVE_TASKS[broken["id"]]
+
+            archiver.archive_website = lambda url, folder_path, **_: {"markdown": "[fixed]"}
+            await app_module.retry_archive_job(self.request, broken["id"])
+            await app_module._ARCHIVE_TASKS[broken["id"]]
+            with self.assertRaises(HTTPException) as ctx:
+                await app_module.retry_archive_job(self.request, broken["id"])
+            self.assertEqual(ctx.exception.status_code, 409)
+
+            cancelled = await app_module.cancel_archive_job(self.request, slow["id"])
+            self.release.set()
+            return cancelled["job"]
+
+        job = asyncio.run(run())
+        self.assertEqual(job["status"], archive_jobs.CANCELLED)
+        self.assertEqual(self.nm.notes[0].content, "[fixed] https://slow.test/")
+
+    def test_deadline_starts_when_claimed_and_late_results_are_dropped(self):
+        deadline = archiver.PLUS_LINKS_DEADLINE
+        archiver.PLUS_LINKS_DEADLINE = 0.3
+        pool_free = threading.Event()
+        busy = [executors.get_pool("net").submit(pool_free.wait, 5)
+                for _ in range(executors.POOL_SIZES["net"])]
+
+        async def run():
+            await app_module.add_note(self.request, title="t",
+                                      content="+https://ok.test/ +https://slow.test/")
+            # Both jobs sit in the full pool for longer than the deadline.
+            await asyncio.sleep(0.5)
+            pool_free.set()
+            await asyncio.gather(*list(app_module._ARCHIVE_TASKS.values()))
+            # The slow page arrives after its job timed out.
+            self.release.set()
+            for _ in range(100):
+                if self.dropped:
+                    break
+                await asyncio.sleep(0.02)
+
+        try:
+            asyncio.run(run())
+        finally:
+            pool_free.set()
+            archiver.PLUS_LINKS_DEADLINE = deadline
+            for future in busy:
+                future.result(5)
+        jobs = {j["url"]: j for j in archive_jobs.get_store(self.folder).list()}
+        self.assertEqual(jobs["https://ok.test/"]["status"], archive_jobs.DONE)
+        self.assertEqual(jobs["https://slow.test/"]["status"], archive_jobs.FAILED)
+        self.assertIn("Timed out", jobs["https://slow.test/"]["error"])
+        self.assertEqual((self.written, self.dropped), (["https://ok.test/"], ["https://slow.test/"]))
+
 
 class AIContextTests(unittest.TestCase):
     def test_recent_notes(self):
@@ -204,5 +1923,37 @@ class AIContextTests(unittest.TestCase):
         self.assertIn("opted out", msgs[0]["content"])
 
 
+class StartupImportTests(unittest.TestCase):
+    def test_cli_and_note_model_skip_web_stack(self):
+        probe = (
+            "import sys, noteflow.cli, noteflow.notes, noteflow.config\n"
+            "heavy = ('fastapi', 'starlette', 'pydantic', 'psutil', 'markdown_it', 'requests')\n"
+            "print(' '.join(sorted(m for m in sys.modules if m.split('.')[0] in heavy)))"
+        )
+        with tempfile.TemporaryDirectory() as home:
+            out = subprocess.run(
+                [sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                env=dict(os.environ, HOME=home),
+                cwd=Path(__file__).resolve().parent.parent,
+            )
+        self.assertEqual(out.stdout.strip(), "")
+
+    def test_append_without_web_app(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            probe = (
+                "import sys\n"
+                "from noteflow import cli\n"
+                f"cli.run_append(['--folder', {tmp!r}, '--title', 't', '--body', '- [ ] x'])\n"
+                "assert 'noteflow.noteflow' not in sys.modules and 'fastapi' not in sys.modules\n"
+            )
+            subprocess.run(
+                [sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                env=dict(os.environ, HOME=tmp),
+                cwd=Path(__file__).resolve().parent.parent,
+            )
+            text = (Path(tmp) / "notes.md").read_text(encoding="utf-8")
+        self.assertIn("- [ ] x", text)
+
+
 if __name__ == "__main__":
     unittest.main()